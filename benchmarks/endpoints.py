@@ -0,0 +1,87 @@
+"""Benchmark of endpoints parsing: regular expression based
+implementation against fast path and cache of `Endpoint`.
+
+Run from the repository root:
+
+    python benchmarks/endpoints.py
+
+"""
+import os
+import sys
+from timeit import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bowerer.nodes import PackageEndpoint
+from bowerer.utils import Endpoint
+
+
+def decompose_from_json_regex(key, val):
+    """Previous implementation: every pair is parsed with a regular expression."""
+    key = (key or '').strip()
+    val = (val or '').strip()
+
+    endpoint = '%s=' % key
+    split = [item.strip() for item in val.split('#')]
+
+    if len(split) > 1:
+        endpoint += (split[0] or key) + '#' + split[1]
+
+    elif Endpoint.RE_SOURCE.findall(val):
+        endpoint += val + '#*'
+
+    else:
+        endpoint += key + '#' + split[0]
+
+    match = Endpoint.RE_ENDPOINT.match(endpoint)
+    target = (match.group(3) or '').strip()
+
+    return PackageEndpoint(
+        name=(match.group(1) or '').strip(),
+        source=(match.group(2) or '').strip(),
+        target='*' if Endpoint.is_wildcard(target) else target)
+
+
+def make_dependencies(count):
+    """Returns bower.json-like dependencies, one of ten having a source."""
+    dependencies = {}
+
+    for idx in range(count):
+        if idx % 10:
+            dependencies['package%s' % idx] = '~1.%s.0' % (idx % 5)
+        else:
+            dependencies['package%s' % idx] = 'owner/package%s#^2.0.0' % idx
+
+    return dependencies
+
+
+def main():
+    # The same pairs come up for every package depending on them.
+    trees = [make_dependencies(20) for _ in range(500)]
+    count = sum(len(dependencies) for dependencies in trees)
+
+    def run_regex():
+        return [decompose_from_json_regex(key, val) for dependencies in trees for key, val in dependencies.items()]
+
+    def run_pairs():
+        Endpoint._parsed.clear()
+        return [Endpoint.decompose_from_json(key, val) for dependencies in trees for key, val in dependencies.items()]
+
+    def run_many():
+        Endpoint._parsed.clear()
+        return [Endpoint.decompose_many(dependencies) for dependencies in trees]
+
+    def run_uncached():
+        return [Endpoint._parse_json(key, val) for dependencies in trees for key, val in dependencies.items()]
+
+    for title, func in (
+            ('regex', run_regex),
+            ('fast path, no cache', run_uncached),
+            ('decompose_from_json', run_pairs),
+            ('decompose_many', run_many)):
+        spent = timeit(func, number=10) / 10
+        print('%6s pairs, %-20s %7.2f ms' % (count, title, spent * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+"""Synthetic fixtures for benchmarks: generated projects
+and a local server speaking registry and GitHub API for them.
+
+"""
+import io
+import json
+import os
+import random
+import tarfile
+import threading
+import time
+from collections import OrderedDict
+from hashlib import sha1
+from os.path import join
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import urlparse, unquote
+
+
+VERSIONS = ('1.0.0', '1.0.1', '1.1.0')
+
+GITHUB_OWNER = 'bench'
+
+
+class SyntheticProject(object):
+    """Project depending on generated packages.
+
+    Packages are spread over `depth` levels, every package depends on
+    up to `fanout` packages of the next level (each of them has at least
+    one dependant), the project itself depends on the first level.
+
+    Dependencies are on `^1.0.0` range, a `conflicts` share of them
+    is on `~1.0.0` instead, so that the latest version (1.1.0) doesn't
+    suit every dependant and a common one has to be elected.
+
+    There are also `links` components symlinked into components
+    directory (as made by `bower link`).
+
+    """
+
+    def __init__(self, components=200, depth=5, fanout=3, conflicts=0.2, links=3, files=5, seed=0):
+        self.params = OrderedDict([
+            ('components', components),
+            ('depth', depth),
+            ('fanout', fanout),
+            ('conflicts', conflicts),
+            ('links', links),
+            ('files', files),
+            ('seed', seed),
+        ])
+        self.files = files
+        self.links = ['linked%s' % idx for idx in range(links)]
+        self.dependencies = {}
+        self.root_dependencies = OrderedDict()
+        self._archives = {}
+        self._archives_lock = threading.Lock()
+        self._generate(random.Random(seed), components, max(depth, 1), fanout, conflicts)
+
+    def _generate(self, rnd, components, depth, fanout, conflicts):
+        levels = [[] for _ in range(min(depth, components))]
+
+        for idx in range(components):
+            levels[idx % len(levels)].append('package%s' % idx)
+
+        def get_range():
+            return '~1.0.0' if rnd.random() < conflicts else '^1.0.0'
+
+        for level, children in zip(levels, levels[1:] + [[]]):
+            for name in level:
+                self.dependencies[name] = OrderedDict()
+
+            for idx, child in enumerate(children):
+                # Every package has a dependant.
+                self.dependencies[level[idx % len(level)]][child] = get_range()
+
+            for name in level:
+                dependencies = self.dependencies[name]
+                extra = [child for child in children if child not in dependencies]
+
+                for child in rnd.sample(extra, min(len(extra), max(fanout - len(dependencies), 0))):
+                    dependencies[child] = get_range()
+
+        for name in levels[0]:
+            self.root_dependencies[name] = get_range()
+
+    @classmethod
+    def get_commit(cls, name, version):
+        return sha1(('%s#%s' % (name, version)).encode('utf-8')).hexdigest()
+
+    def get_url(self, name):
+        """Returns repository URL for a package registered.
+
+        :param str name:
+        :rtype: str
+        """
+        return 'https://github.com/%s/%s.git' % (GITHUB_OWNER, name)
+
+    def get_pkg_meta(self, name, version):
+        return OrderedDict([
+            ('name', name),
+            ('version', version),
+            ('main', '%s.js' % name),
+            ('dependencies', self.dependencies[name]),
+        ])
+
+    def get_archive(self, name, version):
+        """Returns .tar.gz contents of a package version
+        laid out as GitHub makes them.
+
+        :param str name:
+        :param str version:
+        :rtype: bytes
+        """
+        key = (name, version)
+
+        with self._archives_lock:
+            archive = self._archives.get(key)
+
+        if archive is not None:
+            return archive
+
+        prefix = '%s-%s-%s' % (GITHUB_OWNER, name, self.get_commit(name, version)[:7])
+
+        files = [('bower.json', json.dumps(self.get_pkg_meta(name, version), indent=2))]
+        files.extend(
+            ('src/module%s.js' % idx, '// %s %s\n%s' % (name, version, 'var a = 1;\n' * 50))
+            for idx in range(self.files))
+
+        buffer = io.BytesIO()
+
+        with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+            for filename, contents in files:
+                contents = contents.encode('utf-8')
+                info = tarfile.TarInfo('%s/%s' % (prefix, filename))
+                info.size = len(contents)
+                info.mtime = 0
+                tar.addfile(info, io.BytesIO(contents))
+
+        archive = buffer.getvalue()
+
+        with self._archives_lock:
+            self._archives[key] = archive
+
+        return archive
+
+    def write(self, cwd):
+        """Writes project bower.json and linked components sources.
+
+        :param str cwd:
+        """
+        if not os.path.isdir(cwd):
+            os.makedirs(cwd)
+
+        with open(join(cwd, 'bower.json'), 'w') as f:
+            json.dump({'name': 'synthetic', 'dependencies': self.root_dependencies}, f, indent=2)
+
+        for name in self.links:
+            link_source = self.get_link_source(cwd, name)
+
+            if not os.path.isdir(link_source):
+                os.makedirs(link_source)
+
+            with open(join(link_source, 'bower.json'), 'w') as f:
+                json.dump({'name': name, 'version': '0.1.0'}, f)
+
+        self.write_links(cwd)
+
+    def get_link_source(self, cwd, name):
+        return join(os.path.dirname(cwd), 'links', name)
+
+    def write_links(self, cwd, directory='bower_components'):
+        """Symlinks linked components into components directory.
+
+        :param str cwd:
+        :param str directory:
+        """
+        components_dir = join(cwd, directory)
+
+        if not os.path.isdir(components_dir):
+            os.makedirs(components_dir)
+
+        for name in self.links:
+            link = join(components_dir, name)
+
+            if not os.path.islink(link):
+                os.symlink(self.get_link_source(cwd, name), link)
+
+
+class FakeServer(ThreadingMixIn, HTTPServer):
+    """Local server speaking registry API and the parts
+    of GitHub API (tags, raw files, tarballs) used for packages
+    of a synthetic project.
+
+    Routes::
+
+        /packages/<name>  - registry data
+        /repos/<owner>/<name>/tags
+        /raw/<owner>/<name>/<tag>/bower.json
+        /tarballs/<name>/<tag>.tar.gz
+
+    `latency` (seconds) is added to every response to mimic network.
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, project, latency=0):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), FakeRequestHandler)
+        self.project = project
+        self.latency = latency
+        self.requests_count = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:%s' % self.server_address[1]
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class FakeRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    # Responses are written at once (headers along with body).
+    wbufsize = -1
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        server = self.server
+        project = server.project
+        server.requests_count += 1
+
+        if server.latency:
+            time.sleep(server.latency)
+
+        parts = [unquote(part) for part in urlparse(self.path).path.strip('/').split('/')]
+        route, count = parts[0], len(parts)
+
+        def is_known(name, version=VERSIONS[0]):
+            return name in project.dependencies and version in VERSIONS
+
+        if route == 'packages' and count == 2 and is_known(parts[1]):
+            return self.send_json({'name': parts[1], 'url': project.get_url(parts[1])})
+
+        if route == 'repos' and count == 4 and parts[3] == 'tags' and is_known(parts[2]):
+            return self.send_json([{
+                'name': 'v%s' % version,
+                'commit': {'sha': project.get_commit(parts[2], version)},
+                'tarball_url': '%s/tarballs/%s/v%s.tar.gz' % (server.url, parts[2], version),
+            } for version in reversed(VERSIONS)])
+
+        if route == 'raw' and count == 5 and parts[4] == 'bower.json' and is_known(parts[2], parts[3][1:]):
+            return self.send_json(project.get_pkg_meta(parts[2], parts[3][1:]))
+
+        if route == 'tarballs' and count == 3 and parts[2].endswith('.tar.gz'):
+            version = parts[2][1:-len('.tar.gz')]
+
+            if is_known(parts[1], version):
+                return self.send_body(project.get_archive(parts[1], version), 'application/octet-stream')
+
+        return self.send_not_found()
+
+    def send_json(self, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_body(body, 'application/json', etag='"%s"' % sha1(body).hexdigest())
+
+    def send_body(self, body, content_type, etag=None):
+        if etag and self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if etag:
+            self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_not_found(self):
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
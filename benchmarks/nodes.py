@@ -0,0 +1,70 @@
+"""Benchmark of tree nodes memory footprint and comparison speed:
+plain dicts against slotted `PackageNode` instances.
+
+Run from the repository root (Python 3.4+ is needed for tracemalloc):
+
+    python benchmarks/nodes.py
+
+"""
+import os
+import sys
+import tracemalloc
+from timeit import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bowerer.nodes import PackageNode
+from bowerer.utils import Endpoint
+
+
+COUNT = 20000
+
+
+def make_data(idx):
+    return {
+        'name': 'package%s' % (idx % 500),
+        'source': 'https://github.com/owner/package%s.git' % (idx % 500),
+        'target': '~1.%s.0' % (idx % 7),
+        'canonicalDir': '/project/bower_components/package%s' % idx,
+        'pkgMeta': None,
+        'dependencies': None,
+        'dependants': None,
+        'missing': True,
+    }
+
+
+def measure_memory(factory):
+    tracemalloc.start()
+    items = [factory(make_data(idx)) for idx in range(COUNT)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, items
+
+
+def main():
+    size_dicts, dicts = measure_memory(dict)
+    size_nodes, nodes = measure_memory(PackageNode.from_dict)
+
+    print('%s nodes memory: dicts %7.2f MB, PackageNode %7.2f MB' % (
+        COUNT, size_dicts / 1048576.0, size_nodes / 1048576.0))
+
+    # Identity keys are used to find already seen endpoints (e.g. in tree walks).
+    spent_dicts = timeit(lambda: set(Endpoint.get_key(item) for item in dicts), number=10) / 10
+    spent_nodes = timeit(lambda: set(Endpoint.get_key(item) for item in nodes), number=10) / 10
+    spent_set = timeit(lambda: set(nodes), number=10) / 10
+
+    print('%s nodes seen set: dict keys %7.2f ms, PackageNode keys %7.2f ms, PackageNode set %7.2f ms' % (
+        COUNT, spent_dicts * 1000, spent_nodes * 1000, spent_set * 1000))
+
+    pairs_dicts = list(zip(dicts, dicts[1:]))
+    pairs_nodes = list(zip(nodes, nodes[1:]))
+
+    spent_dicts = timeit(lambda: [a == b for a, b in pairs_dicts], number=10) / 10
+    spent_nodes = timeit(lambda: [a == b for a, b in pairs_nodes], number=10) / 10
+
+    print('%s comparisons: dicts %7.2f ms, PackageNode %7.2f ms' % (
+        len(pairs_dicts), spent_dicts * 1000, spent_nodes * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Benchmark of command line tool startup time.
+
+Run from the repository root:
+
+    python benchmarks/startup.py [--max-ms 50] [--runs 20]
+
+Measures `bowerer --version` against a bare interpreter start
+and exits with non-zero status if the overhead exceeds the target.
+Modules taking the most time to import are listed (as reported
+by `python -X importtime`).
+
+"""
+import argparse
+import os
+import subprocess
+import sys
+from time import time
+
+
+PATH_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CODE_VERSION = "import sys; sys.argv = ['bowerer', '--version']; from bowerer.console import main; main()"
+
+
+def run(args):
+    env = dict(os.environ, PYTHONPATH=PATH_BASE)
+    started = time()
+    process = subprocess.Popen(
+        [sys.executable] + args, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    _, err = process.communicate()
+    return time() - started, err.decode('utf-8', 'replace')
+
+
+def measure(args, runs):
+    """Returns the best of wall clock times of running interpreter with given args.
+
+    :param list args:
+    :param int runs:
+    :rtype: float
+    """
+    return min(run(args)[0] for _ in range(runs))
+
+
+def get_slowest_imports(count=10):
+    """Returns (cumulative microseconds, module) tuples for the slowest
+    imports made by the tool on startup.
+
+    :param int count:
+    :rtype: list
+    """
+    _, err = run(['-X', 'importtime', '-c', CODE_VERSION])
+    found = []
+
+    for line in err.splitlines():
+        if not line.startswith('import time:'):
+            continue
+
+        try:
+            _, cumulative, module = line[len('import time:'):].split('|')
+            cumulative = int(cumulative)
+
+        except ValueError:
+            continue
+
+        if module.strip() == 'site':
+            # Imports made so far are done on interpreter startup.
+            found = []
+            continue
+
+        found.append((cumulative, module.rstrip()))
+
+    return sorted(found, reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measures bowerer startup time.')
+    parser.add_argument('--max-ms', type=float, default=50, help='Allowed overhead over bare interpreter')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+
+    spent_bare = measure(['-c', 'pass'], args.runs)
+    spent_version = measure(['-c', CODE_VERSION], args.runs)
+    overhead = (spent_version - spent_bare) * 1000
+
+    print('interpreter %7.2f ms' % (spent_bare * 1000))
+    print('--version   %7.2f ms (overhead %.2f ms, allowed %.2f ms)' % (
+        spent_version * 1000, overhead, args.max_ms))
+
+    if sys.version_info >= (3, 7):
+        print('\nSlowest imports (cumulative):')
+        for spent, module in get_slowest_imports():
+            print('%9.2f ms  %s' % (spent / 1000.0, module))
+
+    if overhead > args.max_ms:
+        print('\nStartup overhead exceeds %.2f ms' % args.max_ms)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,283 @@
+"""Benchmark suite timing the main install phases
+for a synthetic project served by a local fake registry and GitHub.
+
+Run from the repository root:
+
+    python benchmarks/suite.py [--components 200] [--depth 5] [--fanout 3] [--conflicts 0.2]
+                               [--links 3] [--latency-ms 0] [--runs 3]
+                               [--baseline benchmarks/baseline.json] [--tolerance 0.5] [--save]
+
+Phases timed (the best of runs is taken):
+
+    config.load  - loading configuration (rc files are cached)
+    analyse  - reading bower.json and restoring installed dependency tree
+    gather_installed  - reading installed components metadata
+    resolve  - resolving dependencies with no HTTP caches
+    install  - end-to-end install into an empty components directory with no caches
+    install (locked)  - install from bower.lock into an empty components directory
+
+Timings are compared to the baseline stored with `--save` for the same
+parameters: exits with non-zero status if a phase is slower than
+the baseline by more than a tolerated share. Baselines depend on
+the machine, save them where the suite is run (e.g. a CI worker).
+
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+from os.path import join
+from time import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bowerer import config as bowerer_config
+from bowerer.hosts import GitHub, GitRemote
+from bowerer.lock import Lockfile
+from bowerer.manager import Manager
+from bowerer.project import Project
+from bowerer.settings import LOGGER
+from bowerer.utils import Endpoint
+
+from fixtures import SyntheticProject, FakeServer
+
+
+PATH_BASELINE = join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Regressions smaller than that are considered noise.
+MIN_DELTA_MS = 2
+
+
+class Suite(object):
+    """Synthetic project set up in a temporary directory
+    along with a fake server for its packages.
+
+    """
+
+    def __init__(self, project, latency=0):
+        self.project = project
+        self.path = tempfile.mkdtemp(prefix='bowerer-bench-')
+        self.cwd = join(self.path, 'project')
+        self.server = FakeServer(project, latency=latency)
+        self._runs = 0
+        self._github_urls = None
+
+    def __enter__(self):
+        self.server.start()
+
+        self._github_urls = GitHub.BASE_URL, GitHub.RAW_URL
+        GitHub.BASE_URL, GitHub.RAW_URL = self.server.url, '%s/raw' % self.server.url
+
+        self.project.write(self.cwd)
+
+        with open(join(self.cwd, '.bowerrc'), 'w') as f:
+            json.dump({'registry': {'search': [self.server.url]}, 'proxy': None, 'https-proxy': None}, f)
+
+        return self
+
+    def __exit__(self, *exc_info):
+        GitHub.BASE_URL, GitHub.RAW_URL = self._github_urls
+        self.server.stop()
+        GitRemote.cleanup()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def get_config(self, cold=False):
+        """Returns configuration for the project.
+
+        :param bool cold: Use new (empty) storage for packages and HTTP caches.
+        :rtype: dict
+        """
+        storage = join(self.path, 'storage')
+
+        if cold:
+            self._runs += 1
+            storage = join(self.path, 'storage-%s' % self._runs)
+
+        return bowerer_config.load({
+            'cwd': self.cwd,
+            'tmp': join(self.path, 'tmp'),
+            'storage': {
+                'packages': join(storage, 'packages'),
+                'registry': join(storage, 'registry'),
+                'http': join(storage, 'http'),
+                'analysis': join(self.path, 'analysis'),
+            },
+        })
+
+    def clear_installed(self, keep_lock=False):
+        shutil.rmtree(join(self.cwd, 'bower_components'), ignore_errors=True)
+
+        if not keep_lock and os.path.exists(join(self.cwd, Lockfile.filename)):
+            os.remove(join(self.cwd, Lockfile.filename))
+
+        self.project.write_links(self.cwd)
+
+    def install(self, keep_lock=False):
+        self.clear_installed(keep_lock)
+        config = self.get_config(cold=True)
+        Project(config).install([], {'force_latest': False}, config)
+
+    def analyse(self):
+        project = Project(self.get_config())
+        return project.analyse()
+
+    def gather_installed(self):
+        return Project(self.get_config()).gather_installed()
+
+    def resolve(self):
+        manager = Manager(self.get_config(cold=True))
+        manager.configure({'targets': Endpoint.decompose_many(self.project.root_dependencies)})
+        return manager.resolve()
+
+    def get_phases(self):
+        """Returns (title, function) pairs for phases to time.
+
+        :rtype: list
+        """
+        return [
+            ('config.load', lambda: bowerer_config.load({'cwd': self.cwd})),
+            ('analyse', self.analyse),
+            ('gather_installed', self.gather_installed),
+            ('resolve', self.resolve),
+            ('install', self.install),
+            ('install (locked)', lambda: self.install(keep_lock=True)),
+        ]
+
+    def check(self):
+        """Installs the project to make sure the fixture is sound.
+        Returns the number of components installed.
+
+        :rtype: int
+        """
+        self.install()
+        _, _, installed = self.analyse()
+        missing = sorted(name for name, node in installed.items() if node.get('missing'))
+
+        if missing:
+            raise AssertionError('Components are not installed: %s' % ', '.join(missing))
+
+        return len(installed)
+
+
+def measure(func, runs):
+    """Returns the best of wall clock times (ms) of calling a function.
+
+    :param func:
+    :param int runs:
+    :rtype: float
+    """
+    spent = []
+
+    for _ in range(runs):
+        started = time()
+        func()
+        spent.append((time() - started) * 1000)
+
+    return min(spent)
+
+
+def read_baseline(filepath):
+    try:
+        with open(filepath) as f:
+            return json.load(f)
+
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def get_regressions(timings, baseline, tolerance):
+    """Returns (phase, spent, baseline spent) tuples
+    for phases slower than baseline more than tolerated.
+
+    :param dict timings:
+    :param dict baseline:
+    :param float tolerance: Tolerated share, e.g. 0.5 for 50%.
+    :rtype: list
+    """
+    regressions = []
+
+    for phase, spent in timings.items():
+        spent_baseline = baseline.get(phase)
+
+        if spent_baseline is None:
+            continue
+
+        if spent > spent_baseline * (1 + tolerance) and spent - spent_baseline > MIN_DELTA_MS:
+            regressions.append((phase, spent, spent_baseline))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Times install phases for a synthetic project.')
+    parser.add_argument('--components', type=int, default=200)
+    parser.add_argument('--depth', type=int, default=5)
+    parser.add_argument('--fanout', type=int, default=3)
+    parser.add_argument('--conflicts', type=float, default=0.2, help='Share of dependencies on narrower ranges')
+    parser.add_argument('--links', type=int, default=3, help='Number of symlinked components')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Latency added to server responses')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--baseline', default=PATH_BASELINE)
+    parser.add_argument('--tolerance', type=float, default=0.5, help='Tolerated slowdown share')
+    parser.add_argument('--save', action='store_true', default=False, help='Save timings as the baseline')
+    args = parser.parse_args()
+
+    LOGGER.setLevel(logging.WARNING)
+    logging.getLogger("urllib3").setLevel(logging.ERROR)
+
+    project = SyntheticProject(
+        components=args.components, depth=args.depth, fanout=args.fanout,
+        conflicts=args.conflicts, links=args.links)
+
+    params = OrderedDict(project.params, latency_ms=args.latency_ms)
+    timings = OrderedDict()
+
+    with Suite(project, latency=args.latency_ms / 1000.0) as suite:
+        installed = suite.check()
+        print('%s components installed (%s of them linked), %s requests served' % (
+            installed, args.links, suite.server.requests_count))
+
+        for phase, func in suite.get_phases():
+            timings[phase] = measure(func, args.runs)
+            print('%-20s %9.2f ms' % (phase, timings[phase]))
+
+    if args.save:
+        with open(args.baseline, 'w') as f:
+            json.dump(OrderedDict([
+                ('params', params),
+                ('python', platform.python_version()),
+                ('timings', OrderedDict((phase, round(spent, 2)) for phase, spent in timings.items())),
+            ]), f, indent=2)
+            f.write('\n')
+
+        print('\nBaseline saved into %s' % args.baseline)
+        return
+
+    baseline = read_baseline(args.baseline)
+
+    if not baseline:
+        print('\nNo baseline in %s, use --save to store one' % args.baseline)
+        return
+
+    if baseline.get('params') != params:
+        print('\nBaseline in %s is for other parameters: %s' % (args.baseline, json.dumps(baseline.get('params'))))
+        return
+
+    regressions = get_regressions(timings, baseline['timings'], args.tolerance)
+
+    if regressions:
+        print('\nSlower than baseline by more than %d%%:' % (args.tolerance * 100))
+        for phase, spent, spent_baseline in regressions:
+            print('%-20s %9.2f ms (baseline %.2f ms)' % (phase, spent, spent_baseline))
+        sys.exit(1)
+
+    print('\nNo regressions against %s' % args.baseline)
+
+
+if __name__ == '__main__':
+    main()
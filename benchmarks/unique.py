@@ -0,0 +1,50 @@
+"""Microbenchmark of endpoints de-duplication.
+
+Run from the repository root:
+
+    python benchmarks/unique.py
+
+Timings for growing numbers of synthetic endpoints should grow linearly.
+
+"""
+import os
+import sys
+from timeit import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bowerer.graph import DependencyGraph
+from bowerer.manager import Manager
+
+
+def make_endpoints(count):
+    """Returns synthetic endpoints, every fourth of them being a duplicate."""
+    return [
+        {'name': 'package%s' % (idx % (count * 3 // 4)), 'source': 'source%s' % idx, 'target': '~1.%s.0' % (idx % 3)}
+        for idx in range(count)]
+
+
+def make_graph(count):
+    graph = DependencyGraph()
+    root = {'name': 'root'}
+
+    for idx, endpoint in enumerate(make_endpoints(count)):
+        graph.add_edge(root, endpoint['name'], endpoint)
+
+    return graph, root
+
+
+def main():
+    for count in (2500, 5000, 10000):
+        endpoints = make_endpoints(count)
+        graph, root = make_graph(count)
+
+        spent_unique = timeit(lambda: Manager._make_unique(endpoints), number=10) / 10
+        spent_walk = timeit(lambda: graph.walk(root, lambda node, name: None), number=10) / 10
+
+        print('%6s endpoints: make_unique %7.2f ms, walk_tree %7.2f ms' % (
+            count, spent_unique * 1000, spent_walk * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,30 @@
 from .config import load
 from .utils import Endpoint
+from .mirror import Mirror
 from .project import Project
 
 
 def install(endpoint, config, **options):
     # force_latest=False, production=False, save=False, save_dev=False, save_exact=False,
     config = load(config)
-    endpoints = map(Endpoint.decompose, endpoint)
+    config['offline'] = options.get('offline') or config['offline']
+    endpoints = [Endpoint.decompose(item) for item in endpoint]
     project = Project(config)
     project.install(endpoints, options, config)
+
+
+def mirror(mirror_subparsers, directory, config, **options):
+    config = load(config)
+    config['offline'] = options.get('offline') or config['offline']
+    local_mirror = Mirror(directory, config)
+
+    if mirror_subparsers == 'serve':
+        local_mirror.serve((options.get('host') or '', int(options.get('port') or 5678)))
+        return
+
+    endpoints = [Endpoint.decompose(item) for item in options.get('endpoint') or []]
+
+    if endpoints:
+        local_mirror.add_endpoints(endpoints)
+    else:
+        local_mirror.add_project(config['cwd'])
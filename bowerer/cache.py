@@ -0,0 +1,191 @@
+"""Exposes persistent on-disk HTTP response cache."""
+import json
+import os
+import tempfile
+import threading
+from hashlib import sha1
+from os.path import join, exists, getsize
+from time import time
+
+from .settings import LOGGER
+
+
+TTL_DEFAULT = 300
+SIZE_DEFAULT = 100 * 1024 * 1024
+
+
+class ResponseCache(object):
+    """Persistent cache of JSON responses keyed by URL.
+
+    Stores response body along with its validators (ETag, Last-Modified),
+    so that stale entries may be revalidated with conditional requests.
+    Evicts least recently used entries when cache size exceeds a limit.
+
+    """
+
+    def __init__(self, path, ttl=TTL_DEFAULT, max_size=SIZE_DEFAULT):
+        self.path = path
+        self.ttl = ttl
+        self.max_size = max_size
+        self._size = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns cache instance configured from bowerrc or None
+        if cache storage is not configured.
+
+        :param dict config:
+        :rtype: ResponseCache|None
+        """
+        path = (config.get('storage') or {}).get('http')
+
+        if not path:
+            return None
+
+        ttl = config.get('cache-ttl')
+        max_size = config.get('cache-size')
+
+        return cls(
+            path,
+            ttl=TTL_DEFAULT if ttl is None else int(ttl),
+            max_size=SIZE_DEFAULT if max_size is None else int(max_size))
+
+    def get_filepath(self, url):
+        hashed = sha1(url.encode('utf-8')).hexdigest()
+        return join(self.path, hashed[:2], hashed + '.json')
+
+    def get(self, url):
+        """Returns cache entry for a given URL or None.
+
+        Entry is a dict with `body`, `etag`, `last_modified`, `links` and `stored` keys.
+
+        :param str url:
+        :rtype: dict|None
+        """
+        filepath = self.get_filepath(url)
+
+        try:
+            with open(filepath) as f:
+                entry = json.load(f)
+
+            # Modification time is used as a last access mark for LRU.
+            os.utime(filepath, None)
+
+        except (IOError, OSError, ValueError):
+            return None
+
+        if entry.get('url') != url:
+            return None
+
+        return entry
+
+    def is_fresh(self, entry):
+        """Returns flag whether entry could be used without revalidation.
+
+        :param dict entry:
+        :rtype: bool
+        """
+        return time() - entry['stored'] < self.ttl
+
+    def set(self, url, body, etag=None, last_modified=None, links=None):
+        """Puts response into cache.
+
+        :param str url:
+        :param body: Decoded JSON.
+        :param str etag:
+        :param str last_modified:
+        :param dict links: URLs from Link header indexed by relation types.
+        :rtype: dict
+        """
+        entry = {
+            'url': url,
+            'body': body,
+            'etag': etag,
+            'last_modified': last_modified,
+            'links': links or {},
+            'stored': time(),
+        }
+        self._write(url, entry)
+        return entry
+
+    def touch(self, url, entry):
+        """Marks entry as just revalidated.
+
+        :param str url:
+        :param dict entry:
+        """
+        entry['stored'] = time()
+        self._write(url, entry)
+
+    def _write(self, url, entry):
+        filepath = self.get_filepath(url)
+        dirpath = os.path.dirname(filepath)
+
+        try:
+            if not exists(dirpath):
+                os.makedirs(dirpath)
+
+            fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+
+            size_old = getsize(filepath) if exists(filepath) else 0
+            os.rename(tmp_path, filepath)
+
+        except (IOError, OSError) as e:
+            LOGGER.debug('Unable to cache %s: %s', url, e)
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._get_size()
+            else:
+                self._size += getsize(filepath) - size_old
+
+            if self._size > self.max_size:
+                self._size = self.evict()
+
+    def _iter_entries(self):
+        for current_dir, _, files in os.walk(self.path):
+            for filename in files:
+                if filename.endswith('.json'):
+                    yield join(current_dir, filename)
+
+    def _get_size(self):
+        return sum(getsize(filepath) for filepath in self._iter_entries())
+
+    def evict(self):
+        """Removes least recently used entries until cache
+        fits into size limit. Returns resulting cache size.
+
+        :rtype: int
+        """
+        entries = []
+        for filepath in self._iter_entries():
+            stat = os.stat(filepath)
+            entries.append((stat.st_mtime, stat.st_size, filepath))
+
+        entries.sort()
+        size = sum(entry[1] for entry in entries)
+
+        for _, entry_size, filepath in entries:
+            if size <= self.max_size:
+                break
+
+            try:
+                os.remove(filepath)
+                size -= entry_size
+
+            except OSError:
+                pass
+
+        return size
+
+    def clear(self):
+        """Removes all entries."""
+        for filepath in list(self._iter_entries()):
+            os.remove(filepath)
+
+        with self._lock:
+            self._size = 0
@@ -1,70 +1,164 @@
 """Exposes functions to work with Bower configuration - bowerrc."""
 import json
-import pwd
+import os
 import tempfile
-from os import environ as env, path, getuid, getcwd
+import threading
+from copy import deepcopy
+from os import environ as env, path, getcwd
 
 from six import string_types, iteritems
 
-from .utils import get_user_agent
-
-try:
-    from functools import reduce
-except ImportError:
-    pass  # Py 2
-
-USERNAME = pwd.getpwuid(getuid())[0]
-
-DIR_CURRENT = getcwd()
-DIR_HOME = path.expanduser('~')
-DIR_TMP = path.join(tempfile.gettempdir(), USERNAME)
-DIR_BASE = path.abspath(DIR_HOME or DIR_TMP)
-
-PROXY = env.get('HTTP_PROXY')
-PROXY_HTTPS = env.get('HTTPS_PROXY', PROXY)
-
-
-PATHS = {
-    'config': env.get('XDG_CONFIG_HOME') or path.join(DIR_BASE, '.config/bower'),
-    'data': env.get('XDG_DATA_HOME') or path.join(DIR_BASE, '.local/share/bower'),
-    'cache': env.get('XDG_CACHE_HOME') or path.join(DIR_BASE, '.cache/bower'),
-    'tmp': DIR_TMP
-}
-
-
-DEFAULTS = {
-    'color': True,
-    'interactive': None,
-
-    'strict-ssl': True,
-    'user-agent': get_user_agent(PROXY or PROXY_HTTPS),
-    'registry': 'https://bower.herokuapp.com',
-    'shorthand-resolver': 'git://github.com/{{owner}}/{{package}}.git',
-    'timeout': 30000,
-    'proxy': PROXY,
-    'https-proxy': PROXY_HTTPS,
-    'ca': {'search': []},
-
-    'cwd': DIR_CURRENT,
-    'directory': 'bower_components',
-    'tmp': PATHS['tmp'],
-    'storage': {
-        'packages': path.join(PATHS['cache'], 'packages'),
-        'links': path.join(PATHS['data'], 'links'),
-        'completion': path.join(PATHS['data'], 'completion'),
-        'registry': path.join(PATHS['cache'], 'registry'),
-        'empty': path.join(PATHS['data'], 'empty')  # Empty dir, used in GIT_TEMPLATE_DIR among others
+from .exceptions import ConfigError
+from .tracing import traced
+
+
+RC_NAME = 'bowerrc'
+
+_ENVIRONMENT = {}
+
+# Parsed rc files: path -> ((mtime, size), contents).
+_RC_FILES = {}
+
+# Configuration merged layer by layer for the last load:
+# [(layer key, configuration merged up to this layer)].
+# Defaults and global rc files don't depend on cwd and are merged separately
+# from `.bowerrc` files found walking up from cwd (merged on top of them).
+_MERGED_GLOBAL = []
+_MERGED_LOCAL = []
+
+_CACHE_LOCK = threading.Lock()
+
+
+def get_environment():
+    """Returns data about the environment (user, directories, proxies)
+    used to build defaults. Computed on first use only, so that merely
+    importing this module is cheap.
+
+    :rtype: dict
+    """
+    if not _ENVIRONMENT:
+        from getpass import getuser
+
+        dir_home = path.expanduser('~')
+        dir_tmp = path.join(tempfile.gettempdir(), getuser())
+        dir_base = path.abspath(dir_home or dir_tmp)
+        proxy = env.get('HTTP_PROXY')
+
+        _ENVIRONMENT.update({
+            'home': dir_home,
+            'proxy': proxy,
+            'https-proxy': env.get('HTTPS_PROXY', proxy),
+            'paths': {
+                'config': env.get('XDG_CONFIG_HOME') or path.join(dir_base, '.config/bower'),
+                'data': env.get('XDG_DATA_HOME') or path.join(dir_base, '.local/share/bower'),
+                'cache': env.get('XDG_CACHE_HOME') or path.join(dir_base, '.cache/bower'),
+                'tmp': dir_tmp
+            },
+        })
+
+    return _ENVIRONMENT
+
+
+def get_user_agent_default():
+    """Returns User Agent string for defaults (computed once).
+
+    :rtype: str
+    """
+    if 'user-agent' not in _ENVIRONMENT:
+        from .utils import get_user_agent
+        environment = get_environment()
+        _ENVIRONMENT['user-agent'] = get_user_agent(environment['proxy'] or environment['https-proxy'])
+
+    return _ENVIRONMENT['user-agent']
+
+
+def get_defaults():
+    """Returns default configuration (a new dictionary on every call).
+
+    :rtype: dict
+    """
+    environment = get_environment()
+    paths = environment['paths']
+
+    return {
+        'color': True,
+        'interactive': None,
+        'offline': False,
+
+        'strict-ssl': True,
+        'user-agent': get_user_agent_default(),
+        'registry': 'https://bower.herokuapp.com',
+        'github-token': env.get('GITHUB_TOKEN'),  # Raises GitHub API rate limit
+        'shorthand-resolver': 'git://github.com/{{owner}}/{{package}}.git',
+        'timeout': 30000,
+        'pool-size': 10,  # Keep-alive connections kept per host
+        'concurrency': 16,  # Simultaneous fetches
+        'concurrency-per-host': 8,  # Simultaneous requests to one host
+        'prefetch': True,  # Get versions of dependencies in background as soon as they are known
+        'cache-ttl': 300,  # Seconds to use cached responses without revalidation
+        'cache-size': 104857600,  # Bytes of cached responses to keep
+        'registry-ttl': 300,  # Seconds to use registry lookup results (including not found)
+        'proxy': environment['proxy'],
+        'https-proxy': environment['https-proxy'],
+        'ca': {'search': []},
+
+        'cwd': getcwd(),
+        'directory': 'bower_components',
+        'tmp': paths['tmp'],
+        'storage': {
+            'packages': path.join(paths['cache'], 'packages'),
+            'links': path.join(paths['data'], 'links'),
+            'completion': path.join(paths['data'], 'completion'),
+            'registry': path.join(paths['cache'], 'registry'),
+            'http': path.join(paths['cache'], 'http'),
+            'analysis': path.join(paths['cache'], 'analysis'),
+            'empty': path.join(paths['data'], 'empty')  # Empty dir, used in GIT_TEMPLATE_DIR among others
+        }
     }
-}
 
 
 _NOT_SET = object()
 
 
+def extend_unique(items, extra):
+    """Appends items not yet present in a list keeping their order.
+
+    :param list items:
+    :param extra: List of items or a single item.
+    :rtype: list
+    """
+    if not isinstance(extra, (list, tuple)):
+        extra = [extra]
+
+    seen = set()
+    for item in items:
+        try:
+            seen.add(item)
+        except TypeError:  # Unhashable.
+            pass
+
+    for item in extra:
+        try:
+            if item in seen:
+                continue
+            seen.add(item)
+
+        except TypeError:
+            if item in items:
+                continue
+
+        items.append(item)
+
+    return items
+
+
 def merge(base, updater):
     """Merges two configuration dictionaries updating one with values
     from another.
 
+    Lists are extended with new items (order is kept),
+    dictionaries are merged recursively.
+
     :param dict base:
     :param dict updater:
     :rtype: dict
@@ -77,10 +171,9 @@ def merge(base, updater):
                 continue
 
             if isinstance(val_base, list):
-                val_base.extend(set(val_updater).difference(val_base))
-                updater[key_base] = val_base
+                updater[key_base] = extend_unique(val_base, val_updater)
 
-            elif isinstance(val_base, dict):
+            elif isinstance(val_base, dict) and isinstance(val_updater, dict):
                 updater[key_base] = merge(val_base, val_updater)
 
         base.update(updater)
@@ -112,7 +205,7 @@ def normalize(conf):
     expand('ca')
 
     registry = conf.get('registry')
-    registry['search'] = map(lambda item: item.rstrip('/'), registry.get('search', []))
+    registry['search'] = [item.rstrip('/') for item in registry.get('search', [])]
     registry['register'] = registry.get('register', '').rstrip('/')
     registry['publish'] = registry.get('publish', '').rstrip('/')
 
@@ -120,50 +213,189 @@ def normalize(conf):
     return conf
 
 
-def read_json(filepath):
-    """Tries to read JSON from a given location.
-    Returns empty dictionary if fails.
+def get_global_rc_paths():
+    """Returns paths of global rc files (some of them may not exist)
+    from the lowest priority to the highest one.
 
-    :param filepath:
-    :rtype: dict
+    :rtype: list
     """
-    contents = {}
+    environment = get_environment()
+
+    return [
+        path.join('/etc', RC_NAME),
+        path.join(environment['home'], '.' + RC_NAME),
+        path.join(environment['paths']['config'], RC_NAME),
+    ]
+
+
+def get_rc_paths(cwd):
+    """Returns paths of rc files (some of them may not exist)
+    from the lowest priority to the highest one.
+
+    Global rc files are followed by `.bowerrc` files found
+    walking up from a given directory (the nearest is the last).
+
+    :param str cwd:
+    :rtype: list
+    """
+    paths = get_global_rc_paths()
+    upward = []
+    current = path.abspath(cwd)
+
+    while True:
+        upward.append(path.join(current, '.' + RC_NAME))
+        parent = path.dirname(current)
+
+        if parent == current:
+            break
+
+        current = parent
+
+    for filepath in reversed(upward):
+        if filepath not in paths:
+            paths.append(filepath)
+
+    return paths
+
+
+def read_rc(filepath):
+    """Returns (stat key, contents) tuple for rc file
+    or (None, None) if there is no such file.
+
+    Files are parsed again only if their modification time or size changed.
+
+    :param str filepath:
+    :rtype: tuple
+    :raises: ConfigError
+    """
+    try:
+        stat = os.stat(filepath)
+
+    except OSError:
+        return None, None
+
+    key = (stat.st_mtime, stat.st_size)
+
+    with _CACHE_LOCK:
+        cached = _RC_FILES.get(filepath)
+
+    if cached and cached[0] == key:
+        return cached
+
     try:
         with open(filepath) as f:
-            contents = json.load(f)
+            contents = f.read()
+
+        contents = json.loads(contents) if contents.strip() else {}
+
+    except (IOError, OSError) as e:
+        raise ConfigError('Unable to read %s: %s' % (filepath, e))
+
+    except ValueError as e:
+        raise ConfigError('Unable to parse %s: %s' % (filepath, e))
+
+    if not isinstance(contents, dict):
+        raise ConfigError('Unable to parse %s: JSON object expected' % filepath)
+
+    with _CACHE_LOCK:
+        _RC_FILES[filepath] = (key, contents)
+
+    return key, contents
+
+
+def read_rc_layers(filepaths):
+    """Returns (layer key, contents) tuples for existing rc files.
+
+    :param list filepaths:
+    :rtype: list
+    """
+    layers = []
+
+    for filepath in filepaths:
+        key, contents = read_rc(filepath)
+
+        if contents is not None:
+            layers.append(((filepath,) + key, contents))
+
+    return layers
+
+
+def merge_layers(layers, chain, base):
+    """Returns a chain of (layer key, configuration merged up to this layer)
+    tuples for given (layer key, contents) layers merged on top of a base.
+
+    The leading part of a chain merged earlier is reused
+    while its layer keys are the same.
+
+    :param list layers:
+    :param list chain: Chain merged earlier on top of the same base.
+    :param dict base:
+    :rtype: list
+    """
+    reused = 0
+    for (key, _), (key_cached, _) in zip(layers, chain):
+        if key != key_cached:
+            break
+        reused += 1
+
+    chain = chain[:reused]
+    merged = chain[-1][1] if chain else base
 
-    except Exception:
-        pass
+    for key, contents in layers[reused:]:
+        merged = merge(deepcopy(merged), deepcopy(contents))
+        chain.append((key, merged))
 
-    return contents
+    return chain
 
 
+@traced('config.load')
 def load(config=None):
     """Loads and returns configuration comprised from data stored
-    in various locations.
+    in various locations: defaults, global rc files, `.bowerrc` files
+    found walking up from `cwd` and a given configuration.
+
+    Results of merging are cached layer by layer, so that only
+    layers following a changed rc file are merged again. Defaults
+    and global rc files are not merged again when `cwd` changes.
 
     :param dict config:
     :rtype: dict
+    :raises: ConfigError
     """
-
     config = config or {}
+    cwd = config.get('cwd') or getcwd()
 
-    name_base = 'bower'
-    name_rc = name_base + 'rc'
-
-    sources = [
-        DEFAULTS,
-        {'cwd': DIR_CURRENT},
-        read_json(path.join('/etc', name_rc)),
-        read_json(path.join(DIR_HOME, '.' + name_rc) if DIR_CURRENT != DIR_HOME else {}),
-        read_json(path.join(PATHS['config'], name_rc)),
-        read_json(path.join(DIR_CURRENT, '.' + name_rc)),  # todo find upwards from parents
-        # env('npm_package_config_' + name + '_'),
-        # env(name + '_'),
-        config
-    ]
-    result = normalize(reduce(merge, sources))
-    return result
+    # Working directory is set after rc files are merged (unless they set it),
+    # so that defaults merged with global rc files are shared by all directories.
+    defaults = get_defaults()
+    del defaults['cwd']
+
+    global_paths = get_global_rc_paths()
+
+    global_layers = [(('defaults', defaults['github-token']), defaults)]
+    global_layers.extend(read_rc_layers(global_paths))
+    local_layers = read_rc_layers(get_rc_paths(cwd)[len(global_paths):])
+
+    with _CACHE_LOCK:
+        global_chain = list(_MERGED_GLOBAL)
+        local_chain = list(_MERGED_LOCAL)
+
+    global_chain = merge_layers(global_layers, global_chain, {})
+    merged_global = global_chain[-1][1]
+
+    # Upward layers merged on top of other global ones are merged again.
+    if not local_chain or local_chain[0][1] is not merged_global:
+        local_chain = [(None, merged_global)]
+
+    local_chain = local_chain[:1] + merge_layers(local_layers, local_chain[1:], merged_global)
+    merged = deepcopy(local_chain[-1][1])
+    merged.setdefault('cwd', cwd)
+
+    with _CACHE_LOCK:
+        _MERGED_GLOBAL[:] = global_chain
+        _MERGED_LOCAL[:] = local_chain
+
+    return normalize(merge(merged, deepcopy(config)))
 
 
 def parse_from_command_line(args):
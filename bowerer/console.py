@@ -1,11 +1,12 @@
-import sys
 import argparse
+import sys
 
-from bowerer.config import parse_from_command_line
-from bowerer.api import *
 
+def get_parser():
+    """Returns command line arguments parser.
 
-def main():
+    :rtype: argparse.ArgumentParser
+    """
     from bowerer import VERSION
 
     version_str = '.'.join(map(str, VERSION) )
@@ -30,6 +31,11 @@ def main():
                              , help='Allows running commands as root')
     main_parser.add_argument('--no-color', action='store_true', default=False,
                              help='Disable colors')
+    main_parser.add_argument('--profile', action='store_true', default=False,
+                             help='Write timings as Chrome trace events (for chrome://tracing) '
+                                  'into a file and print their summary')
+    main_parser.add_argument('--profile-file', default='bowerer-profile.json', metavar='FILE',
+                             help='File to write --profile trace into (default: bowerer-profile.json)')
 
     main_subparsers = main_parser.add_subparsers(dest='main_subparsers')
 
@@ -86,6 +92,20 @@ def main():
     p_link.add_argument('name')
     p_link.add_argument('--local_name')
 
+    p_mirror = p('mirror', help='Manage local mirror of packages.')
+    mirror_subparsers = p_mirror.add_subparsers(dest='mirror_subparsers')
+
+    p_mirror_snapshot = mirror_subparsers.add_parser(
+        'snapshot', help='Puts given endpoints (or project dependencies, locked ones if any) '
+                         'along with their dependencies into mirror.')
+    p_mirror_snapshot.add_argument('directory', help='Mirror directory')
+    p_mirror_snapshot.add_argument('endpoint', nargs='*')
+    p_mirror_serve = mirror_subparsers.add_parser(
+        'serve', help='Serves mirror over HTTP. Add its URL to `registry.search` in .bowerrc to use it.')
+    p_mirror_serve.add_argument('directory', help='Mirror directory')
+    p_mirror_serve.add_argument('--host', default='')
+    p_mirror_serve.add_argument('--port', type=int, default=5678)
+
     # ls
     p_list = p('list', help='List local packages - and possible updates.')
     p_list.add_argument('--paths', '-p', help='Generates a simple JSON source mapping')
@@ -140,15 +160,45 @@ def main():
                        # 'bower version patch -m "Upgrade to %s for reasons"')
     p_version.add_argument('--message', '-m', help='Custom git commit and tag message')
 
-    parsed_args = main_parser.parse_known_args()
+    return main_parser
+
+
+def main():
+    parsed_args = get_parser().parse_known_args()
+
+    # Commands are imported only when about to be run
+    # (so that e.g. `--version` doesn't pay for their imports).
+    from bowerer import api
+    from bowerer.config import parse_from_command_line
+
     other_args = parsed_args[1]
     parsed_args = vars(parsed_args[0])  # Convert known args to dict
     parsed_args['config'] = parse_from_command_line(other_args)
 
     target_func_name = parsed_args['main_subparsers']
     del parsed_args['main_subparsers']
-    target_func = globals()[target_func_name]
-    target_func(**parsed_args)
+    target_func = getattr(api, target_func_name)
+
+    profile = parsed_args.pop('profile')
+    profile_file = parsed_args.pop('profile_file')
+
+    if not profile:
+        target_func(**parsed_args)
+        return
+
+    from bowerer import tracing
+
+    tracing.start()
+
+    try:
+        with tracing.span(target_func_name):
+            target_func(**parsed_args)
+
+    finally:
+        tracer = tracing.stop()
+        tracer.write(profile_file)
+        sys.stdout.write('%s\nTrace is written into %s\n' % (tracer.get_summary(), profile_file))
 
 
-main()
+if __name__ == '__main__':
+    main()
@@ -17,3 +17,23 @@ class JsonError(BowererException):
 
 class ProjectError(BowererException):
     pass
+
+
+class ResolveError(BowererException):
+    pass
+
+
+class StoreError(BowererException):
+    pass
+
+
+class OfflineError(BowererException):
+    pass
+
+
+class ConflictError(ResolveError):
+    pass
+
+
+class ConfigError(BowererException):
+    pass
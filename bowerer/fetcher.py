@@ -0,0 +1,251 @@
+"""Exposes tools to fetch package metadata for endpoints."""
+import threading
+
+from .exceptions import ResolveError
+from .hosts import get_host
+from .registries import Bower
+from .settings import LOGGER
+from .utils import Endpoint
+from .versions import select
+from .workers import Task, WorkerPool
+
+
+class Fetcher(object):
+    """Resolves endpoints into package metadata (pkgMeta)
+    looking up registries and hosts."""
+
+    def __init__(self, config):
+        self.config = config
+        self._lock = threading.Lock()
+        self._versions = {}
+        self._registered = {}
+        self._pool = None
+
+    @classmethod
+    def is_registry_name(cls, source):
+        """Returns flag whether endpoint source is a name to look up in registry.
+
+        :param str source:
+        :rtype: bool
+        """
+        return not Endpoint.RE_SOURCE.findall(source)
+
+    def get_url(self, source):
+        """Returns repository URL for a given endpoint source.
+
+        :param str source: URL, owner/package shorthand or registry name.
+        :rtype: str
+        """
+        if not self.is_registry_name(source):
+
+            if source.count('/') == 1 and ':' not in source and '@' not in source:
+                # Shorthand: owner/package
+                owner, package = source.split('/')
+                resolver = self.config.get('shorthand-resolver', '')
+                return resolver.replace('{{owner}}', owner).replace('{{package}}', package)
+
+            return source
+
+        app_data = self.lookup([source])[source] or {}
+        url = app_data.get('url')
+
+        if not url:
+            raise ResolveError('Package `%s` not found in registry' % source)
+
+        return url
+
+    def _get_lookup_tasks(self, names):
+        """Returns registry lookup tasks indexed by names and a new task
+        (to be run by caller) for names not being looked up yet.
+
+        :param list names:
+        :rtype: tuple
+        """
+        tasks = {}
+        missing = []
+
+        with self._lock:
+            for name in names:
+                task = self._registered.get(name)
+
+                if task is None:
+                    if name not in missing:
+                        missing.append(name)
+                else:
+                    tasks[name] = task
+
+            task_new = None
+
+            if missing:
+                task_new = Task(self._lookup_batch, (missing,), {})
+
+                for name in missing:
+                    self._registered[name] = tasks[name] = task_new
+
+        return tasks, task_new
+
+    def _lookup_batch(self, names):
+        errors = {}
+        found = Bower.lookup(names, self.config, errors)
+        return found, errors
+
+    def lookup(self, names):
+        """Returns registry data (None if not found) indexed by names.
+
+        Names are looked up in one batch, results are memoized,
+        names being looked up already are waited for. Only errors
+        of looking up given names are raised.
+
+        :param list names:
+        :rtype: dict
+        :raises: ResolveError
+        """
+        tasks, task_new = self._get_lookup_tasks(names)
+
+        if task_new is not None:
+            task_new.run()
+
+        results = {}
+
+        for name, task in tasks.items():
+            found, errors = task.result()
+
+            if name in errors:
+                raise errors[name]
+
+            results[name] = found[name]
+
+        return results
+
+    @classmethod
+    def select_version(cls, versions, target):
+        """Returns (version, version info) best matching a target
+        from a given versions dictionary.
+
+        :param OrderedDict versions:
+        :param str target: Version range, tag or branch name.
+        :rtype: tuple
+        """
+        if not versions:
+            return None, None
+
+        if not Endpoint.is_wildcard(target):
+            for version, info in versions.items():
+                if info['name'] == target:
+                    return version, info
+
+        version = select(list(versions.keys()), target)
+
+        if version is None:
+            return None, None
+
+        return version, versions[version]
+
+    def get_versions(self, source):
+        """Returns (repository URL, versions dictionary) for a given source.
+
+        Results are memoized, if versions are being prefetched
+        the prefetch is waited for.
+
+        :param str source:
+        :rtype: tuple
+        """
+        with self._lock:
+            task = self._versions.get(source)
+            owned = task is None
+
+            if owned:
+                task = self._versions[source] = Task(self._get_versions, (source,), {})
+
+        if owned:
+            task.run()
+
+        return task.result()
+
+    def _get_versions(self, source):
+        url = self.get_url(source)
+        return url, get_host(url, self.config).get_versions()
+
+    def prefetch(self, sources):
+        """Starts getting versions for given sources in background
+        (unless disabled with `prefetch` bowerrc option),
+        so that they are ready by the time they are needed.
+
+        :param list sources:
+        """
+        if not self.config.get('prefetch', True):
+            return
+
+        # Registry names are looked up in one batch
+        # before version lists are requested.
+        _, lookup_task = self._get_lookup_tasks([source for source in sources if self.is_registry_name(source)])
+
+        if lookup_task is not None:
+            self._get_pool().submit(lookup_task.run)
+
+        for source in sources:
+            with self._lock:
+                if source in self._versions:
+                    continue
+
+                task = self._versions[source] = Task(self._get_versions, (source,), {})
+
+            LOGGER.debug('Prefetching versions of %s ...', source)
+            self._get_pool().submit(task.run)
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(self.config.get('concurrency') or 16)
+
+            return self._pool
+
+    def close(self):
+        """Waits for prefetching started and stops its worker threads.
+        Prefetching started afterwards runs in new threads."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+
+        if pool is not None:
+            pool.shutdown()
+
+    def fetch(self, endpoint, version=None):
+        """Fetches package metadata for a given decomposed endpoint.
+
+        :param dict endpoint:
+        :param Version version: Exact version to fetch instead of the best matching target.
+        :rtype: dict
+        """
+        source = endpoint['source']
+        target = endpoint['target']
+
+        url, versions = self.get_versions(source)
+
+        if version is None:
+            version, info = self.select_version(versions, target)
+        else:
+            info = versions.get(version)
+
+        if info is None:
+            raise ResolveError('No version of `%s` matches `%s`' % (source, target))
+
+        LOGGER.debug('Resolved %s#%s to %s', source, target, info['name'])
+
+        pkg_meta = get_host(url, self.config).get_pkg_meta(info)
+
+        pkg_meta.setdefault('name', endpoint.get('name') or source)
+        pkg_meta.setdefault('version', str(version))
+        pkg_meta.update({
+            '_release': info['name'],
+            '_resolution': {
+                'type': 'version',
+                'tag': info['name'],
+                'commit': info.get('commit'),
+                'tarball': info.get('url_pack'),
+            },
+            '_source': url,
+            '_target': target,
+            '_originalSource': source,
+        })
+
+        return pkg_meta
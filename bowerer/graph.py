@@ -0,0 +1,196 @@
+"""Exposes dependency graph of project packages."""
+from collections import deque
+
+from .nodes import PackageNode
+from .utils import Endpoint
+
+
+class DependencyGraph(object):
+    """Graph of package nodes (see `PackageNode`) with adjacency mappings
+    for dependencies and reverse ones for dependants.
+
+    Node `dependencies` and `dependants` keys reference graph mappings
+    (indexed by package names) so nodes are shared, never copied.
+
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._dependencies = {}
+        self._dependants = {}
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, node):
+        return id(node) in self._nodes
+
+    @property
+    def nodes(self):
+        return list(self._nodes.values())
+
+    def add_node(self, node):
+        """Adds node into graph (once).
+
+        :param dict node:
+        :rtype: dict
+        """
+        key = id(node)
+
+        if key not in self._nodes:
+            self._nodes[key] = node
+            node['dependencies'] = self._dependencies[key] = node.get('dependencies') or {}
+            node['dependants'] = self._dependants[key] = node.get('dependants') or {}
+
+        return node
+
+    def add_edge(self, parent, name, child, reverse=True):
+        """Links parent node with a dependency.
+
+        :param dict parent:
+        :param str name: Dependency name.
+        :param dict child: Dependency node.
+        :param bool reverse: Whether to register parent as a dependant of child.
+        """
+        self.add_node(parent)
+        self.add_node(child)
+
+        self._dependencies[id(parent)][name] = child
+
+        if reverse:
+            self._dependants[id(child)][parent['name']] = parent
+
+    def get_dependencies(self, node):
+        """Returns dependency nodes indexed by names.
+
+        :param dict node:
+        :rtype: dict
+        """
+        return self._dependencies.get(id(node)) or {}
+
+    def get_dependants(self, node):
+        """Returns dependant nodes indexed by names.
+
+        :param dict node:
+        :rtype: dict
+        """
+        return self._dependants.get(id(node)) or {}
+
+    def restore(self, root, flat, json_key):
+        """Restores dependencies described in `json_key` of root pkgMeta
+        (and transitively of its dependencies) using flat mapping
+        of installed packages.
+
+        Dependencies absent in the mapping are added to it marked `missing`,
+        installed ones not matching target are marked `incompatible`,
+        direct root dependencies installed from another source are marked `different`.
+
+        :param dict root:
+        :param dict flat: Installed packages indexed by names.
+        :param str json_key: E.g. `dependencies`, `devDependencies`.
+        """
+        processed = set()
+        stack = [(root, json_key)]
+
+        while stack:
+            node, key = stack.pop()
+
+            if node.get('missing', False):
+                continue
+
+            self.add_node(node)
+            node_name = node['name']
+            pending = []
+
+            for dep_ident, dep_descr in (node['pkgMeta'].get(key) or {}).items():
+
+                if (node_name, dep_ident) in processed:
+                    continue
+
+                local = flat.get(dep_ident)
+                decomposed = Endpoint.decompose_from_json(dep_ident, dep_descr, PackageNode)
+                compatible = None
+
+                if not local:
+                    # Dependency is not installed.
+                    flat[dep_ident] = restored = decomposed
+                    restored['missing'] = True
+
+                else:
+                    # Even if it is installed, check if it's compatible
+                    # Note that linked packages are interpreted as compatible
+                    compatible = (
+                        local.get('linked') or
+                        (not local.get('missing') and
+                         decomposed['target'] == local['pkgMeta']['_target']))
+
+                    if not compatible:
+                        restored = decomposed
+
+                        if not local.get('missing'):
+                            restored['pkgMeta'] = local['pkgMeta']
+                            restored['canonicalDir'] = local['canonicalDir']
+                            restored['incompatible'] = True
+                        else:
+                            restored['missing'] = True
+
+                    else:
+                        restored = local
+                        local.update(decomposed)
+
+                    # Check if source changed, marking as different if it did
+                    # We only do this for direct root dependencies that are compatible
+                    if node.get('root') and compatible:
+                        original_source = local.get('pkgMeta', {}).get('_originalSource')
+                        if original_source and original_source != decomposed['source']:
+                            restored['different'] = True
+
+                self.add_edge(node, dep_ident, restored)
+                processed.add((node_name, dep_ident))
+
+                pending.append((restored, 'dependencies'))
+
+                # Do the same for the incompatible local package
+                if local and restored is not local:
+                    pending.append((local, 'dependencies'))
+
+            # Reversed to process dependencies in order (depth first).
+            stack.extend(reversed(pending))
+
+    def walk(self, node, func, once=True):
+        """Walks through dependencies of a given node (depth first)
+        calling function for each of them.
+
+        Function is called with node and its name, if it returns False
+        node dependencies are not walked.
+
+        :param dict node:
+        :param func:
+        :param bool once: Visit every endpoint once.
+        """
+        seen = set()
+
+        def filter_unseen(nodes):
+            if not once:
+                return nodes
+
+            unseen = []
+            for dep in nodes:
+                key = Endpoint.get_key(dep)
+                if key not in seen:
+                    seen.add(key)
+                    unseen.append(dep)
+
+            return unseen
+
+        queue = deque(filter_unseen(list(self.get_dependencies(node).values())))
+
+        while queue:
+            node = queue.popleft()
+            result = func(node, node['endpoint']['name'] if node.get('endpoint') else node['name'])
+
+            if result is False:
+                continue
+
+            dependencies = filter_unseen(list(self.get_dependencies(node).values()))
+            queue.extendleft(reversed(dependencies))
@@ -1,15 +1,61 @@
+import atexit
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import threading
 from collections import OrderedDict
+from hashlib import sha1
 
-from semantic_version import Version
+from six.moves.urllib.parse import urlparse, parse_qs, quote
 
+from .cache import ResponseCache
+from .exceptions import JsonError, OfflineError, ResolveError, StoreError, UnsupportedHostingUrl
+from .net import get_client
 from .settings import LOGGER
-from .utils import get_json
+from .utils import JsonReader, LruCache
+from .versions import get_version
+from .workers import WorkerPool
+
+
+def get_host(url, config=None):
+    """Returns host object able to handle a given repository URL.
+
+    :param str url:
+    :param dict config:
+    :rtype: Host
+    :raises: UnsupportedHostingUrl
+    """
+    for host_cls in (GitHub, MirrorHost, GitRemote):
+        if host_cls.can_handle(url):
+            return host_cls(url, config)
+
+    raise UnsupportedHostingUrl('Unsupported repository URL: %s' % url)
 
 
 class Host(object):
 
-    def __init__(self, url):
+    def __init__(self, url, config=None):
         self.url = url
+        self.config = config or {}
+
+    def get_pkg_meta(self, info):
+        """Returns package bower.json contents for a given version info.
+
+        :param dict info:
+        :rtype: dict
+        """
+        return get_client(self.config).get_json('%s/%s' % (info['url_root'], 'bower.json'), allow_empty=True)
+
+    def get_archiver(self, ref, commit=None):
+        """Returns a function writing package archive for a given ref
+        into a given file or None if packages are downloaded from tarball URLs.
+
+        :param str ref:
+        :param str commit:
+        """
+        return None
 
 
 class GitHub(Host):
@@ -18,26 +64,407 @@ class GitHub(Host):
     BASE_URL = 'https://api.github.com'
     RAW_URL = 'https://raw.githubusercontent.com'
 
+    PER_PAGE = 100
+
+    # Version indexes built from tag pages, indexed by repository.
+    _indexes = LruCache(256)
+
     @classmethod
     def can_handle(cls, url):
-        return url.startswith('git')
+        host = urlparse(url).netloc.rsplit('@', 1)[-1].split(':')[0]
 
-    def get_versions(self):
+        if not host and url.startswith('git@'):
+            # SCP-like syntax: git@github.com:owner/repo.git
+            host = url[4:].split(':')[0]
+
+        return host in ('github.com', 'www.github.com')
+
+    def get_repo_ident(self):
+        """Returns owner/name repository identifier.
+
+        :rtype: str
+        """
+        url = self.url
+        if url.endswith('.git'):
+            url = url[:-4]
+        return '%s/%s' % tuple(url.rstrip('/').rsplit('/', 2)[-2:])
+
+    def get_headers(self):
+        """Returns API request headers (authorization using
+        `github-token` from bowerrc raises rate limit).
+
+        :rtype: dict
+        """
+        headers = {'Accept': 'application/vnd.github.v3+json'}
+
+        token = self.config.get('github-token')
+        if token:
+            headers['Authorization'] = 'token %s' % token
 
-        repo_owner, repo_name = self.url.rstrip('.git').rsplit('/', 2)[-2:]
-        repo_ident = '%s/%s' % (repo_owner, repo_name)
-        url = '%s/repos/%s/tags' % (self.BASE_URL, repo_ident)
+        return headers
+
+    @classmethod
+    def get_page_urls(cls, url, links):
+        """Returns URLs of pages following the first one
+        judging by `last` link of the first page.
+
+        :param str url: The first page URL.
+        :param dict links: Link header URLs of the first page.
+        :rtype: list
+        """
+        last = links.get('last')
+
+        if not last:
+            return []
+
+        try:
+            pages_count = int(parse_qs(urlparse(last).query)['page'][0])
+
+        except (KeyError, ValueError):
+            return []
+
+        return ['%s&page=%s' % (url, page) for page in range(2, pages_count + 1)]
+
+    def get_tag_pages(self):
+        """Returns JSON responses data for all tag list pages.
+        Pages following the first one are requested in parallel.
+
+        :rtype: list
+        """
+        client = get_client(self.config)
+        headers = self.get_headers()
+        url = '%s/repos/%s/tags?per_page=%s' % (self.BASE_URL, self.get_repo_ident(), self.PER_PAGE)
 
         LOGGER.debug('Getting version list from %s ...', url)
 
-        versions = OrderedDict()
-        for version_data in get_json(url):
+        first = client.get_json_entry(url, headers=headers)
+        urls = self.get_page_urls(url, first.get('links') or {})
+
+        if not urls:
+            return [first]
+
+        with WorkerPool(min(len(urls), self.config.get('concurrency') or 16)) as pool:
+            rest = pool.map(lambda page_url: client.get_json_entry(page_url, headers=headers), urls)
+
+        return [first] + rest
+
+    @classmethod
+    def get_page_hash(cls, page):
+        """Returns hash of tags data listed on a page
+        (for pages having neither ETag nor cache timestamp).
+
+        :param dict page:
+        :rtype: str
+        """
+        tags = sorted('%s %s %s' % (tag['name'], tag['tarball_url'], (tag.get('commit') or {}).get('sha'))
+                      for tag in page['body'])
+        return sha1('\n'.join(tags).encode('utf-8')).hexdigest()
+
+    def get_versions(self):
+        """Returns versions of repository tags sorted
+        from the lowest to the highest.
+
+        Tags not looking like versions are skipped. The index is kept
+        in memory while tag pages stay unchanged.
+
+        :rtype: OrderedDict
+        """
+        repo_ident = self.get_repo_ident()
+        pages = self.get_tag_pages()
+
+        signature = tuple(page.get('etag') or page.get('stored') or self.get_page_hash(page) for page in pages)
+        cached = self._indexes.get(repo_ident)
+
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        found = {}
+
+        for page in pages:
+            for version_data in page['body']:
+                version_name = version_data['name']
+                version_num = get_version(version_name)
+
+                if version_num is None or version_num in found:
+                    continue
+
+                found[version_num] = {
+                    'name': version_name,
+                    'url_pack': version_data['tarball_url'],
+                    'commit': (version_data.get('commit') or {}).get('sha'),
+                    'url_root': '%s/%s/%s' % (self.RAW_URL, repo_ident, version_name),
+                }
+
+        versions = OrderedDict(sorted(found.items()))
+        self._indexes.set(repo_ident, (signature, versions))
+
+        return versions
+
+
+class MirrorHost(Host):
+    """Package served by a mirror made with `bowerer mirror`."""
+
+    TITLE = 'Mirror'
+    PATH = '/mirror/'
+
+    @classmethod
+    def can_handle(cls, url):
+        parsed = urlparse(url)
+        return parsed.scheme in ('http', 'https') and parsed.path.startswith(cls.PATH)
+
+    def get_versions(self):
+        """Returns versions of mirrored releases sorted
+        from the lowest to the highest.
+
+        :rtype: OrderedDict
+        """
+        url = self.url.rstrip('/')
+        parsed = urlparse(url)
+        base_url = '%s://%s' % (parsed.scheme, parsed.netloc)
+
+        found = {}
+
+        for version_data in get_client(self.config).get_json('%s/versions' % url):
             version_name = version_data['name']
-            version_num = Version.coerce(version_name.lstrip('v'), partial=True)
-            versions[version_num] = {
+            version_num = get_version(version_name)
+
+            if version_num is None or version_num in found:
+                continue
+
+            found[version_num] = {
                 'name': version_name,
-                'url_pack': version_data['tarball_url'],
-                'url_root': '%s/%s/%s' % (self.RAW_URL, repo_ident, version_name),
+                'url_pack': version_data.get('tarball_url') or '%s/tarballs/%s.tar.gz' % (
+                    base_url, version_data['sha256']),
+                'commit': version_data.get('commit'),
+                'url_root': '%s/%s' % (url, quote(version_name, safe='')),
             }
 
-        return versions
+        return OrderedDict(sorted(found.items()))
+
+
+class GitRemote(Host):
+    """Any git repository (including self-hosted ones and local paths).
+
+    All refs are listed with one `git ls-remote` round trip
+    (cached along with HTTP responses), package contents are shallow
+    fetched for a single tag.
+
+    """
+
+    TITLE = 'Git'
+
+    # Commands reaching the remote, not available offline.
+    NETWORK_COMMANDS = ('clone', 'fetch', 'ls-remote')
+
+    # Shallow clones made during this run indexed by (url, ref).
+    _checkouts = {}
+    _checkouts_lock = threading.Lock()
+
+    # SCP-like syntax: user@host:path
+    RE_SCP = re.compile(r'^[\w.-]+@[\w.-]+:')
+
+    @classmethod
+    def can_handle(cls, url):
+        """Handles git transport URLs (git://, ssh://, git+<transport>://),
+        SCP-like ones, URLs and paths ending with `.git` and local repositories.
+
+        :param str url:
+        :rtype: bool
+        """
+        if not url:
+            return False
+
+        parsed = urlparse(url)
+        scheme = parsed.scheme
+
+        if scheme in ('git', 'ssh') or scheme.startswith('git+') or cls.RE_SCP.match(url):
+            return True
+
+        if scheme not in ('', 'file', 'http', 'https'):
+            return False
+
+        if url.rstrip('/').endswith('.git'):
+            return True
+
+        if scheme in ('', 'file'):
+            repo = parsed.path if scheme else url
+            return os.path.isdir(os.path.join(repo, '.git')) or (
+                os.path.isfile(os.path.join(repo, 'HEAD')) and os.path.isdir(os.path.join(repo, 'objects')))
+
+        return False
+
+    def run(self, args, cwd=None):
+        """Runs git command and returns its output.
+
+        :param list args:
+        :param str cwd:
+        :rtype: str
+        :raises: ResolveError, OfflineError
+        """
+        if self.config.get('offline') and args[0] in self.NETWORK_COMMANDS:
+            raise OfflineError('Not available offline: %s' % self.url)
+
+        env = dict(os.environ)
+        env['GIT_TERMINAL_PROMPT'] = '0'
+
+        template_dir = (self.config.get('storage') or {}).get('empty')
+        if template_dir:
+            env['GIT_TEMPLATE_DIR'] = template_dir
+
+        LOGGER.debug('Running git %s ...', ' '.join(args))
+
+        process = subprocess.Popen(
+            ['git'] + args, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        out, err = process.communicate()
+
+        if process.returncode:
+            raise ResolveError('git %s failed: %s' % (args[0], err.decode('utf-8', 'replace').strip()))
+
+        return out.decode('utf-8')
+
+    def get_tags(self):
+        """Returns commits of tags indexed by names.
+
+        Stale cached tags are served if the remote is unreachable.
+
+        :rtype: dict
+        :raises: ResolveError, OfflineError
+        """
+        cache = ResponseCache.from_config(self.config)
+        cache_key = 'git ls-remote --tags %s' % self.url
+        cached = cache.get(cache_key) if cache else None
+
+        if cached and (self.config.get('offline') or cache.is_fresh(cached)):
+            return cached['body']
+
+        try:
+            out = self.run(['ls-remote', '--tags', self.url])
+
+        except ResolveError as e:
+            if not cached:
+                raise
+
+            LOGGER.warning('Unable to list tags of %s (%s), using cached data', self.url, e)
+            return cached['body']
+
+        tags = {}
+        tags_peeled = {}
+
+        for line in out.splitlines():
+            commit, _, ref = line.partition('\t')
+
+            if not ref.startswith('refs/tags/'):
+                continue
+
+            name = ref[len('refs/tags/'):]
+
+            if name.endswith('^{}'):
+                # Annotated tag peeled to a commit it points to.
+                tags_peeled[name[:-3]] = commit
+            else:
+                tags[name] = commit
+
+        tags.update(tags_peeled)
+
+        if cache:
+            cache.set(cache_key, tags)
+
+        return tags
+
+    def get_versions(self):
+        """Returns versions of repository tags sorted
+        from the lowest to the highest.
+
+        :rtype: OrderedDict
+        """
+        LOGGER.debug('Getting version list from %s ...', self.url)
+
+        tags = self.get_tags()
+        found = {}
+
+        for name, commit in tags.items():
+            version_num = get_version(name)
+
+            if version_num is None or version_num in found:
+                continue
+
+            found[version_num] = {
+                'name': name,
+                'url_pack': None,
+                'commit': commit,
+                'url_root': None,
+            }
+
+        return OrderedDict(sorted(found.items()))
+
+    def checkout(self, ref):
+        """Shallow clones a given ref (once per run) and returns
+        a path to the working tree.
+
+        :param str ref: Tag name.
+        :rtype: str
+        """
+        key = (self.url, ref)
+
+        with self._checkouts_lock:
+            path = self._checkouts.get(key)
+
+        if path:
+            return path
+
+        tmp_root = self.config.get('tmp') or None
+        if tmp_root and not os.path.isdir(tmp_root):
+            os.makedirs(tmp_root)
+
+        tmp_dir = tempfile.mkdtemp(dir=tmp_root, prefix='bowerer-git-')
+        path = os.path.join(tmp_dir, 'checkout')
+
+        try:
+            self.run(['clone', '--quiet', '--depth', '1', '--branch', ref, self.url, path])
+
+        except ResolveError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        with self._checkouts_lock:
+            if key in self._checkouts:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+            else:
+                self._checkouts[key] = path
+
+            return self._checkouts[key]
+
+    @classmethod
+    def cleanup(cls):
+        """Removes clones made during this run."""
+        with cls._checkouts_lock:
+            for path in cls._checkouts.values():
+                shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            cls._checkouts.clear()
+
+    def get_pkg_meta(self, info):
+        try:
+            _, pkg_meta = JsonReader(self.checkout(info['name'])).read()
+
+        except JsonError:
+            return {}
+
+        return pkg_meta
+
+    def get_archiver(self, ref, commit=None):
+
+        def archive(filepath):
+            path = self.checkout(ref)
+
+            if commit:
+                head = self.run(['rev-parse', 'HEAD'], cwd=path).strip()
+                if head != commit:
+                    raise StoreError('Integrity check failed for %s#%s: expected commit %s, got %s' % (
+                        self.url, ref, commit, head))
+
+            self.run(['archive', '--format=tar', '--prefix=package/', '-o', filepath, 'HEAD'], cwd=path)
+
+        return archive
+
+
+atexit.register(GitRemote.cleanup)
@@ -0,0 +1,150 @@
+"""Exposes tools to work with bower.lock files."""
+import json
+from os.path import join
+
+from .settings import LOGGER
+from .utils import write_json
+
+
+class Lockfile(object):
+    """Records packages resolved by an install, so that subsequent
+    installs of the same bower.json may skip resolution.
+
+    """
+
+    filename = 'bower.lock'
+    format_version = 1
+
+    def __init__(self, json_hash, packages=None, production=False):
+        self.json_hash = json_hash
+        self.packages = packages or {}
+        self.production = production
+
+    @classmethod
+    def get_path(cls, cwd):
+        return join(cwd, cls.filename)
+
+    @classmethod
+    def read(cls, cwd):
+        """Reads lock from a given project directory.
+        Returns None if there is no (valid) lock.
+
+        :param str cwd:
+        :rtype: Lockfile|None
+        """
+        filepath = cls.get_path(cwd)
+
+        try:
+            with open(filepath) as f:
+                contents = json.load(f)
+
+        except (IOError, OSError):
+            return None
+
+        except ValueError as e:
+            LOGGER.warning('Ignoring malformed %s: %s', filepath, e)
+            return None
+
+        if contents.get('version') != cls.format_version:
+            return None
+
+        return cls(contents.get('jsonHash'), contents.get('packages'), contents.get('production', False))
+
+    def write(self, cwd):
+        """Writes lock into a given project directory.
+
+        :param str cwd:
+        """
+        write_json(self.get_path(cwd), {
+            'version': self.format_version,
+            'jsonHash': self.json_hash,
+            'production': self.production,
+            'packages': self.packages,
+        })
+
+    def matches(self, json_hash, production=False):
+        """Returns flag whether lock was made for a given bower.json.
+
+        :param str json_hash:
+        :param bool production:
+        :rtype: bool
+        """
+        return bool(self.packages) and self.json_hash == json_hash and self.production == production
+
+    @classmethod
+    def make_entry(cls, pkg_meta, digest=None):
+        """Returns lock entry for a given installed package.
+
+        :param dict pkg_meta:
+        :param str digest: SHA-256 of package archive.
+        :rtype: dict
+        """
+        resolution = pkg_meta.get('_resolution') or {}
+
+        return {
+            'version': pkg_meta.get('version'),
+            'release': pkg_meta.get('_release'),
+            'source': pkg_meta.get('_source'),
+            'originalSource': pkg_meta.get('_originalSource'),
+            'target': pkg_meta.get('_target'),
+            'commit': resolution.get('commit'),
+            'tarball': resolution.get('tarball'),
+            'sha256': digest,
+        }
+
+    @classmethod
+    def make_pkg_meta(cls, name, entry, pkg_meta=None):
+        """Returns pkgMeta (as stored in .bower.json) for a given lock entry.
+
+        :param str name:
+        :param dict entry:
+        :param dict pkg_meta: Package own bower.json contents.
+        :rtype: dict
+        """
+        pkg_meta = dict(pkg_meta or {})
+        pkg_meta.setdefault('name', name)
+
+        if entry.get('version'):
+            pkg_meta.setdefault('version', entry['version'])
+
+        pkg_meta.update({
+            '_release': entry.get('release'),
+            '_resolution': {
+                'type': 'version',
+                'tag': entry.get('release'),
+                'commit': entry.get('commit'),
+                'tarball': entry.get('tarball'),
+            },
+            '_source': entry.get('source'),
+            '_target': entry.get('target'),
+            '_originalSource': entry.get('originalSource'),
+        })
+
+        return pkg_meta
+
+    def update(self, installed):
+        """Updates lock with installed packages data.
+        Entries for packages installed earlier (thus not having a digest)
+        keep their digests from the previous lock if release is the same.
+        Linked packages (having no source) are not recorded.
+
+        :param dict installed: pkgMeta and digest tuples indexed by package names.
+        """
+        previous = self.packages
+        packages = {}
+
+        for name, (pkg_meta, digest) in installed.items():
+            if not pkg_meta.get('_source'):
+                continue
+
+            entry = self.make_entry(pkg_meta, digest)
+            entry_previous = previous.get(name) or {}
+
+            if (not digest and
+                    entry_previous.get('release') == entry['release'] and
+                    entry_previous.get('source') == entry['source']):
+                entry['sha256'] = entry_previous.get('sha256')
+
+            packages[name] = entry
+
+        self.packages = packages
@@ -1,26 +1,41 @@
-from os.path import join
-from functools import cmp_to_key
-
-from semantic_version import compare as v_compare, match as v_match
-
-try:
-    from itertools import ifilter as filter
-except ImportError:
-    pass
+import threading
+from collections import OrderedDict
+from os.path import isdir, join
+
+from .exceptions import ResolveError, OfflineError
+from .fetcher import Fetcher
+from .hosts import get_host
+from .net import get_client
+from .nodes import PackageEndpoint
+from .settings import LOGGER
+from .solver import Solver
+from .store import PackageStore
+from .tracing import span, traced, CATEGORY_PACKAGE
+from .utils import Endpoint, JsonReader, write_json
+from .versions import get_spec, satisfies, get_sort_key
+from .workers import WorkerPool
 
 
 class Manager(object):
 
     def __init__(self, config):
         self.config = config
+        self.fetcher = Fetcher(config)
+        self._lock = threading.RLock()
+        self._pool = None
+        self._fetching = {}
+        self._failed = {}
+        self._dissected = {}
         self.configure({})
         self._targets = []
         self._resolved = {}
         self._installed = {}
+        self._kept = []
         self._incompatibles = {}
         self._conflicted = {}
         self._resolutions = {}
         self._force_latest = False
+        self._install_plan = None
 
     def configure(self, setup):
         targets_hash = {}
@@ -28,7 +43,7 @@ class Manager(object):
 
         for target in self._targets:
             target['initialName'] = target['name']
-            target['dependants '] = target.get('dependants ', {}).values()
+            target['dependants'] = list(target.get('dependants', {}).values())
             targets_hash[target['name']] = True
 
             # If the endpoint is marked as newly, make it unresolvable
@@ -36,10 +51,12 @@ class Manager(object):
 
         self._resolved = {}
         self._installed = {}
+        self._kept = []
 
         for name, meta in setup.get('resolved', {}).items():
-            meta['dependants'] = meta.get('dependants', {}).values()
+            meta['dependants'] = list(meta.get('dependants', {}).values())
             self._resolved[name] = [meta]
+            self._kept.append((name, meta['target']))
             self._installed[name] = meta['pkgMeta']
 
         self._installed.update(setup.get('installed', {}))
@@ -52,7 +69,7 @@ class Manager(object):
             self._incompatibles[name] = self._incompatibles.get(name) or []
             self._incompatibles[name].append(endpoint)
 
-            endpoint['dependants'] = endpoint.get('dependants', {}).values()
+            endpoint['dependants'] = list(endpoint.get('dependants', {}).values())
 
             # Mark as conflicted so that the resolution is not removed
             self._conflicted[name] = True
@@ -65,33 +82,79 @@ class Manager(object):
         self._targets = self._make_unique(self._targets)
         self._force_latest = setup.get('force_latest', False)
 
+    @traced('manager.resolve')
     def resolve(self):
+        """Resolves targets along with their dependencies
+        and returns a dictionary of suitable endpoints indexed by names.
 
-        if not self._targets:
-            self._dissect()
-        else:
-            map(self._fetch, self._targets)
+        :rtype: dict
+        """
+        try:
+            if self._targets:
+                self._fetch_all()
 
-    def _dissect(self):
+            return self._dissect()
 
-        suitables = {}
+        finally:
+            self.fetcher.close()
+
+    @traced('manager.fetch')
+    def _fetch_all(self):
+        self._fetching = {}
+        self._failed = {}
+
+        with WorkerPool(self.config.get('concurrency') or 16) as pool:
+            self._pool = pool
+
+            # Look up all targets in registry at once.
+            self.fetcher.prefetch([target['source'] for target in self._targets])
+
+            for target in self._targets:
+                self._schedule(target)
+
+            pool.join()
+
+        self._pool = None
+
+        failed = self._failed
+
+        if failed:
+            missing = [name for name, error in failed.items() if isinstance(error, OfflineError)]
+
+            if len(missing) == len(failed):
+                raise OfflineError('Missing from local cache: %s' % ', '.join(sorted(missing)))
+
+            raise ResolveError('Unable to resolve: %s' % ', '.join(
+                '%s (%s)' % (name, error) for name, error in sorted(failed.items())))
 
-        def version_compare(first, second):
-            result = v_compare(first['pkgMeta']['version'], second['pkgMeta']['version'])
-            result = {-1: 1, 0: 0, 1: -1}.get(result)
+    def _schedule(self, endpoint):
+        key = Endpoint.get_key(endpoint)
+        endpoint['dependants'] = list(endpoint.get('dependants') or [])
 
-            if not result:
-                if first['target'] == '*':
-                    return 1
+        with self._lock:
+            scheduled = self._fetching.get(key)
 
-                if second['target'] == '*':
-                    return -1
+            if scheduled is not None:
+                if scheduled is not endpoint:
+                    scheduled['dependants'].extend(endpoint['dependants'])
+                return
 
-            return result
+            self._fetching[key] = endpoint
+
+        self._pool.submit(self._fetch, endpoint)
+
+    @traced('manager.dissect')
+    def _dissect(self):
+
+        suitables = {}
+
+        def version_key(endpoint):
+            # Higher versions first, for the same versions wildcard targets last.
+            return get_sort_key(endpoint['pkgMeta']['version']), endpoint['target'] != '*'
 
         for name, endpoints in self._resolved.items():
             semvers = [endpoint for endpoint in endpoints if endpoint['pkgMeta'].get('version')]
-            semvers = sorted(semvers, key=cmp_to_key(version_compare))
+            semvers = sorted(semvers, key=version_key, reverse=True)
 
             for endpoint in semvers:
                 if endpoint.get('newly')and endpoint['target'] == '*' and not endpoint.get('untargetable'):
@@ -102,8 +165,82 @@ class Manager(object):
 
             suitables[name] = self._elect_suitable(name, semvers, non_semvers)
 
-    def _fetch(self, target):
-        a = 1
+        conflicted = sorted(name for name, suitable in suitables.items() if suitable is None)
+
+        if conflicted:
+            LOGGER.info('Solving conflicts for %s ...', ', '.join(conflicted))
+            suitables = self._solve()
+
+        self._dissected = suitables
+        return suitables
+
+    def _fetch(self, endpoint):
+        try:
+            with span('fetch', CATEGORY_PACKAGE, package=endpoint.get('name') or endpoint['source'],
+                      target=endpoint['target']):
+                pkg_meta = self.fetcher.fetch(endpoint)
+
+        except Exception as e:
+            LOGGER.debug('Failed to fetch %s: %s', Endpoint.compose(endpoint), e)
+            with self._lock:
+                self._failed[endpoint.get('name') or endpoint['source']] = e
+            return
+
+        endpoint['name'] = endpoint.get('name') or pkg_meta['name']
+        endpoint['pkgMeta'] = pkg_meta
+
+        with self._lock:
+            self._resolved.setdefault(endpoint['name'], []).append(endpoint)
+
+        self._parse_dependencies(endpoint)
+
+    def _parse_dependencies(self, endpoint):
+        dependencies = Endpoint.decompose_many(endpoint['pkgMeta'].get('dependencies'))
+
+        # Versions may be needed even for dependencies satisfied
+        # by existing packages (e.g. to solve conflicts).
+        self.fetcher.prefetch([dependency['source'] for dependency in dependencies])
+
+        for dependency in dependencies:
+            dependency['dependants'] = [endpoint]
+
+            if not self._use_existing(dependency):
+                self._schedule(dependency)
+
+    def _use_existing(self, endpoint):
+        """Attaches endpoint to already resolved or installed
+        compatible package if any.
+
+        :param dict endpoint:
+        :rtype: bool
+        """
+        name = endpoint['name']
+        target = endpoint['target']
+
+        with self._lock:
+            for resolved in self._resolved.get(name, []):
+                if self._is_compatible(resolved['pkgMeta'], target):
+                    resolved['dependants'].extend(endpoint['dependants'])
+                    return True
+
+            installed = self._installed.get(name)
+            if installed and self._is_compatible(installed, target):
+                endpoint['pkgMeta'] = installed
+                self._resolved.setdefault(name, []).append(endpoint)
+                return True
+
+        return False
+
+    @classmethod
+    def _is_compatible(cls, pkg_meta, target):
+        if target == pkg_meta.get('_target'):
+            return True
+
+        version = pkg_meta.get('version')
+        if not version:
+            return False
+
+        return satisfies(version, target)
 
     def _elect_suitable(self, name, semvers, non_semvers):
 
@@ -120,12 +257,16 @@ class Manager(object):
             picks.extend(non_semvers)
 
         else:
+            # Candidates are sorted from the highest version, the first one
+            # satisfying every distinct target is the best.
+            targets = set(endpoint['target'] for endpoint in semvers)
             suitable = None
+
             for subject in semvers:
-                for loop_endpoint in semvers:
-                    if subject == loop_endpoint or v_match(subject['pkgMeta']['version'], loop_endpoint['target']):
-                        suitable = subject
-                        break
+                version = subject['pkgMeta']['version']
+                if all(target == subject['target'] or satisfies(version, target) for target in targets):
+                    suitable = subject
+                    break
 
             if suitable:
                 return suitable
@@ -135,87 +276,334 @@ class Manager(object):
         # At this point, there's a conflict
         self._conflicted[name] = True
 
-        # Prepare data to be sent bellow
-        # 1 - Sort picks by version/release
-        def compare_picks(pick1, pick2):
-            version1 = pick1['pkgMeta']['version']
-            version2 = pick2['pkgMeta']['version']
+        # Sort picks by version/release, the latest goes last
+        def pick_key(pick):
+            # Versioned picks are higher, then the ones with most dependants.
+            version = pick['pkgMeta'].get('version')
+            return bool(version), get_sort_key(version) if version else (0, ''), -len(pick['dependants'])
+
+        picks = sorted(picks, key=pick_key)
+
+        # Check if there's a resolution that resolves the conflict
+        # Note that if one of them is marked as unresolvable,
+        # the resolution has no effect
+        resolution = self._resolutions.get(name)
+        unresolvable = any(pick.get('unresolvable') for pick in picks)
+
+        if resolution and not unresolvable:
+            suitable = None
+
+            # Range resolution
+            if get_spec(resolution) is not None:
+                for pick in picks:
+                    version = pick['pkgMeta'].get('version')
+                    if version and satisfies(version, resolution):
+                        suitable = pick
+                        break
+
+            # Exact match resolution (e.g. branches/tags)
+            if suitable is None:
+                for pick in picks:
+                    if resolution in (pick['target'], pick['pkgMeta'].get('_release')):
+                        suitable = pick
+                        break
+
+            if suitable is None:
+                LOGGER.warning('Unsuitable resolution declared for %s: %s', name, resolution)
 
-            if version1 and version2:
-                result = v_compare(version1, version2)
-                if result:
-                    return result
             else:
-                if version1:
-                    return 1
-                if version2:
-                    return -1
+                LOGGER.info('Conflict for %s solved with resolution %s', name, resolution)
+                return suitable
 
-            if len(pick1['dependants']) > len(pick2['dependants']):
-                return -1
+        # If force latest is enabled, resolve to the highest semver version
+        # or whatever non-semver if none available
+        if self._force_latest:
+            suitable = picks[-1]
+            LOGGER.info('Conflict for %s solved with the latest %s', name, suitable['pkgMeta'].get('_release'))
+            return suitable
 
-            if len(pick1['dependants']) < len(pick2['dependants']):
-                return -1
+        # Left for the solver to find versions consistent across packages.
+        return None
 
-            return 0
+    @traced('manager.solve')
+    def _solve(self):
+        """Finds versions of all packages consistent with each other
+        and returns suitable endpoints indexed by names.
 
-        picks = sorted(picks, key=cmp_to_key(compare_picks))
+        :rtype: dict
+        :raises: ConflictError
+        """
+        provider = FetcherProvider(self.fetcher, self._resolutions)
 
-        # 2 - Transform data
-        data_picks = []
-        for pick in picks:
-            data_pick = self.to_data(pick)
-            data_pick['dependants'] = map(self.to_data, pick['dependants'])
-            data_pick['dependants'] = sorted(data_pick['dependants'], key=lambda dep: dep['endpoint']['name'])
-            data_picks.append(data_pick)
+        for endpoints in self._resolved.values():
+            for endpoint in endpoints:
+                provider.add_endpoint(endpoint)
 
-        # Check if there's a resolution that resolves the conflict
-        # Note that if one of them is marked as unresolvable,
-        # the resolution has no effect
-        resolution = self._resolutions.get(name)
-        unresolvable = None
-        for pick in picks:
-            if pick.get('unresolvable'):
-                unresolvable = pick
-                break
+        # Packages kept from the installed tree are required as well,
+        # otherwise those not reached from targets would be dropped.
+        requirements = [(target['name'], target['target']) for target in self._targets]
+        requirements.extend(self._kept)
 
-        if resolution and not unresolvable:
-            suitable = -1
+        solution = Solver(provider).solve(requirements)
+
+        suitables = {}
+
+        for name, version in solution.items():
+            suitables[name] = endpoint = provider.get_endpoint(name, version)
+            endpoint['dependants'] = []
 
-        # TODO implement
+        for name, version in solution.items():
+            for dep_name, _ in provider.get_dependencies(name, version):
+                suitables[dep_name]['dependants'].append(suitables[name])
 
+        return suitables
 
+    @traced('manager.preinstall')
     def preinstall(self, json_dict):
+        """Plans install stage: decides which of dissected packages
+        need their contents put into components directory.
+
+        Packages installed earlier with the same resolution are skipped,
+        only their metadata is rewritten if it differs.
+
+        :param dict json_dict: Project bower.json contents.
+        """
         components_dir = join(self.config['cwd'], self.config['directory'])
 
-        # TODO implement
+        plan = []
 
-    def _make_unique(self, endpoints):
+        for name, endpoint in sorted(self._dissected.items()):
+            if not endpoint:
+                continue
 
-        len_endpoints = len(endpoints)
+            pkg_meta = endpoint['pkgMeta']
+            installed_meta = self._installed.get(name)
+            resolution = pkg_meta.get('_resolution') or {}
 
-        def func_filter(endpoint_tuple):
-            idx, endpoint = endpoint_tuple
+            if pkg_meta is installed_meta or not (resolution.get('tarball') or resolution.get('commit')):
+                continue
 
-            for idx_loop in range(idx, len_endpoints):
-                current = endpoints[idx_loop]
-                if current == endpoint:
-                    return False
+            destination = join(components_dir, name)
 
-                current_name = current.get('name')
-                looped_name = endpoint.get('name')
+            if self.matches_installed(pkg_meta, installed_meta) and isdir(destination):
+                if pkg_meta != installed_meta:
+                    LOGGER.debug('%s#%s is already installed, updating metadata', name, pkg_meta['_release'])
+                    plan.append((name, pkg_meta, False))
+                continue
 
-                if not current_name and not looped_name:
-                    if current.get('source') != endpoint.get('source'):
-                        continue
+            plan.append((name, pkg_meta, True))
 
-                elif current_name != looped_name:
-                    continue
+        self._install_plan = plan
 
-                if current.get('target') != endpoint.get('target'):
-                    return False
+    @traced('manager.install')
+    def install(self, json_dict):
+        """Installs dissected packages into components directory.
 
-            return True
+        Packages are installed concurrently, each one is staged
+        along with its metadata and then swapped in, so that
+        an interrupted install never leaves partial components.
+
+        Returns (pkgMeta, archive digest) tuples indexed by package names.
+        Digest is None for packages installed earlier.
+
+        :param dict json_dict: Project bower.json contents.
+        :rtype: dict
+        """
+        if self._install_plan is None:
+            self.preinstall(json_dict)
+
+        components_dir = join(self.config['cwd'], self.config['directory'])
+        store = PackageStore.from_config(self.config)
+        client = get_client(self.config)
+
+        def install_package(item):
+            name, pkg_meta, with_contents = item
+            destination = join(components_dir, name)
+            meta_filename = JsonReader.filename_modern_hidden
+
+            if not with_contents:
+                write_json(join(destination, meta_filename), pkg_meta)
+                return None
+
+            resolution = pkg_meta['_resolution']
+            release = pkg_meta['_release']
+            tarball = resolution.get('tarball')
+            archive = None
+
+            if not tarball:
+                archive = get_host(pkg_meta['_source'], self.config).get_archiver(release, resolution['commit'])
+
+            LOGGER.info('Installing %s#%s ...', name, release)
+
+            with span('install', CATEGORY_PACKAGE, package=name, release=release):
+                return store.install(
+                    pkg_meta['_source'], release, tarball, destination, client,
+                    staging_root=self.config.get('tmp'), archive=archive,
+                    prepare=lambda staged: write_json(join(staged, meta_filename), pkg_meta))
+
+        plan = self._install_plan
+        self._install_plan = None
+
+        with WorkerPool(min(len(plan), self.config.get('concurrency') or 16)) as pool:
+            digests = dict(zip((item[0] for item in plan), pool.map(install_package, plan)))
+
+        installed = {}
+
+        for name, endpoint in self._dissected.items():
+            if endpoint:
+                installed[name] = (endpoint['pkgMeta'], digests.get(name))
+
+        return installed
+
+    @classmethod
+    def matches_installed(cls, pkg_meta, installed_meta):
+        """Returns flag whether package installed earlier
+        has contents of the same resolution as a given one.
+
+        :param dict pkg_meta:
+        :param dict installed_meta:
+        :rtype: bool
+        """
+        if not installed_meta:
+            return False
+
+        resolution = pkg_meta.get('_resolution') or {}
+        installed_resolution = installed_meta.get('_resolution') or {}
+
+        return (
+            pkg_meta.get('_source') == installed_meta.get('_source') and
+            pkg_meta.get('_release') == installed_meta.get('_release') and
+            resolution.get('commit') == installed_resolution.get('commit') and
+            resolution.get('tarball') == installed_resolution.get('tarball'))
+
+    @classmethod
+    def _make_unique(cls, endpoints):
+        """Returns endpoints without duplicates (the last of duplicates is kept).
+
+        Endpoints are duplicates if they have the same name
+        (or the same source if unnamed) and target.
+
+        :param list endpoints:
+        :rtype: list
+        """
+        seen = set()
+        unique = []
+
+        for endpoint in reversed(endpoints):
+            name = endpoint.get('name')
+            key = (name, None if name else endpoint.get('source'), endpoint.get('target'))
+
+            if key in seen:
+                continue
+
+            seen.add(key)
+            unique.append(endpoint)
+
+        unique.reverse()
+        return unique
+
+
+class FetcherProvider(object):
+    """Supplies dependency solver with package versions
+    and dependencies obtained with fetcher.
+
+    Versions are identified by strings, the highest are preferred.
+
+    """
+
+    def __init__(self, fetcher, resolutions=None):
+        self.fetcher = fetcher
+        self.resolutions = resolutions or {}
+        self.sources = {}
+        self.targets = {}
+        self._versions = {}
+        self._endpoints = {}
+        self._released = {}
+        self._dependencies = {}
+
+    def add_endpoint(self, endpoint):
+        """Registers endpoint resolved earlier,
+        so that its package metadata is not fetched again.
+
+        :param dict endpoint:
+        """
+        name = endpoint['name']
+        self.sources.setdefault(name, endpoint['source'])
+        self.targets.setdefault(name, endpoint['target'])
+        self._released.setdefault((name, endpoint['pkgMeta'].get('_release')), endpoint)
+
+    def get_versions(self, name):
+        """Returns (Version, version info) tuples indexed by version strings.
+
+        :param str name:
+        :rtype: OrderedDict
+        """
+        versions = self._versions.get(name)
+
+        if versions is None:
+            _, fetched = self.fetcher.get_versions(self.sources.get(name, name))
+            versions = self._versions[name] = OrderedDict(
+                (str(version), (version, info)) for version, info in sorted(fetched.items(), reverse=True))
+
+        return versions
+
+    def get_candidates(self, name, target):
+        versions = self.get_versions(name)
+
+        if not Endpoint.is_wildcard(target):
+            exact = [version for version, (_, info) in versions.items() if info['name'] == target]
+            if exact:
+                return exact
+
+        candidates = [version for version in versions if satisfies(version, target)]
+
+        resolution = self.resolutions.get(name)
+        if resolution:
+            candidates = [version for version in candidates if satisfies(version, resolution)] or candidates
+
+        return candidates
+
+    def get_dependencies(self, name, version):
+        key = (name, version)
+        dependencies = self._dependencies.get(key)
+
+        if dependencies is None:
+            dependencies = []
+            pkg_meta = self.get_endpoint(name, version)['pkgMeta']
+
+            for dependency in Endpoint.decompose_many(pkg_meta.get('dependencies')):
+                self.sources.setdefault(dependency['name'], dependency['source'])
+                self.targets.setdefault(dependency['name'], dependency['target'])
+                dependencies.append((dependency['name'], dependency['target']))
+
+            self.fetcher.prefetch([self.sources[dep_name] for dep_name, _ in dependencies])
+            dependencies = self._dependencies[key] = sorted(dependencies)
+
+        return dependencies
+
+    def get_endpoint(self, name, version):
+        """Returns endpoint for a given package version,
+        fetching its metadata if not known yet.
+
+        :param str name:
+        :param str version:
+        :rtype: dict
+        """
+        key = (name, version)
+        endpoint = self._endpoints.get(key)
+
+        if endpoint is None:
+            number, info = self.get_versions(name)[version]
+            endpoint = self._released.get((name, info['name']))
+
+            if endpoint is None:
+                endpoint = PackageEndpoint(
+                    name=name,
+                    source=self.sources.get(name, name),
+                    target=self.targets.get(name, '*'),
+                    dependants=[])
+                endpoint['pkgMeta'] = self.fetcher.fetch(endpoint, number)
+
+            self._endpoints[key] = endpoint
 
-        filtered = filter(func_filter, [(idx, endpoint) for idx, endpoint in enumerate(endpoints)])
-        return list(filtered)  # todo
+        return endpoint
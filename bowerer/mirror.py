@@ -0,0 +1,301 @@
+"""Exposes local mirror of registry packages and a server for it."""
+import json
+import os
+import re
+import shutil
+import threading
+from hashlib import sha1
+from os.path import dirname, join, isdir, isfile
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+from six.moves.urllib.parse import quote, unquote, urlparse
+
+from .exceptions import BowererException
+from .hosts import get_host, MirrorHost
+from .lock import Lockfile
+from .manager import Manager
+from .net import get_client
+from .settings import LOGGER
+from .store import PackageStore
+from .utils import Endpoint, JsonReader, write_json
+from .versions import get_version
+from .workers import WorkerPool
+
+
+RE_DIGEST = re.compile(r'^[0-9a-f]{64}$')
+
+
+class Mirror(object):
+    """Directory with snapshots of packages metadata and archives.
+
+    Layout::
+
+        packages/<name>.json
+        store/  (package store holding archives)
+
+    Package file contains registry data (name, original URL) and
+    versions mirrored, each with its archive digest and bower.json.
+
+    """
+
+    def __init__(self, path, config=None):
+        self.path = path
+        self.config = config or {}
+        self.store = PackageStore(join(path, 'store'))
+        self._lock = threading.Lock()
+
+    def get_package_path(self, name):
+        return join(self.path, 'packages', '%s.json' % quote(name, safe=''))
+
+    def get_package(self, name):
+        """Returns mirrored package data or None.
+
+        :param str name:
+        :rtype: dict|None
+        """
+        try:
+            with open(self.get_package_path(name)) as f:
+                return json.load(f)
+
+        except (IOError, OSError, ValueError):
+            return None
+
+    def get_archive_path(self, digest):
+        """Returns a path to archive with a given digest if it's mirrored.
+
+        :param str digest:
+        :rtype: str|None
+        """
+        if not RE_DIGEST.match(digest):
+            return None
+
+        filepath = self.store.get_archive_path(digest)
+        return filepath if isfile(filepath) else None
+
+    def add(self, name, source, release, tarball=None, commit=None):
+        """Puts a package version into mirror. Returns its archive digest.
+
+        :param str name:
+        :param str source: Repository URL.
+        :param str release: Tag.
+        :param str tarball: Archive URL (if not given, archive is made from git repository).
+        :param str commit:
+        :rtype: str|None
+        """
+        version = get_version(release)
+
+        if version is None:
+            LOGGER.warning('Skipping %s#%s: not a version', name, release)
+            return None
+
+        LOGGER.info('Mirroring %s#%s ...', name, release)
+
+        if tarball:
+            digest = self.store.download(source, release, tarball, get_client(self.config))
+        else:
+            archive = get_host(source, self.config).get_archiver(release, commit)
+            digest = self.store.add_archived(source, release, archive)
+
+        try:
+            _, pkg_meta = JsonReader(self.store.extract(digest)).read()
+
+        except BowererException:
+            pkg_meta = {}
+
+        pkg_meta.setdefault('name', name)
+
+        filepath = self.get_package_path(name)
+
+        with self._lock:
+            package = self.get_package(name) or {'name': name, 'url': source, 'versions': {}}
+            package['versions'][release] = {
+                'version': str(version),
+                'commit': commit,
+                'sha256': digest,
+                'pkgMeta': pkg_meta,
+            }
+
+            if not isdir(dirname(filepath)):
+                os.makedirs(dirname(filepath))
+
+            write_json(filepath, package)
+
+        return digest
+
+    def add_many(self, items):
+        """Puts package versions into mirror concurrently.
+
+        :param list items: (name, source, release, tarball, commit) tuples.
+        :rtype: list
+        """
+        with WorkerPool(self.config.get('concurrency') or 16) as pool:
+            return pool.map(lambda item: self.add(*item), items)
+
+    def add_lock(self, lock):
+        """Puts packages recorded in a lock into mirror.
+
+        :param Lockfile lock:
+        :rtype: list
+        """
+        return self.add_many([
+            (name, entry['source'], entry['release'], entry['tarball'], entry.get('commit'))
+            for name, entry in sorted(lock.packages.items())])
+
+    def add_endpoints(self, endpoints):
+        """Resolves endpoints along with their dependencies
+        and puts them into mirror.
+
+        :param list endpoints: Decomposed endpoints.
+        :rtype: list
+        """
+        manager = Manager(self.config)
+        manager.configure({'targets': endpoints})
+
+        items = []
+
+        for name, endpoint in sorted(manager.resolve().items()):
+            pkg_meta = endpoint['pkgMeta']
+            resolution = pkg_meta.get('_resolution') or {}
+            items.append((
+                name, pkg_meta['_source'], pkg_meta['_release'], resolution.get('tarball'), resolution.get('commit')))
+
+        return self.add_many(items)
+
+    def add_project(self, cwd):
+        """Puts packages a project in a given directory depends on into mirror.
+        Packages recorded in bower.lock are used if there is one,
+        otherwise bower.json dependencies (including dev ones) are resolved.
+
+        :param str cwd:
+        :rtype: list
+        """
+        lock = Lockfile.read(cwd)
+
+        if lock and lock.packages:
+            return self.add_lock(lock)
+
+        _, json_dict = JsonReader(cwd).read()
+
+        endpoints = []
+        for key in ('dependencies', 'devDependencies'):
+            endpoints.extend(sorted(Endpoint.decompose_many(json_dict.get(key)), key=Endpoint.get_key))
+
+        if not endpoints:
+            return []
+
+        return self.add_endpoints(endpoints)
+
+    def serve(self, address=('', 5678)):
+        """Serves mirror over HTTP until interrupted.
+
+        :param tuple address: (host, port)
+        """
+        server = MirrorServer(self, address)
+        LOGGER.info('Serving mirror %s at http://%s:%s ...', self.path, *server.server_address[:2])
+
+        try:
+            server.serve_forever()
+
+        except KeyboardInterrupt:
+            pass
+
+        finally:
+            server.server_close()
+
+    def clear(self):
+        if isdir(self.path):
+            shutil.rmtree(self.path)
+
+
+class MirrorServer(ThreadingMixIn, HTTPServer):
+    """HTTP server speaking registry API for packages in mirror.
+
+    Routes::
+
+        /packages/<name>  - registry data (URL points to mirror)
+        /mirror/<name>/versions  - versions list
+        /mirror/<name>/<tag>/bower.json
+        /tarballs/<sha256>.tar.gz
+
+    """
+
+    daemon_threads = True
+
+    def __init__(self, mirror, address):
+        HTTPServer.__init__(self, address, MirrorRequestHandler)
+        self.mirror = mirror
+
+
+class MirrorRequestHandler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        parts = [unquote(part) for part in urlparse(self.path).path.strip('/').split('/')]
+        mirror = self.server.mirror
+
+        if parts[0] == 'tarballs' and len(parts) == 2 and parts[1].endswith('.tar.gz'):
+            filepath = mirror.get_archive_path(parts[1][:-len('.tar.gz')])
+            if filepath:
+                return self.send_file(filepath)
+            return self.send_not_found()
+
+        package = mirror.get_package(parts[1]) if len(parts) > 1 else None
+
+        if package is None:
+            return self.send_not_found()
+
+        base = 'http://%s' % (self.headers.get('Host') or '%s:%s' % self.server.server_address[:2])
+        url = '%s%s%s' % (base, MirrorHost.PATH, quote(package['name'], safe=''))
+
+        if parts[0] == 'packages' and len(parts) == 2:
+            return self.send_json({'name': package['name'], 'url': url})
+
+        if parts[0] == 'mirror' and len(parts) == 3 and parts[2] == 'versions':
+            return self.send_json([{
+                'name': release,
+                'version': info['version'],
+                'commit': info.get('commit'),
+                'sha256': info['sha256'],
+                'tarball_url': '%s/tarballs/%s.tar.gz' % (base, info['sha256']),
+            } for release, info in sorted(package['versions'].items())])
+
+        if parts[0] == 'mirror' and len(parts) == 4 and parts[3] == 'bower.json':
+            info = package['versions'].get(parts[2])
+            if info:
+                return self.send_json(info['pkgMeta'])
+
+        return self.send_not_found()
+
+    def send_json(self, data):
+        body = json.dumps(data, sort_keys=True).encode('utf-8')
+        etag = '"%s"' % sha1(body).hexdigest()
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_file(self, filepath):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(os.path.getsize(filepath)))
+        self.end_headers()
+
+        with open(filepath, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def send_not_found(self):
+        self.send_response(404)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        LOGGER.debug('Mirror: %s', format % args)
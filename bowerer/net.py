@@ -0,0 +1,298 @@
+"""Exposes HTTP client sharing pooled keep-alive connections."""
+import threading
+
+from six.moves.urllib.parse import urlparse
+
+from .cache import ResponseCache
+from .exceptions import OfflineError, ResolveError
+from .settings import LOGGER
+from .tracing import span, CATEGORY_HTTP
+
+
+POOL_SIZE_DEFAULT = 10
+CONCURRENCY_PER_HOST_DEFAULT = 8
+TIMEOUT_DEFAULT = 30000
+
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+class HttpClient(object):
+    """HTTP client configured from bowerrc.
+
+    Keeps a pool of keep-alive connections per host, so that
+    subsequent requests to the same host skip TCP and TLS handshakes.
+    Also limits the number of simultaneous requests to a host.
+
+    JSON responses are cached on disk (if `storage.http` is configured)
+    and revalidated with conditional requests when stale.
+
+    In offline mode no requests are issued, only cached data is served.
+
+    """
+
+    def __init__(self, config=None):
+        config = config or {}
+
+        self.config = config
+        self.timeout = float(config.get('timeout') or TIMEOUT_DEFAULT) / 1000
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.cache = ResponseCache.from_config(config)
+        self.offline = bool(config.get('offline'))
+        self.concurrency_per_host = int(config.get('concurrency-per-host') or CONCURRENCY_PER_HOST_DEFAULT)
+        self._host_limits = {}
+        self._host_limits_lock = threading.Lock()
+
+    @classmethod
+    def get_ca(cls, config):
+        """Returns a path to CA bundle from config if any.
+
+        :param dict config:
+        :rtype: str|None
+        """
+        ca = config.get('ca') or {}
+
+        if isinstance(ca, dict):
+            ca = ca.get('search') or []
+
+        if isinstance(ca, (list, tuple)):
+            ca = ca[0] if ca else None
+
+        return ca or None
+
+    @property
+    def session(self):
+        """Session is made on first use, so that `requests`
+        is not imported by commands not issuing requests.
+
+        :rtype: requests.Session
+        """
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._make_session(self.config)
+
+        return self._session
+
+    @classmethod
+    def _make_session(cls, config):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        pool_size = int(config.get('pool-size') or POOL_SIZE_DEFAULT)
+
+        session = requests.Session()
+
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        user_agent = config.get('user-agent')
+        if user_agent:
+            session.headers['User-Agent'] = user_agent
+
+        proxies = {}
+        if config.get('proxy'):
+            proxies['http'] = config['proxy']
+        if config.get('https-proxy'):
+            proxies['https'] = config['https-proxy']
+        session.proxies.update(proxies)
+
+        verify = config.get('strict-ssl', True)
+        if verify:
+            verify = cls.get_ca(config) or True
+        session.verify = verify
+
+        return session
+
+    def get(self, url, **kwargs):
+        """Issues GET request and returns response object.
+
+        Streamed responses (`stream=True`) occupy a slot of the host limit
+        until they are closed, so callers must close them.
+
+        :param str url:
+        :rtype: requests.Response
+        :raises: OfflineError
+        """
+        if self.offline:
+            raise OfflineError('Not available offline: %s' % url)
+
+        kwargs.setdefault('timeout', self.timeout)
+        LOGGER.debug('GET %s ...', url)
+
+        limit = self.get_host_limit(url)
+        limit.acquire()
+
+        try:
+            with span('GET', CATEGORY_HTTP, url=url) as current:
+                response = self.session.get(url, **kwargs)
+                current.set(status=response.status_code)
+
+        except BaseException:
+            limit.release()
+            raise
+
+        if kwargs.get('stream'):
+            release_on_close(response, limit)
+        else:
+            limit.release()
+
+        return response
+
+    def get_host_limit(self, url):
+        """Returns a semaphore limiting concurrent requests to URL host.
+
+        :param str url:
+        :rtype: threading.BoundedSemaphore
+        """
+        host = urlparse(url).netloc
+
+        with self._host_limits_lock:
+            limit = self._host_limits.get(host)
+            if limit is None:
+                limit = self._host_limits[host] = threading.BoundedSemaphore(self.concurrency_per_host)
+
+        return limit
+
+    def get_json(self, url, allow_empty=False, headers=None):
+        """Returns JSON as a dictionary from a given URL.
+
+        :param str url:
+        :param bool allow_empty:
+        :param dict headers: Additional request headers.
+        :rtype: dict
+        """
+        return self.get_json_entry(url, allow_empty, headers)['body']
+
+    def get_json_entry(self, url, allow_empty=False, headers=None):
+        """Returns JSON response data from a given URL as a dict
+        with `body`, `etag` and `links` (URLs from Link header
+        indexed by relation types) keys.
+
+        Stale cached data is served if revalidation fails.
+
+        :param str url:
+        :param bool allow_empty: Return empty body for missing (404) or non-JSON data.
+        :param dict headers: Additional request headers.
+        :rtype: dict
+        :raises: ResolveError
+        """
+        cache = self.cache
+        cached = cache.get(url) if cache else None
+
+        if cached and (self.offline or cache.is_fresh(cached)):
+            return cached
+
+        headers = dict(headers or {})
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            response = self.get(url, headers=headers)
+
+        except (IOError, OSError) as e:  # Connection errors and timeouts (requests errors are IOErrors).
+            if not cached:
+                raise
+
+            LOGGER.warning('Unable to revalidate %s (%s), using cached data', url, e)
+            return cached
+
+        status = response.status_code
+
+        if cached and status == 304:
+            LOGGER.debug('Not modified: %s', url)
+            cache.touch(url, cached)
+            return cached
+
+        etag = response.headers.get('ETag')
+        links = dict((rel, link['url']) for rel, link in response.links.items())
+
+        if status >= 400:
+            if cached:
+                LOGGER.warning('Unable to revalidate %s (HTTP %s), using cached data', url, status)
+                return cached
+
+            if not (allow_empty and status == 404):
+                raise ResolveError('Unable to get %s: HTTP %s' % (url, status))
+
+            return {'body': {}, 'etag': etag, 'links': links}
+
+        try:
+            json = response.json()
+
+        except ValueError:
+            if not allow_empty:
+                raise
+            return {'body': {}, 'etag': etag, 'links': links}
+
+        if cache and response.status_code == 200:
+            return cache.set(
+                url, json,
+                etag=etag,
+                last_modified=response.headers.get('Last-Modified'),
+                links=links)
+
+        return {'body': json, 'etag': etag, 'links': links}
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+
+
+def release_on_close(response, limit):
+    """Makes response release a given limit (once) when closed.
+
+    :param requests.Response response:
+    :param threading.BoundedSemaphore limit:
+    """
+    close = response.close
+    lock = threading.Lock()
+    released = []
+
+    def close_releasing():
+        try:
+            close()
+
+        finally:
+            with lock:
+                if not released:
+                    released.append(True)
+                    limit.release()
+
+    response.close = close_releasing
+
+
+def get_client_key(config):
+    """Returns a key identifying client settings in a given config.
+
+    :param dict config:
+    :rtype: tuple
+    """
+    keys = (
+        'timeout', 'pool-size', 'concurrency-per-host', 'user-agent', 'proxy', 'https-proxy', 'strict-ssl',
+        'cache-ttl', 'cache-size', 'offline')
+    storage = config.get('storage') or {}
+    return tuple(config.get(key) for key in keys) + (HttpClient.get_ca(config), storage.get('http'))
+
+
+def get_client(config=None):
+    """Returns HTTP client shared between all callers using
+    the same connection settings.
+
+    :param dict config:
+    :rtype: HttpClient
+    """
+    config = config or {}
+    key = get_client_key(config)
+
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = HttpClient(config)
+
+    return client
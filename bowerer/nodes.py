@@ -0,0 +1,252 @@
+"""Exposes compact package endpoint and dependency tree node types."""
+from six import iteritems
+from six.moves import intern
+
+
+_NOT_SET = object()
+
+
+class PackageEndpoint(object):
+    """Package endpoint: name, source and target, state flags
+    and other data gathered while analysing and resolving.
+
+    Behaves like a dictionary (as endpoints used to be dicts): known keys
+    are kept in slots, boolean state flags (`missing`, `incompatible`, etc.)
+    in a bitfield, other keys in an additional dictionary.
+    Use `as_dict()` to get a plain dictionary (e.g. for JSON output).
+
+    Instances are compared by value (like dicts they replace) but hashed
+    by identity, as name, source and target change while resolving.
+    Use `key` for lookups by (name, source, target).
+
+    """
+
+    __slots__ = ('_name', '_source', '_target', '_flags', '_extra')
+
+    # Keys stored in slots mapped to slot names.
+    SLOTS = {'name': '_name', 'source': '_source', 'target': '_target'}
+
+    # Slots (besides name, source and target) compared by equality checks, cheaper first.
+    COMPARED = ()
+
+    # Keys not compared by equality checks (e.g. graph back-references).
+    UNCOMPARED = ()
+
+    # Boolean state flags mapped to bits.
+    FLAGS = dict((flag, 1 << bit) for bit, flag in enumerate((
+        'missing', 'incompatible', 'different', 'linked', 'extraneous',
+        'root', 'newly', 'unresolvable', 'untargetable')))
+
+    def __init__(self, name='', source='', target='', **kwargs):
+        self._name = intern(name) if type(name) is str else name
+        self._source = intern(source) if type(source) is str else source
+        self._target = target
+        self._flags = 0
+        self._extra = None
+
+        for key, value in iteritems(kwargs):
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, data):
+        """Returns an instance made from a dictionary
+        or another endpoint (instances of this class are returned as they are).
+
+        :param dict data:
+        :rtype: PackageEndpoint
+        """
+        if isinstance(data, cls):
+            return data
+
+        endpoint = cls()
+        endpoint.update(data)
+        return endpoint
+
+    @property
+    def key(self):
+        """Hashable identity for fast membership checks.
+
+        :rtype: tuple
+        """
+        try:
+            return self._name or '', self._source or '', self._target or ''
+
+        except AttributeError:  # Some of them were deleted.
+            get = self.get
+            return get('name') or '', get('source') or '', get('target') or ''
+
+    __hash__ = object.__hash__
+
+    @staticmethod
+    def _get_compared(data, uncompared):
+        return dict((key, value) for key, value in data.items() if key not in uncompared)
+
+    def __eq__(self, other):
+        if isinstance(other, PackageEndpoint):
+            if self is other:
+                return True
+            if self._flags != other._flags or self.key != other.key:
+                return False
+
+            if type(self) is not type(other):
+                uncompared = self.UNCOMPARED + other.UNCOMPARED
+                return self._get_compared(self, uncompared) == self._get_compared(other, uncompared)
+
+            for slot in self.COMPARED:
+                if getattr(self, slot, _NOT_SET) != getattr(other, slot, _NOT_SET):
+                    return False
+
+            return (self._extra or {}) == (other._extra or {})
+
+        if isinstance(other, dict):
+            if not self.UNCOMPARED:
+                return self.as_dict() == other
+
+            return self._get_compared(self, self.UNCOMPARED) == self._get_compared(other, self.UNCOMPARED)
+
+        return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self):
+        return '<%s %r>' % (self.__class__.__name__, self.as_dict())
+
+    def __getitem__(self, key):
+        value = self.get(key, _NOT_SET)
+
+        if value is _NOT_SET:
+            raise KeyError(key)
+
+        return value
+
+    def get(self, key, default=None):
+        slot = self.SLOTS.get(key)
+
+        if slot is not None:
+            return getattr(self, slot, default)
+
+        bit = self.FLAGS.get(key)
+
+        if bit is not None:
+            return True if self._flags & bit else default
+
+        if self._extra is None:
+            return default
+
+        return self._extra.get(key, default)
+
+    def __setitem__(self, key, value):
+        slot = self.SLOTS.get(key)
+
+        if slot is not None:
+            if slot in ('_name', '_source') and type(value) is str:
+                value = intern(value)
+            setattr(self, slot, value)
+            return
+
+        bit = self.FLAGS.get(key)
+
+        if bit is not None:
+            if value:
+                self._flags |= bit
+            else:
+                self._flags &= ~bit
+            return
+
+        if self._extra is None:
+            self._extra = {}
+
+        self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        slot = self.SLOTS.get(key)
+
+        if slot is not None:
+            delattr(self, slot)
+
+        elif key in self.FLAGS:
+            self._flags &= ~self.FLAGS[key]
+
+        else:
+            del self._extra[key]
+
+    def __contains__(self, key):
+        return self.get(key, _NOT_SET) is not _NOT_SET
+
+    def setdefault(self, key, default=None):
+        value = self.get(key, _NOT_SET)
+
+        if value is _NOT_SET:
+            self[key] = value = default
+
+        return value
+
+    def update(self, other):
+        for key, value in (other.items() if hasattr(other, 'items') else other):
+            self[key] = value
+
+    def keys(self):
+        return [key for key, _ in self.items()]
+
+    def values(self):
+        return [value for _, value in self.items()]
+
+    def items(self):
+        items = []
+
+        for key, slot in iteritems(self.SLOTS):
+            value = getattr(self, slot, _NOT_SET)
+            if value is not _NOT_SET:
+                items.append((key, value))
+
+        if self._flags:
+            items.extend((flag, True) for flag, bit in iteritems(self.FLAGS) if self._flags & bit)
+
+        if self._extra:
+            items.extend(iteritems(self._extra))
+
+        return items
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.items())
+
+    def as_dict(self):
+        """Returns a plain dictionary view.
+
+        :rtype: dict
+        """
+        return dict(self.items())
+
+    def copy(self):
+        copied = self.__class__()
+        copied.update(self.items())
+        return copied
+
+
+class PackageNode(PackageEndpoint):
+    """Node of dependency tree: an endpoint of installed package
+    along with its metadata and adjacent nodes.
+
+    """
+
+    __slots__ = ('_pkg_meta', '_canonical_dir', '_dependencies', '_dependants')
+
+    SLOTS = dict(PackageEndpoint.SLOTS, **{
+        'pkgMeta': '_pkg_meta',
+        'canonicalDir': '_canonical_dir',
+        'dependencies': '_dependencies',
+        'dependants': '_dependants',
+    })
+
+    COMPARED = ('_canonical_dir', '_pkg_meta')
+
+    # Adjacent nodes are not compared: the graph may have cycles.
+    UNCOMPARED = ('dependencies', 'dependants')
@@ -1,13 +1,21 @@
 import json
-from collections import deque
 from hashlib import md5
-from os.path import basename, join, islink, isdir
-from os import walk, listdir
+from os.path import basename, dirname, join
+from time import time
 
-from .utils import read_json, JsonReader, Endpoint
+from .utils import read_json, JsonReader, write_json, scan_dirs
 from .settings import LOGGER
-from .exceptions import ProjectError
+from .exceptions import ProjectError, JsonError
+from .graph import DependencyGraph
+from .hosts import get_host
+from .lock import Lockfile
 from .manager import Manager
+from .net import get_client
+from .nodes import PackageNode
+from .snapshot import InstalledSnapshot
+from .store import PackageStore
+from .tracing import span, traced, CATEGORY_PACKAGE
+from .workers import WorkerPool
 
 
 class Project(object):
@@ -17,9 +25,13 @@ class Project(object):
         self.options = {}
         self.json = {}
         self.json_filepath = None
+        self.json_hash = None
         self.cache_installed = None
+        self.gather_timings = {}
+        self.graph = DependencyGraph()
         self.manager = Manager(config)
 
+    @traced('project.install')
     def install(self, endpoints, options=None, config=None):
         self.config = config or {}
         self.options = options or {}
@@ -28,6 +40,14 @@ class Project(object):
         if not self.json_filepath and not len(endpoints):
             raise ProjectError('No bower.json present')
 
+        production = bool(self.options.get('production'))
+        lock = Lockfile.read(self.config['cwd']) or Lockfile(None, production=production)
+
+        if not endpoints and not self.config.get('force') and lock.matches(self.json_hash, production):
+            LOGGER.debug('%s matches bower.json, skipping resolution', Lockfile.filename)
+            self.install_locked(lock)
+            return
+
         incompatibles = []
         targets = []
         resolved = {}
@@ -51,6 +71,110 @@ class Project(object):
         self._bootstrap(targets, resolved, incompatibles)
 
         self.manager.preinstall(self.json)
+        installed = self.manager.install(self.json)
+
+        if self.json_filepath:
+            lock.json_hash = self.json_hash
+            lock.production = production
+            lock.update(self.get_lockable(installed, production))
+            self.fill_digests(lock)
+            lock.write(self.config['cwd'])
+
+    def get_lockable(self, installed, production=False):
+        """Returns installed packages reachable from bower.json dependencies
+        (and devDependencies unless in production mode).
+
+        Packages installed explicitly but not saved into bower.json
+        are not locked, since the lock is used for plain installs.
+
+        :param dict installed: pkgMeta and digest tuples indexed by package names.
+        :param bool production:
+        :rtype: dict
+        """
+        pending = list(self.json.get('dependencies') or {})
+
+        if not production:
+            pending.extend(self.json.get('devDependencies') or {})
+
+        lockable = {}
+
+        while pending:
+            name = pending.pop()
+
+            if name in lockable or name not in installed:
+                continue
+
+            lockable[name] = installed[name]
+            pending.extend(installed[name][0].get('dependencies') or {})
+
+        return lockable
+
+    def fill_digests(self, lock):
+        """Puts archive digests from the store into lock entries
+        without them (e.g. packages installed before the lock was made).
+
+        :param Lockfile lock:
+        """
+        store = PackageStore.from_config(self.config)
+
+        for name, entry in lock.packages.items():
+            if entry.get('sha256'):
+                continue
+
+            entry['sha256'] = store.get_digest(entry['source'], entry['release'])
+
+            if not entry['sha256']:
+                LOGGER.debug('No archive digest for %s#%s to lock', name, entry['release'])
+
+    @traced('project.install_locked')
+    def install_locked(self, lock):
+        """Installs packages exactly as recorded in a given lock.
+
+        :param Lockfile lock:
+        """
+        config = self.config
+        components_dir = join(config['cwd'], config['directory'])
+        store = PackageStore.from_config(config)
+        client = get_client(config)
+
+        installed = self.cache_installed or {}
+
+        def install_package(item):
+            name, entry = item
+            destination = join(components_dir, name)
+            installed_meta = (installed.get(name) or {}).get('pkgMeta')
+
+            if Manager.matches_installed(Lockfile.make_pkg_meta(name, entry), installed_meta):
+                LOGGER.debug('%s#%s is already installed', name, entry['release'])
+                return
+
+            LOGGER.info('Installing %s#%s ...', name, entry['release'])
+
+            if entry['tarball'] and not entry.get('sha256'):
+                LOGGER.warning('%s#%s has no digest in %s, its integrity is not checked',
+                               name, entry['release'], Lockfile.filename)
+
+            def prepare(staged):
+                pkg_meta, _, _ = read_json(staged, dummy_json={'name': name})
+                write_json(
+                    join(staged, JsonReader.filename_modern_hidden),
+                    Lockfile.make_pkg_meta(name, entry, pkg_meta))
+
+            with span('install', CATEGORY_PACKAGE, package=name, release=entry['release']):
+                if entry['tarball']:
+                    store.install(
+                        entry['source'], entry['release'], entry['tarball'], destination, client,
+                        staging_root=config.get('tmp'), digest_expected=entry.get('sha256'), prepare=prepare)
+
+                else:
+                    # Contents are pinned by commit.
+                    archive = get_host(entry['source'], config).get_archiver(entry['release'], entry.get('commit'))
+                    store.install(
+                        entry['source'], entry['release'], None, destination, client,
+                        staging_root=config.get('tmp'), archive=archive, prepare=prepare)
+
+        with WorkerPool(config.get('concurrency') or 16) as pool:
+            pool.map(install_package, sorted(lock.packages.items()))
 
     def _bootstrap(self, targets, resolved, incompatibles):
         installed = {name: meta['pkgMeta'] for name, meta in self.cache_installed.items()}  # todo mout.object.map was used
@@ -71,43 +195,9 @@ class Project(object):
             del self.json['resolutions']
 
     def walk_tree(self, node, func, once=True):
-        queue = deque(node['dependencies'].values())
-
-        if once:
-            once = []
-
-        def filter_dep(dep):
-            matched = False
-            for stacked in once:
-                if matched:
-                    break
-
-                if dep['endpoint']:
-                    matched = (dep['endpoint'] == stacked['endpoint'])
-                    continue
-
-                matched = (
-                    dep['name'] == stacked['name'] and
-                    dep['source'] == stacked['source'] and
-                    dep['target'] == stacked['target'])
-
-            return not matched
-
-        while queue:
-            node = queue.popleft()
-            result = func(node, node['endpoint']['name'] if node.get('endpoint') else node['name'])
-
-            if result == False:
-                continue
-
-            dependencies = node['dependencies'].values()[:]
-
-            if once:
-                dependencies = [dep for dep in dependencies if filter_dep(dep)]
-                once.extend(dependencies)
-
-            queue.extendleft(dependencies)
+        self.graph.walk(node, func, once=once)
 
+    @traced('project.analyse')
     def analyse(self):
         project_json = self.read_json()
         installed_flat = dict(self.gather_installed())
@@ -116,14 +206,13 @@ class Project(object):
         json_copy = dict(project_json)
 
         cwd = self.config['cwd']
-        project_tree = {
-            'name': project_json['name'],
-            'source': cwd,
-            'target': project_json.get('version') or '*',
-            'pkgMeta': json_copy,
-            'canonicalDir': cwd,
-            'root': True
-        }
+        project_tree = PackageNode(
+            name=project_json['name'],
+            source=cwd,
+            target=project_json.get('version') or '*',
+            pkgMeta=json_copy,
+            canonicalDir=cwd,
+            root=True)
 
         json_copy['dependencies'] = json_copy.get('dependencies') or {}
         json_copy['devDependencies'] = json_copy.get('devDependencies') or {}
@@ -144,19 +233,21 @@ class Project(object):
                         (pkg_meta.get('_originalSource', '') or pkg_meta.get('_source', '')) +
                         '#' + pkg_meta.get('_target'))
 
+        graph = self.graph = DependencyGraph()
+
         # Restore dependency tree for main deps.
-        self._restore_refs(project_tree, installed_flat, 'dependencies')
+        graph.restore(project_tree, installed_flat, 'dependencies')
 
-        if not self.options['production']:
+        if not self.options.get('production'):
             # Restore dependency tree for dev deps.
-            self._restore_refs(project_tree, installed_flat, 'devDependencies')
+            graph.restore(project_tree, installed_flat, 'devDependencies')
 
-        for name, meta in installed_flat.items():
-            # Restore dependency tree for extra deps.
-            if not meta.get('dependants'):
+        for name, meta in list(installed_flat.items()):
+            # Restore dependency tree for extra deps (those not referenced).
+            if meta not in graph:
                 meta['extraneous'] = True
-                self._restore_refs(meta, installed_flat, 'dependencies')
-                project_tree['dependencies'][name] = meta
+                graph.restore(meta, installed_flat, 'dependencies')
+                graph.add_edge(project_tree, name, meta, reverse=False)
 
         try:
             del installed_flat[project_json['name']]
@@ -165,77 +256,7 @@ class Project(object):
 
         return project_json, project_tree, installed_flat
 
-    @classmethod
-    def _restore_refs(cls, node, flat, json_key, processed=None):
-
-        if node.get('missing', False):
-            return
-
-        node['dependencies'] = node.get('dependencies') or {}
-        node['dependants'] = node.get('dependants') or {}
-        processed = processed or {}
-
-        deps = {
-            k: v for k, v in node['pkgMeta'].get(json_key, {}).items()
-            if not processed.get(node['name'] + ':' + k)}
-
-        for dep_ident, dep_descr in deps.items():
-            local = flat[dep_ident]
-            decomposed = Endpoint.decompose_from_json(dep_ident, dep_descr)
-            restored = None
-            compatible = None
-            original_source = None
-
-            if not local:
-                # Check dep is not installed.
-                flat[dep_ident] = restored = decomposed
-                restored['missing'] = True
-            else:
-                # Even if it is installed, check if it's compatible
-                # Note that linked packages are interpreted as compatible
-                # This might change in the future: #673
-                compatible = (
-                    local.get('linked') or
-                    (not local.get('missing') and
-                     decomposed['target'] == local['pkgMeta']['_target']))
-
-                if not compatible:
-                    restored = decomposed
-
-                    if not local.get('missing'):
-                        restored['pkgMeta'] = local['pkgMeta']
-                        restored['canonicalDir'] = local['canonicalDir']
-                        restored['incompatible'] = True
-                    else:
-                        restored['missing'] = True
-
-                else:
-                    restored = local
-                    local.update(decomposed)  # todo recursive update?
-
-                # Check if source changed, marking as different if it did
-                # We only do this for direct root dependencies that are compatible
-                if node['root'] and compatible:
-                    original_source = local.get('pkgMeta', {}).get('_originalSource')
-                    if original_source and original_source != decomposed['source']:
-                        restored['different'] = True
-
-            # Cross reference
-            node['dependencies'][dep_ident] = restored
-            processed[node['name'] + ':' + dep_ident] = True
-
-            restored['dependants'] = restored.get('dependants', {})
-
-            # We need to clone due to shared objects in the manager!
-            restored['dependants'][node['name']] = dict(node)
-
-            # Call restore for this dependency
-            cls._restore_refs(restored, flat, 'dependencies', processed)
-
-            # Do the same for the incompatible local package
-            if local and restored != local:
-                cls._restore_refs(local, flat, 'dependencies', processed)
-
+    @traced('project.read_json')
     def read_json(self):
         cwd = self.config['cwd']
         contents, deprecated, is_dummy = read_json(cwd, dummy_json={'name': basename(cwd) or 'root' })
@@ -248,29 +269,70 @@ class Project(object):
             self.json_filepath = join(cwd, deprecated or JsonReader.filename_modern)
 
         json_str = json.dumps(contents, indent=2) + '\n'
-        self.json_hash = md5(json_str).hexdigest()
+        self.json_hash = md5(json_str.encode('utf-8')).hexdigest()
         return contents
 
+    @traced('project.gather_installed')
     def gather_installed(self):
         components_path = join(self.config['cwd'], self.config['directory'])
 
         endpoints = {}
 
         expected_filename = JsonReader.filename_modern_hidden
-        for current_dir, _, files in walk(components_path):
-            if expected_filename in files:
-                filepath = join(current_dir, expected_filename)
-                name = basename(current_dir)
-                pkg_meta, _, _ = read_json(filepath)
-                endpoints[name] = {
-                    'name': name,
-                    'source': pkg_meta.get('_originalSource') or pkg_meta['_source'],
-                    'target': pkg_meta['_target'],
-                    'canonicalDir': current_dir,
-                    'pkgMeta': pkg_meta
-                }
+        snapshot = InstalledSnapshot.from_config(self.config)
+
+        if snapshot and snapshot.dir_unchanged:
+            filepaths = snapshot.filepaths
+            dir_stat = snapshot.dir_stat
+
+        else:
+            # Only the first level is inspected: packages are never nested.
+            dir_stat = InstalledSnapshot.get_stat(components_path)
+            filepaths = [
+                join(components_path, name, expected_filename)
+                for name, is_link in scan_dirs(components_path) if not is_link]
+
+        timings = {}
+
+        def read_meta(filepath):
+            time_started = time()
+
+            if snapshot:
+                pkg_meta = snapshot.read_meta(filepath)
+            else:
+                try:
+                    pkg_meta, _, _ = read_json(filepath)
+                except (JsonError, ValueError):
+                    pkg_meta = None
+
+            timings[filepath] = time() - time_started
+            return pkg_meta
+
+        with WorkerPool(min(len(filepaths), self.config.get('concurrency') or 16)) as pool:
+            metas = pool.map(read_meta, filepaths)
+
+        for filepath, pkg_meta in zip(filepaths, metas):
+            if pkg_meta is None:
+                continue
+
+            current_dir = dirname(filepath)
+            name = basename(current_dir)
+            endpoints[name] = PackageNode(
+                name=name,
+                source=pkg_meta.get('_originalSource') or pkg_meta['_source'],
+                target=pkg_meta['_target'],
+                canonicalDir=current_dir,
+                pkgMeta=pkg_meta)
+
+            LOGGER.debug('Gathered %s in %.2f ms', name, timings[filepath] * 1000)
+
+        if snapshot:
+            snapshot.update(filepaths, dir_stat)
+            snapshot.save()
 
         self.cache_installed = endpoints
+        self.gather_timings = {basename(dirname(filepath)): spent for filepath, spent in timings.items()}
+
         return endpoints
 
     def gather_installed_links(self):
@@ -278,20 +340,19 @@ class Project(object):
 
         endpoints = {}
 
-        for directory in listdir(components_path):
-            fullpath = join(components_path, directory)
-
-            if not (isdir(fullpath) and islink(fullpath)):
+        for directory, is_link in scan_dirs(components_path):
+            if not is_link:
                 continue
 
+            fullpath = join(components_path, directory)
+
             pkg_meta, deprecated, _ = read_json(fullpath, dummy_json={'name': directory})
             pkg_meta['_direct'] = True
-            endpoints[directory] = {
-                'name': directory,
-                'source': fullpath,
-                'target': '*',
-                'canonicalDir': fullpath,
-                'pkgMeta': pkg_meta,
-                'linked': True
-            }
+            endpoints[directory] = PackageNode(
+                name=directory,
+                source=fullpath,
+                target='*',
+                canonicalDir=fullpath,
+                pkgMeta=pkg_meta,
+                linked=True)
         return endpoints
@@ -1,10 +1,21 @@
-from .utils import get_json
+from six import string_types
+from six.moves.urllib.parse import quote
+
+from .cache import ResponseCache
+from .exceptions import ResolveError
+from .net import get_client
+from .settings import LOGGER
+from .workers import WorkerPool
+
+
+TTL_DEFAULT = 300
 
 
 class Registry(object):
 
-    def __init__(self, app_name):
+    def __init__(self, app_name, config=None):
         self.app_name = app_name
+        self.config = config or {}
 
 
 class Bower(Registry):
@@ -13,4 +24,118 @@ class Bower(Registry):
     BASE_URL = 'http://bower.herokuapp.com'
 
     def get_app_data(self):
-        return get_json('%s/packages/%s' % (self.BASE_URL, self.app_name))
+        """Returns registry data for the package or an empty dict if not found.
+
+        :rtype: dict
+        """
+        return self.lookup([self.app_name], self.config)[self.app_name] or {}
+
+    @classmethod
+    def get_search_urls(cls, config):
+        """Returns registries to search packages in, in priority order.
+
+        :param dict config:
+        :rtype: list
+        """
+        search = (config.get('registry') or {}).get('search')
+
+        if isinstance(search, string_types):
+            search = [search]
+
+        return [url.rstrip('/') for url in search or []] or [cls.BASE_URL]
+
+    @classmethod
+    def get_cache(cls, config):
+        """Returns cache of lookup results (if `storage.registry` is configured).
+        Results are used for `registry-ttl` seconds, not found ones as well.
+
+        :param dict config:
+        :rtype: ResponseCache|None
+        """
+        path = (config.get('storage') or {}).get('registry')
+
+        if not path:
+            return None
+
+        ttl = config.get('registry-ttl')
+        return ResponseCache(path, ttl=TTL_DEFAULT if ttl is None else int(ttl))
+
+    @classmethod
+    def lookup(cls, names, config=None, errors=None):
+        """Returns registry data (None if not found) indexed by package names.
+
+        Every search registry is queried in priority order until the package
+        is found there. Packages are looked up concurrently, a failure
+        to look up one of them doesn't affect the others.
+
+        :param list names:
+        :param dict config:
+        :param dict errors: If given, lookup errors are put there indexed
+            by names (missing from the result) instead of being raised.
+        :rtype: dict
+        :raises: ResolveError
+        """
+        config = config or {}
+        search_urls = cls.get_search_urls(config)
+        cache = cls.get_cache(config)
+        client = get_client(config)
+
+        def get_cache_key(name):
+            return '%s#%s' % (' '.join(search_urls), name)
+
+        found = {}
+        pending = []
+
+        for name in names:
+            if name in found or name in pending:
+                continue
+
+            cached = cache.get(get_cache_key(name)) if cache else None
+
+            if cached and (client.offline or cache.is_fresh(cached)):
+                found[name] = cached['body']
+            else:
+                pending.append(name)
+
+        def find(name):
+            for search_url in search_urls:
+                url = '%s/packages/%s' % (search_url, quote(name))
+                response = client.get(url)
+
+                if response.status_code == 404:
+                    continue
+
+                if response.status_code != 200:
+                    raise ResolveError('Unable to look up `%s`: HTTP %s from %s' % (
+                        name, response.status_code, search_url))
+
+                return response.json()
+
+            LOGGER.debug('Package `%s` is not registered', name)
+            return None
+
+        def lookup_one(name):
+            try:
+                return find(name), None
+
+            except Exception as e:
+                return None, e
+
+        if pending:
+            with WorkerPool(min(len(pending), config.get('concurrency') or 16)) as pool:
+                results = pool.map(lookup_one, pending)
+
+            for name, (app_data, error) in zip(pending, results):
+                if error is not None:
+                    if errors is None:
+                        raise error
+
+                    errors[name] = error
+                    continue
+
+                found[name] = app_data
+
+                if cache:
+                    cache.set(get_cache_key(name), app_data)
+
+        return found
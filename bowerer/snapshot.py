@@ -0,0 +1,170 @@
+"""Exposes persisted snapshot of installed packages metadata."""
+import json
+import os
+from hashlib import sha1
+from os.path import join, abspath, isdir
+
+from .exceptions import JsonError
+from .settings import LOGGER
+from .utils import read_json, write_json
+
+
+class InstalledSnapshot(object):
+    """Persisted metadata of packages installed into components directory.
+
+    Every metadata file is stored along with its stat signature,
+    so that unchanged files are not parsed again. Components directory
+    signature is stored as well: if it is unchanged the set of package
+    directories is the same and directory scanning may be skipped.
+
+    Metadata file paths of all package directories are kept (even of those
+    having no valid metadata yet), so that metadata written into an existing
+    package directory is noticed without scanning.
+
+    """
+
+    format_version = 2
+
+    def __init__(self, components_path, storage_path):
+        self.components_path = abspath(components_path)
+        hashed = sha1(self.components_path.encode('utf-8')).hexdigest()
+        self.filepath = join(storage_path, hashed + '.json')
+
+        self.dir_stat = None
+        self.candidates = []
+        self.entries = {}
+        self.changed = False
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns snapshot for configured project or None
+        if snapshot storage is not configured.
+
+        :param dict config:
+        :rtype: InstalledSnapshot|None
+        """
+        storage_path = (config.get('storage') or {}).get('analysis')
+
+        if not storage_path:
+            return None
+
+        snapshot = cls(join(config['cwd'], config['directory']), storage_path)
+        snapshot.load()
+        return snapshot
+
+    @classmethod
+    def get_stat(cls, path):
+        """Returns stat signature of a given path or None if it doesn't exist.
+
+        :param str path:
+        :rtype: list|None
+        """
+        try:
+            stat = os.stat(path)
+
+        except OSError:
+            return None
+
+        return [stat.st_mtime, stat.st_size, stat.st_ino]
+
+    def load(self):
+        try:
+            with open(self.filepath) as f:
+                contents = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            return
+
+        if contents.get('version') != self.format_version:
+            return
+
+        self.dir_stat = contents.get('dir')
+        self.candidates = contents.get('candidates') or []
+        self.entries = contents.get('entries') or {}
+
+    def save(self):
+        """Writes snapshot if anything has changed since load."""
+        if not self.changed:
+            return
+
+        dirpath = os.path.dirname(self.filepath)
+
+        try:
+            if not isdir(dirpath):
+                os.makedirs(dirpath)
+
+            write_json(self.filepath, {
+                'version': self.format_version,
+                'dir': self.dir_stat,
+                'candidates': self.candidates,
+                'entries': self.entries,
+            })
+
+        except (IOError, OSError) as e:
+            LOGGER.debug('Unable to save snapshot %s: %s', self.filepath, e)
+
+        self.changed = False
+
+    @property
+    def dir_unchanged(self):
+        """Flag whether components directory listing
+        has not changed since snapshot was made."""
+        return self.dir_stat is not None and self.dir_stat == self.get_stat(self.components_path)
+
+    @property
+    def filepaths(self):
+        """Metadata file paths of all package directories known to snapshot."""
+        return list(self.candidates)
+
+    def read_meta(self, filepath):
+        """Returns package metadata from a given file, parsing
+        the file only if it has changed since snapshot was made.
+        Returns None if file doesn't exist or is malformed.
+
+        :param str filepath:
+        :rtype: dict|None
+        """
+        stat = self.get_stat(filepath)
+        entry = self.entries.get(filepath)
+
+        if stat is None:
+            if entry:
+                del self.entries[filepath]
+                self.changed = True
+            return None
+
+        if entry and entry['stat'] == stat:
+            return entry['pkgMeta']
+
+        try:
+            pkg_meta, _, _ = read_json(filepath)
+
+        except (JsonError, ValueError):  # Missing or malformed.
+            return None
+
+        self.entries[filepath] = {'stat': stat, 'pkgMeta': pkg_meta}
+        self.changed = True
+
+        return pkg_meta
+
+    def update(self, filepaths, dir_stat):
+        """Updates snapshot to contain only given metadata files
+        (of all package directories) and records components directory signature.
+
+        :param list filepaths:
+        :param list dir_stat: Directory signature taken before it was scanned.
+        """
+        if sorted(filepaths) != sorted(self.candidates):
+            self.candidates = sorted(filepaths)
+            self.changed = True
+
+        filepaths = set(filepaths)
+
+        for filepath in list(self.entries.keys()):
+            if filepath not in filepaths:
+                del self.entries[filepath]
+                self.changed = True
+
+        if dir_stat != self.dir_stat:
+            self.dir_stat = dir_stat
+            self.changed = True
@@ -0,0 +1,564 @@
+"""Exposes dependency solver finding a consistent set of package versions."""
+from .exceptions import ConflictError
+
+
+ROOT_TITLE = 'bower.json'
+
+
+class Clause(object):
+    """Disjunction of literals (signed variable numbers).
+
+    Kinds:
+
+    * `root` - project requires one of package versions,
+    * `dependency` - package version requires one of versions of another package,
+    * `single` - two versions of a package can't be installed both,
+    * `learned` - derived from a conflict.
+
+    """
+
+    __slots__ = ('lits', 'kind', 'origin', 'antecedents')
+
+    def __init__(self, lits, kind, origin=None, antecedents=None):
+        self.lits = lits
+        self.kind = kind
+        self.origin = origin
+        self.antecedents = antecedents or []
+
+
+class Solver(object):
+    """Conflict-driven clause learning solver choosing
+    a single version for every package required.
+
+    Every package version is a boolean variable, requirements
+    are clauses `-dependant | candidate_1 | ... | candidate_N`.
+    Dependencies of a version are requested from provider (and turned
+    into clauses) only when the version gets chosen.
+
+    Provider object is expected to implement:
+
+    * `get_candidates(name, target)` - version strings matching target, preferred first,
+    * `get_dependencies(name, version)` - (name, target) tuples.
+
+    """
+
+    def __init__(self, provider, minimize=True):
+        self.provider = provider
+        self.minimize = minimize
+
+        self._vars = [None]
+        self._var_ids = {}
+        self._package_vars = {}
+        self._candidates = {}
+
+        self._values = {}
+        self._levels = {}
+        self._reasons = {}
+        self._trail = []
+        self._trail_lims = []
+        self._qhead = 0
+        self._expand_head = 0
+        self._chosen = {}
+
+        self._watches = {}
+        self._requirements = []
+        self._unattached = []
+        self._expanded = set()
+
+    @property
+    def level(self):
+        return len(self._trail_lims)
+
+    def solve(self, requirements):
+        """Returns versions indexed by package names, satisfying
+        given root requirements and dependencies of chosen versions.
+
+        :param list requirements: (name, target) tuples.
+        :rtype: dict
+        :raises: ConflictError
+        """
+        for name, target in requirements:
+            conflict = self._attach(self._make_requirement(None, name, target))
+
+            if conflict is not None:
+                self._fail(conflict)
+
+        while True:
+            conflict = self._propagate() or self._expand()
+
+            if conflict is not None:
+                if self.level == 0:
+                    self._fail(conflict)
+
+                learned, backjump_level = self._analyse(conflict)
+                self._backtrack(backjump_level)
+                self._attach(learned)
+                continue
+
+            if self._qhead < len(self._trail):
+                # Expansion has propagated something.
+                continue
+
+            lit = self._decide()
+
+            if lit is None:
+                return self._get_solution(requirements)
+
+            self._trail_lims.append(len(self._trail))
+            self._assign(lit, None)
+
+    def _get_var(self, name, version):
+        key = (name, version)
+        var = self._var_ids.get(key)
+
+        if var is None:
+            var = self._var_ids[key] = len(self._vars)
+            self._vars.append(key)
+            self._package_vars.setdefault(name, []).append(var)
+
+        return var
+
+    def _get_candidates(self, name, target):
+        key = (name, target)
+        candidates = self._candidates.get(key)
+
+        if candidates is None:
+            candidates = self._candidates[key] = [
+                self._get_var(name, version) for version in self.provider.get_candidates(name, target)]
+
+        return candidates
+
+    def _make_requirement(self, dependant, name, target):
+        lits = list(self._get_candidates(name, target))
+
+        if dependant is None:
+            clause = Clause(lits, 'root', (None, name, target))
+
+        else:
+            lits.insert(0, -dependant)
+            clause = Clause(lits, 'dependency', (self._vars[dependant], name, target))
+
+        self._requirements.append(clause)
+        return clause
+
+    def _value(self, lit):
+        value = self._values.get(abs(lit))
+
+        if value is None or lit > 0:
+            return value
+
+        return not value
+
+    def _assign(self, lit, reason):
+        var = abs(lit)
+        self._values[var] = lit > 0
+        self._levels[var] = self.level
+        self._reasons[var] = reason
+        self._trail.append(lit)
+
+        if lit > 0:
+            self._chosen.setdefault(self._vars[lit][0], lit)
+
+    def _get_reason(self, var):
+        """Returns clause implied assignment of variable.
+
+        :param int var:
+        :rtype: Clause|None
+        """
+        reason = self._reasons.get(var)
+
+        if isinstance(reason, int):
+            # Another version of the package has been chosen.
+            return Clause([-var, -reason], 'single', self._vars[var][0])
+
+        return reason
+
+    def _backtrack(self, level):
+        if self.level <= level:
+            return
+
+        trail_lim = self._trail_lims[level]
+
+        for lit in self._trail[trail_lim:]:
+            var = abs(lit)
+            del self._values[var]
+            del self._levels[var]
+            del self._reasons[var]
+
+            if lit > 0 and self._chosen.get(self._vars[lit][0]) == lit:
+                del self._chosen[self._vars[lit][0]]
+
+        del self._trail[trail_lim:]
+        del self._trail_lims[level:]
+        self._qhead = min(self._qhead, len(self._trail))
+        self._expand_head = min(self._expand_head, len(self._trail))
+
+    def _watch(self, lit, clause):
+        self._watches.setdefault(lit, []).append(clause)
+
+    def _attach(self, clause):
+        """Starts watching clause. If it's unit or conflicting under
+        the current assignment, backtracks to the level it became such at
+        and assigns its literal or returns the clause as conflicting.
+
+        :param Clause clause:
+        :rtype: Clause|None
+        """
+        lits = clause.lits
+
+        if not lits:
+            return clause
+
+        for lit in lits:
+            if lit < 0 or self._value(lit) is not None:
+                continue
+
+            # Version has appeared after another one was chosen.
+            name = self._vars[lit][0]
+            chosen = self._chosen.get(name)
+
+            if chosen is not None:
+                self._attach(Clause([-lit, -chosen], 'single', name))
+
+        def sort_key(lit):
+            value = self._value(lit)
+            if value is False:
+                return 2, -self._levels[abs(lit)]
+            return (0 if value else 1), 0
+
+        lits.sort(key=sort_key)
+
+        if len(lits) > 1:
+            self._watch(lits[0], clause)
+            self._watch(lits[1], clause)
+
+        first = self._value(lits[0])
+
+        if len(lits) > 1 and self._value(lits[1]) is not False:
+            return None
+
+        second_level = self._levels[abs(lits[1])] if len(lits) > 1 else 0
+
+        if first is False:
+            self._backtrack(self._levels[abs(lits[0])])
+            return clause
+
+        if first is None or self._levels[abs(lits[0])] > second_level:
+            self._backtrack(second_level)
+            if self._value(lits[0]) is None:
+                self._assign(lits[0], clause)
+
+        return None
+
+    def _propagate(self):
+        """Propagates assignments made since the last call.
+        Returns conflicting clause if any.
+
+        :rtype: Clause|None
+        """
+        values = self._values
+
+        def get_value(lit):
+            value = values.get(lit if lit > 0 else -lit)
+            if value is None or lit > 0:
+                return value
+            return not value
+
+        while self._qhead < len(self._trail):
+            lit = self._trail[self._qhead]
+            self._qhead += 1
+
+            if lit > 0:
+                # Other versions of the package can't be chosen,
+                # reason clauses for those are made on demand.
+                for other in self._package_vars[self._vars[lit][0]]:
+                    if other == lit:
+                        continue
+
+                    value = values.get(other)
+
+                    if value is True:
+                        return Clause([-other, -lit], 'single', self._vars[lit][0])
+
+                    if value is None:
+                        self._assign(-other, lit)
+
+            false_lit = -lit
+            watchers = self._watches.get(false_lit)
+
+            if not watchers:
+                continue
+
+            self._watches[false_lit] = kept = []
+
+            for idx, clause in enumerate(watchers):
+                lits = clause.lits
+
+                # Make sure false literal is the second one.
+                if lits[0] == false_lit:
+                    lits[0], lits[1] = lits[1], lits[0]
+
+                if get_value(lits[0]) is True:
+                    kept.append(clause)
+                    continue
+
+                for pos in range(2, len(lits)):
+                    if get_value(lits[pos]) is not False:
+                        lits[1], lits[pos] = lits[pos], lits[1]
+                        self._watch(lits[1], clause)
+                        break
+
+                else:
+                    kept.append(clause)
+
+                    if get_value(lits[0]) is False:
+                        kept.extend(watchers[idx + 1:])
+                        return clause
+
+                    self._assign(lits[0], clause)
+
+        return None
+
+    def _expand(self):
+        """Adds dependency clauses for chosen versions
+        which have not been expanded yet.
+
+        :rtype: Clause|None
+        """
+        while self._expand_head < len(self._trail):
+            lit = self._trail[self._expand_head]
+            self._expand_head += 1
+
+            if lit < 0 or lit in self._expanded:
+                continue
+
+            self._expanded.add(lit)
+            name, version = self._vars[lit]
+
+            for dep_name, dep_target in self.provider.get_dependencies(name, version):
+                self._unattached.append(self._make_requirement(lit, dep_name, dep_target))
+
+        while self._unattached:
+            conflict = self._attach(self._unattached.pop(0))
+
+            if conflict is not None:
+                return conflict
+
+        return None
+
+    def _decide(self):
+        """Returns a literal to decide on: preferred candidate
+        of the first requirement not satisfied yet.
+
+        :rtype: int|None
+        """
+        for clause in self._requirements:
+            dependant, name, target = clause.origin
+
+            # Either satisfied or not required.
+            if name in self._chosen or (
+                    dependant is not None and self._values.get(self._var_ids[dependant]) is not True):
+                continue
+
+            for var in self._candidates[(name, target)]:
+                if self._value(var) is None:
+                    return var
+
+        return None
+
+    def _analyse(self, conflict):
+        """Derives a clause from conflict (first unique implication point).
+        Returns the clause and a level to backjump to.
+
+        :param Clause conflict:
+        :rtype: tuple
+        """
+        level = self.level
+        seen = set()
+        learned = []
+        antecedents = [conflict]
+        counter = 0
+        index = len(self._trail) - 1
+        pivot = None
+        clause = conflict
+
+        while True:
+            for lit in clause.lits:
+                var = abs(lit)
+
+                if lit == pivot or var in seen:
+                    continue
+
+                seen.add(var)
+                lit_level = self._levels[var]
+
+                if lit_level == level:
+                    counter += 1
+
+                elif lit_level > 0:
+                    learned.append(lit)
+
+                else:
+                    antecedents.append(self._get_reason(var))
+
+            while abs(self._trail[index]) not in seen:
+                index -= 1
+
+            pivot = self._trail[index]
+            index -= 1
+            counter -= 1
+
+            if counter == 0:
+                break
+
+            clause = self._get_reason(abs(pivot))
+            antecedents.append(clause)
+
+        learned.insert(0, -pivot)
+        backjump_level = max([self._levels[abs(lit)] for lit in learned[1:]] or [0])
+
+        return Clause(learned, 'learned', antecedents=antecedents), backjump_level
+
+    def _get_solution(self, requirements):
+        chosen = dict(self._vars[var] for var in self._chosen.values())
+
+        # Leave out versions not reachable from requirements.
+        solution = {}
+        pending = [name for name, _ in requirements]
+
+        while pending:
+            name = pending.pop()
+
+            if name in solution:
+                continue
+
+            version = solution[name] = chosen[name]
+            pending.extend(dep_name for dep_name, _ in self.provider.get_dependencies(name, version))
+
+        return solution
+
+    def _get_core(self, conflict):
+        """Returns requirement clauses a conflict at root level is derived from.
+
+        :param Clause conflict:
+        :rtype: list
+        """
+        core = []
+        visited = set()
+        pending = [conflict]
+
+        while pending:
+            clause = pending.pop()
+
+            if clause is None or id(clause) in visited:
+                continue
+
+            visited.add(id(clause))
+
+            if clause.kind in ('root', 'dependency'):
+                core.append(clause)
+
+            pending.extend(clause.antecedents)
+            pending.extend(self._get_reason(abs(lit)) for lit in clause.lits)
+
+        return core
+
+    def _fail(self, conflict):
+        core = self._get_core(conflict)
+
+        if self.minimize:
+            core = minimize_core(core, self._candidates, self._vars)
+
+        raise ConflictError('Unable to find suitable versions:\n%s' % '\n'.join(
+            '  %s' % line for line in explain(core)))
+
+
+class CoreProvider(object):
+    """Provider supplying only requirements from a given set of clauses."""
+
+    def __init__(self, clauses, candidates, variables):
+        self._candidates = candidates
+        self._vars = variables
+        self._dependencies = {}
+
+        for clause in clauses:
+            dependant = clause.origin[0]
+
+            if dependant is not None:
+                self._dependencies.setdefault(dependant, []).append(clause.origin[1:])
+
+    def get_candidates(self, name, target):
+        return [self._vars[var][1] for var in self._candidates[(name, target)]]
+
+    def get_dependencies(self, name, version):
+        return self._dependencies.get((name, version), [])
+
+
+def is_satisfiable(clauses, candidates, variables):
+    """Returns flag whether given requirement clauses are satisfiable.
+
+    :param list clauses:
+    :param dict candidates: Candidate variables indexed by (name, target).
+    :param list variables: (name, version) tuples indexed by variables.
+    :rtype: bool
+    """
+    solver = Solver(CoreProvider(clauses, candidates, variables), minimize=False)
+
+    try:
+        solver.solve([clause.origin[1:] for clause in clauses if clause.origin[0] is None])
+
+    except ConflictError:
+        return False
+
+    return True
+
+
+def minimize_core(core, candidates, variables):
+    """Returns an irreducible subset of unsatisfiable requirement clauses:
+    dropping any of them makes the rest satisfiable.
+
+    :param list core:
+    :param dict candidates:
+    :param list variables:
+    :rtype: list
+    """
+    core = list(core)
+
+    for clause in list(core):
+        subset = [item for item in core if item is not clause]
+
+        if not is_satisfiable(subset, candidates, variables):
+            core = subset
+
+    return core
+
+
+def explain(core):
+    """Returns human readable lines describing requirements in conflict.
+
+    :param list core:
+    :rtype: list
+    """
+    grouped = {}
+
+    for clause in core:
+        dependant, name, target = clause.origin
+        key = (dependant[0] if dependant else None, name, target)
+        grouped.setdefault(key, []).append(dependant[1] if dependant else None)
+
+    lines = []
+
+    for (dependant, name, target), versions in sorted(grouped.items(), key=lambda item: (item[0][0] or '', item[0][1:])):
+        if dependant is None:
+            title = ROOT_TITLE
+        else:
+            title = '%s#%s' % (dependant, ', '.join(sorted(versions)))
+
+        if target in ('', '*'):
+            line = '%s requires %s' % (title, name)
+        else:
+            line = '%s requires %s#%s' % (title, name, target)
+
+        lines.append(line)
+
+    return lines
@@ -0,0 +1,549 @@
+"""Exposes content-addressed package store shared across projects."""
+import json
+import os
+import shutil
+import tarfile
+import tempfile
+from hashlib import sha1, sha256
+from uuid import uuid4
+from os.path import join, exists, isdir, dirname, normpath, islink
+
+from .exceptions import StoreError
+from .settings import LOGGER
+from .tracing import span, CATEGORY_EXTRACT
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def clone_file(src, dst):
+    """Makes a file available under another path without copying
+    data where filesystem allows. Tries hardlink, then reflink,
+    then falls back to plain copying.
+
+    Returns method used.
+
+    :param str src:
+    :param str dst:
+    :rtype: str
+    """
+    try:
+        os.link(src, dst)
+        return 'hardlink'
+
+    except (OSError, AttributeError):
+        pass
+
+    if reflink(src, dst):
+        return 'reflink'
+
+    shutil.copy2(src, dst)
+    return 'copy'
+
+
+def reflink(src, dst):
+    """Tries to make a copy-on-write clone of a file (Linux FICLONE).
+
+    :param str src:
+    :param str dst:
+    :rtype: bool
+    """
+    try:
+        import fcntl
+
+    except ImportError:
+        return False
+
+    ficlone = 0x40049409
+
+    try:
+        with open(src, 'rb') as f_src:
+            with open(dst, 'wb') as f_dst:
+                fcntl.ioctl(f_dst.fileno(), ficlone, f_src.fileno())
+
+    except (IOError, OSError):
+        if exists(dst):
+            os.remove(dst)
+        return False
+
+    shutil.copystat(src, dst)
+    return True
+
+
+def clone_tree(src, dst):
+    """Replicates directory tree cloning files with `clone_file`.
+
+    :param str src:
+    :param str dst:
+    """
+    for current_dir, dirs, files in os.walk(src):
+        target_dir = join(dst, os.path.relpath(current_dir, src))
+
+        if not isdir(target_dir):
+            os.makedirs(target_dir)
+
+        for filename in files:
+            filepath = join(current_dir, filename)
+
+            if islink(filepath):
+                os.symlink(os.readlink(filepath), join(target_dir, filename))
+                continue
+
+            clone_file(filepath, join(target_dir, filename))
+
+        for name in dirs:
+            dirpath = join(current_dir, name)
+            if islink(dirpath):
+                os.symlink(os.readlink(dirpath), join(target_dir, name))
+
+
+class PackageStore(object):
+    """Content-addressed store of package archives.
+
+    Every archive is stored (and extracted) once under its SHA-256 digest,
+    an index maps (source, version) pairs to digests. Projects get package
+    files linked from the store instead of downloading them again.
+
+    Layout::
+
+        index/<ab>/<sha1 of source#version>.json
+        archives/<ab>/<sha256>.tar.gz
+        extracted/<sha256>/
+        tmp/
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.path_tmp = join(path, 'tmp')
+
+    @classmethod
+    def from_config(cls, config):
+        """Returns store instance for packages storage from bowerrc.
+
+        :param dict config:
+        :rtype: PackageStore
+        """
+        return cls(config['storage']['packages'])
+
+    def _get_index_path(self, source, version):
+        hashed = sha1(('%s#%s' % (source, version)).encode('utf-8')).hexdigest()
+        return join(self.path, 'index', hashed[:2], hashed + '.json')
+
+    def get_archive_path(self, digest):
+        return join(self.path, 'archives', digest[:2], digest + '.tar.gz')
+
+    def get_extracted_path(self, digest):
+        return join(self.path, 'extracted', digest)
+
+    def make_tmp(self, **kwargs):
+        """Creates and returns temporary directory within store
+        (to allow atomic renames into store).
+
+        :rtype: str
+        """
+        make_dirs(self.path_tmp)
+        return tempfile.mkdtemp(dir=self.path_tmp, **kwargs)
+
+    def get_digest(self, source, version):
+        """Returns archive digest for a given source and version if stored.
+
+        :param str source:
+        :param str version: Resolved version, tag or commit.
+        :rtype: str|None
+        """
+        try:
+            with open(self._get_index_path(source, version)) as f:
+                digest = json.load(f)['digest']
+
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+        if not exists(self.get_archive_path(digest)):
+            return None
+
+        return digest
+
+    def _write_index(self, source, version, digest):
+        index_path = self._get_index_path(source, version)
+        self._put_file(index_path, json.dumps({'source': source, 'version': version, 'digest': digest}))
+
+    def _put_file(self, filepath, contents):
+        dirpath = dirname(filepath)
+        make_dirs(dirpath)
+
+        fd, tmp_path = tempfile.mkstemp(dir=dirpath, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            f.write(contents)
+
+        os.rename(tmp_path, filepath)
+
+    def _move_into(self, tmp_path, filepath):
+        """Atomically moves a file or directory into store.
+        Discards it if the same content is already there.
+
+        """
+        dirpath = dirname(filepath)
+        make_dirs(dirpath)
+
+        if exists(filepath):
+            remove(tmp_path)
+            return
+
+        try:
+            os.rename(tmp_path, filepath)
+
+        except OSError:
+            # Someone has just put the same content.
+            if not exists(filepath):
+                raise
+            remove(tmp_path)
+
+    def add_archive(self, source, version, filepath):
+        """Puts archive file into store. Returns its digest.
+
+        :param str source:
+        :param str version:
+        :param str filepath:
+        :rtype: str
+        """
+        hasher = sha256()
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+
+        tmp_dir = self.make_tmp()
+        tmp_path = join(tmp_dir, 'archive')
+        shutil.copyfile(filepath, tmp_path)
+        self._move_into(tmp_path, self.get_archive_path(digest))
+        remove(tmp_dir)
+
+        self._write_index(source, version, digest)
+        return digest
+
+    def add_archived(self, source, version, archive):
+        """Puts archive made by a given function into store
+        unless already stored. Returns its digest.
+
+        :param str source:
+        :param str version:
+        :param archive: Function writing archive into a given file.
+        :rtype: str
+        """
+        digest = self.get_digest(source, version)
+        if digest:
+            return digest
+
+        tmp_dir = self.make_tmp()
+
+        try:
+            filepath = join(tmp_dir, 'archive')
+
+            with span('archive', CATEGORY_EXTRACT, source=source, version=version):
+                archive(filepath)
+
+            return self.add_archive(source, version, filepath)
+
+        finally:
+            remove(tmp_dir)
+
+    def download(self, source, version, url, client):
+        """Downloads archive into store unless already stored.
+        Returns its digest.
+
+        Archive is streamed: it is extracted and hashed while being
+        downloaded, so memory consumption doesn't depend on archive size.
+
+        :param str source:
+        :param str version:
+        :param str url:
+        :param HttpClient client:
+        :rtype: str
+        """
+        digest = self.get_digest(source, version)
+        if digest:
+            return digest
+
+        LOGGER.debug('Downloading %s ...', url)
+
+        tmp_dir = self.make_tmp()
+        archive_path = join(tmp_dir, 'archive')
+        contents_path = join(tmp_dir, 'contents')
+
+        try:
+            response = client.get(url, stream=True)
+
+            try:
+                if response.status_code != 200:
+                    raise StoreError('Unable to download %s: HTTP %s' % (url, response.status_code))
+
+                response.raw.decode_content = True
+
+                with span('download', CATEGORY_EXTRACT, url=url), open(archive_path, 'wb') as f:
+                    reader = HashingReader(response.raw, tee=f)
+
+                    with tarfile.open(fileobj=reader, mode='r|*') as archive:
+                        extract_tar(archive, contents_path)
+
+                    reader.drain()
+
+            finally:
+                # Frees a slot of concurrent requests limit.
+                response.close()
+
+            digest = reader.hexdigest()
+
+            self._move_into(archive_path, self.get_archive_path(digest))
+            self._move_into(contents_path, self.get_extracted_path(digest))
+            self._write_index(source, version, digest)
+
+            return digest
+
+        finally:
+            remove(tmp_dir)
+
+    def extract(self, digest):
+        """Extracts stored archive (once) and returns a path to its contents.
+
+        :param str digest:
+        :rtype: str
+        """
+        extracted_path = self.get_extracted_path(digest)
+
+        if isdir(extracted_path):
+            return extracted_path
+
+        tmp_dir = self.make_tmp()
+        tmp_path = join(tmp_dir, 'contents')
+
+        try:
+            with span('extract', CATEGORY_EXTRACT, digest=digest):
+                with tarfile.open(self.get_archive_path(digest)) as archive:
+                    extract_tar(archive, tmp_path)
+
+            self._move_into(tmp_path, extracted_path)
+
+        finally:
+            remove(tmp_dir)
+
+        return extracted_path
+
+    def link_into(self, digest, destination):
+        """Makes package contents available under a given destination
+        path linking them from store where possible.
+
+        :param str digest:
+        :param str destination:
+        """
+        clone_tree(self.extract(digest), destination)
+
+    def install(self, source, version, url, destination, client, staging_root=None, digest_expected=None,
+                archive=None, prepare=None):
+        """Downloads (if not stored yet) package archive and puts
+        its contents under a given destination. Returns archive digest.
+
+        Contents are staged in a temporary directory first and then
+        swapped in, so that destination never contains partial data.
+
+        :param str source:
+        :param str version:
+        :param str url:
+        :param str destination:
+        :param HttpClient client:
+        :param str staging_root: Directory to stage contents in (e.g. `tmp` from bowerrc).
+        :param str digest_expected: Archive digest to verify against.
+        :param archive: Function writing archive into a given file, used instead of URL
+            for hosts without tarballs.
+        :param prepare: Function called with staged contents path before they are swapped in
+            (e.g. to write metadata files).
+        :rtype: str
+        :raises: StoreError
+        """
+        if archive is None:
+            digest = self.download(source, version, url, client)
+        else:
+            digest = self.add_archived(source, version, archive)
+
+        if digest_expected and digest != digest_expected:
+            raise StoreError('Integrity check failed for %s#%s: expected %s, got %s' % (
+                source, version, digest_expected, digest))
+
+        staging = make_staging(destination, staging_root)
+
+        try:
+            staged = join(staging, 'package')
+            self.link_into(digest, staged)
+
+            if prepare is not None:
+                prepare(staged)
+
+            swap_in(staged, destination)
+
+        finally:
+            remove(staging)
+
+        return digest
+
+
+class HashingReader(object):
+    """File-like object wrapper computing SHA-256 of data read through it.
+    Optionally writes read data into another file.
+
+    """
+
+    def __init__(self, fileobj, tee=None):
+        self.fileobj = fileobj
+        self.tee = tee
+        self.size = 0
+        self._hasher = sha256()
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+
+        if data:
+            self._hasher.update(data)
+            self.size += len(data)
+
+            if self.tee is not None:
+                self.tee.write(data)
+
+        return data
+
+    def drain(self):
+        """Reads the rest of data (e.g. trailing padding not needed by consumer)."""
+        while self.read(CHUNK_SIZE):
+            pass
+
+    def hexdigest(self):
+        return self._hasher.hexdigest()
+
+
+def make_staging(destination, staging_root=None):
+    """Creates a temporary directory to stage destination contents in.
+
+    Staging root is used only if it resides on the same device
+    as destination (otherwise renames won't be atomic), if not
+    staging directory is created next to destination.
+
+    :param str destination:
+    :param str staging_root:
+    :rtype: str
+    """
+    parent = dirname(destination)
+    make_dirs(parent)
+
+    if staging_root:
+        try:
+            make_dirs(staging_root)
+
+            if os.stat(staging_root).st_dev == os.stat(parent).st_dev:
+                return tempfile.mkdtemp(dir=staging_root)
+
+        except OSError:
+            pass
+
+    return tempfile.mkdtemp(dir=parent, prefix='.staging-')
+
+
+def swap_in(staged, destination):
+    """Replaces destination with staged directory using renames.
+
+    :param str staged:
+    :param str destination:
+    """
+    replaced = None
+
+    if exists(destination) or islink(destination):
+        replaced = join(dirname(destination), '.replaced-%s' % uuid4().hex)
+        os.rename(destination, replaced)
+
+    os.rename(staged, destination)
+
+    if replaced:
+        remove(replaced)
+
+
+def make_dirs(path):
+    """Creates a directory (along with parents) unless it exists.
+    Safe to be called concurrently for the same path.
+
+    :param str path:
+    """
+    try:
+        os.makedirs(path)
+
+    except OSError:
+        if not isdir(path):
+            raise
+
+
+def remove(path):
+    """Removes a file or a directory tree if exists.
+
+    :param str path:
+    """
+    if isdir(path) and not islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+
+    elif exists(path) or islink(path):
+        os.remove(path)
+
+
+def get_member_path(name):
+    """Returns archive member path without top level directory
+    (tarballs from hosts usually wrap contents into one)
+    or None if path is not safe to extract.
+
+    :param str name:
+    :rtype: str|None
+    """
+    parts = normpath(name).replace('\\', '/').lstrip('/').split('/')
+
+    if '..' in parts or len(parts) < 2:
+        return None
+
+    return '/'.join(parts[1:])
+
+
+def extract_tar(archive, destination):
+    """Extracts tar archive into destination stripping
+    top level directory.
+
+    :param tarfile.TarFile archive:
+    :param str destination:
+    """
+    if not isdir(destination):
+        os.makedirs(destination)
+
+    for member in archive:
+        member_path = get_member_path(member.name)
+
+        if member_path is None:
+            continue
+
+        target = join(destination, member_path)
+
+        if member.isdir():
+            if not isdir(target):
+                os.makedirs(target)
+            continue
+
+        target_dir = dirname(target)
+        if not isdir(target_dir):
+            os.makedirs(target_dir)
+
+        if member.issym():
+            link = member.linkname.replace('\\', '/')
+            if not link.startswith('/') and '..' not in link.split('/'):
+                os.symlink(member.linkname, target)
+            continue
+
+        if not member.isfile():
+            continue
+
+        source = archive.extractfile(member)
+        with open(target, 'wb') as f:
+            shutil.copyfileobj(source, f, CHUNK_SIZE)
+
+        os.chmod(target, member.mode & 0o755 | 0o644)
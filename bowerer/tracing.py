@@ -0,0 +1,227 @@
+"""Exposes tools to time phases, packages processing and requests.
+
+Spans are only recorded while tracing is started (e.g. with `--profile`),
+otherwise instrumented code pays for a function call and a global lookup.
+
+"""
+import json
+import threading
+from functools import wraps
+from timeit import default_timer as clock
+
+
+CATEGORY_PHASE = 'phase'
+CATEGORY_PACKAGE = 'package'
+CATEGORY_HTTP = 'http'
+CATEGORY_EXTRACT = 'extract'
+
+_TRACER = None
+
+
+class Tracer(object):
+    """Collects timed spans, renders them as Chrome trace events
+    (to be loaded into chrome://tracing or Perfetto) and as a summary.
+
+    """
+
+    def __init__(self):
+        self.started = clock()
+        self.spans = []
+        self.threads = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, category, started, finished, args):
+        """Records a span.
+
+        :param str name:
+        :param str category:
+        :param float started: Clock value span started at.
+        :param float finished: Clock value span finished at.
+        :param dict args: Additional data (e.g. `package` name, `url`).
+        """
+        thread = threading.current_thread()
+
+        with self._lock:
+            self.threads[thread.ident] = thread.name
+            self.spans.append((name, category, started - self.started, finished - started, thread.ident, args))
+
+    def get_events(self):
+        """Returns Chrome trace events: complete events for spans
+        and metadata events naming threads.
+
+        :rtype: list
+        """
+        events = [
+            {'ph': 'M', 'pid': 1, 'tid': tid, 'name': 'thread_name', 'args': {'name': name}}
+            for tid, name in sorted(self.threads.items())]
+
+        events.extend({
+            'ph': 'X',
+            'pid': 1,
+            'tid': tid,
+            'name': name,
+            'cat': category,
+            'ts': round(started * 1000000, 3),
+            'dur': round(spent * 1000000, 3),
+            'args': args,
+        } for name, category, started, spent, tid, args in self.spans)
+
+        return events
+
+    def write(self, filepath):
+        """Writes Chrome trace JSON into a given file.
+
+        :param str filepath:
+        """
+        with open(filepath, 'w') as f:
+            json.dump({'traceEvents': self.get_events(), 'displayTimeUnit': 'ms'}, f)
+
+    def get_summary(self, top=10):
+        """Returns a text table with phases timings, along with
+        top slowest packages and requests.
+
+        :param int top:
+        :rtype: str
+        """
+        phases = []
+        packages = {}
+        requests = []
+
+        for name, category, started, spent, _, args in sorted(self.spans, key=lambda span: span[2]):
+            if category == CATEGORY_PHASE:
+                phases.append((spent, name))
+
+            elif category == CATEGORY_HTTP:
+                requests.append((spent, '%s %s %s' % (name, args.get('status') or '-', args.get('url'))))
+
+            package = args.get('package')
+
+            if package:
+                spent_total, steps = packages.get(package) or (0, [])
+
+                if name not in steps:
+                    steps.append(name)
+
+                packages[package] = (spent_total + spent, steps)
+
+        lines = []
+
+        def add_section(title, rows):
+            if not rows:
+                return
+
+            lines.append('%s:' % title)
+            lines.extend('%10.2f ms  %s' % (spent * 1000, name) for spent, name in rows)
+            lines.append('')
+
+        add_section('Phases', phases)
+        add_section('Slowest packages', sorted((
+            (spent, '%s (%s)' % (package, ', '.join(steps)))
+            for package, (spent, steps) in packages.items()), reverse=True)[:top])
+        add_section('Slowest requests', sorted(requests, reverse=True)[:top])
+
+        return '\n'.join(lines)
+
+
+class Span(object):
+    """Context manager timing a block of code."""
+
+    __slots__ = ('tracer', 'name', 'category', 'args', 'started')
+
+    def __init__(self, tracer, name, category, args):
+        self.tracer = tracer
+        self.name = name
+        self.category = category
+        self.args = args
+        self.started = None
+
+    def set(self, **args):
+        """Adds data known only after block start (e.g. response status)."""
+        self.args.update(args)
+
+    def __enter__(self):
+        self.started = clock()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is not None:
+            self.args['error'] = exc_type.__name__
+
+        self.tracer.add(self.name, self.category, self.started, clock(), self.args)
+
+
+class NullSpan(object):
+    """Span used while tracing is not started: does nothing."""
+
+    __slots__ = ()
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+_NULL_SPAN = NullSpan()
+
+
+def start():
+    """Starts tracing. Returns tracer collecting spans.
+
+    :rtype: Tracer
+    """
+    global _TRACER
+    _TRACER = Tracer()
+    return _TRACER
+
+
+def stop():
+    """Stops tracing. Returns tracer collected spans or None if not started.
+
+    :rtype: Tracer|None
+    """
+    global _TRACER
+    tracer, _TRACER = _TRACER, None
+    return tracer
+
+
+def span(name, category=CATEGORY_PHASE, **args):
+    """Returns context manager timing a block of code.
+
+    :param str name:
+    :param str category:
+    :param args: Additional data (e.g. `package` name, `url`).
+    :rtype: Span|NullSpan
+    """
+    tracer = _TRACER
+
+    if tracer is None:
+        return _NULL_SPAN
+
+    return Span(tracer, name, category, args)
+
+
+def traced(name, category=CATEGORY_PHASE):
+    """Decorator timing calls of a function.
+
+    :param str name:
+    :param str category:
+    """
+    def decorator(func):
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _TRACER
+
+            if tracer is None:
+                return func(*args, **kwargs)
+
+            with Span(tracer, name, category, {}):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -1,31 +1,91 @@
+import os
 import re
 import json
-from os.path import basename, isdir, abspath, join, exists
+import tempfile
+import threading
+from collections import OrderedDict
+from os.path import basename, isdir, islink, abspath, join, exists, dirname
 
-import requests
 from six import string_types
+from six.moves import intern
 
 from .exceptions import EndpointError, JsonError
+from .net import get_client
+from .nodes import PackageEndpoint
 from .settings import LOGGER
 
+try:
+    from os import scandir
+except ImportError:  # Py < 3.5
+    scandir = None
 
-def get_json(url, allow_empty=False):
+
+def get_json(url, allow_empty=False, config=None):
     """Returns JSON as a dictionary from a given URL.
 
     :param str url:
     :param bool allow_empty:
+    :param dict config: Configuration to setup HTTP client from.
     :rtype: dict
     """
-    try:
-        response = requests.get(url)
-        json = response.json()
+    return get_client(config).get_json(url, allow_empty=allow_empty)
 
-    except ValueError:
-        if not allow_empty:
-            raise
-        json = {}
 
-    return json
+def scan_dirs(path):
+    """Returns (name, is_link) tuples for immediate subdirectories
+    of a given directory (including links to directories).
+    Returns an empty list if directory doesn't exist.
+
+    :param str path:
+    :rtype: list
+    """
+    if not isdir(path):
+        return []
+
+    if scandir is None:
+        result = []
+        for name in os.listdir(path):
+            fullpath = join(path, name)
+            if isdir(fullpath):
+                result.append((name, islink(fullpath)))
+        return result
+
+    return [(entry.name, entry.is_symlink()) for entry in scandir(path) if entry.is_dir()]
+
+
+class LruCache(object):
+    """Thread-safe bounded mapping discarding least recently used items."""
+
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+
+            except KeyError:
+                return default
+
+            self._items[key] = value
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+
+            if len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
 
 
 def get_user_agent(faked=False):
@@ -50,11 +110,29 @@ class Endpoint(object):
 
     RE_ENDPOINT = re.compile('^(?:([\w\-]|(?:[\w\.\-]+[\w\-])?)=)?([^\|#]+)(?:#(.*))?$', re.U)
     RE_SOURCE = re.compile(r'[\/\\@]', re.U)
+    RE_SOURCE_CHARS = frozenset('/\\@')
+
+    # Parsed endpoints indexed by endpoint strings and JSON key-value pairs.
+    _parsed = LruCache(8192)
 
     @classmethod
     def is_wildcard(cls, val):
         return not val or val == '*' or val == 'latest'
 
+    @classmethod
+    def get_key(cls, decomposed_dict):
+        """Returns hashable identity of decomposed endpoint
+        to be used for fast membership checks.
+
+        :param dict decomposed_dict:
+        :rtype: tuple
+        """
+        if isinstance(decomposed_dict, PackageEndpoint):
+            return decomposed_dict.key
+
+        get = decomposed_dict.get
+        return get('name') or '', get('source') or '', get('target') or ''
+
     @classmethod
     def compose(cls, decomposed_dict):
         """Composes endpoint string from dict.
@@ -82,12 +160,38 @@ class Endpoint(object):
         return composed
 
     @classmethod
-    def decompose(cls, endpoint):
-        """Decomposed endpoint string into dict.
+    def decompose(cls, endpoint, endpoint_cls=PackageEndpoint):
+        """Decomposed endpoint string into dict-like endpoint.
 
         :param str endpoint:
-        :rtype: dict
+        :param type endpoint_cls: PackageEndpoint or its subclass.
+        :rtype: PackageEndpoint
+        :raises: EndpointError
         """
+        parsed = cls._parsed.get(endpoint)
+
+        if parsed is None:
+            parsed = cls._parse(endpoint)
+            cls._parsed.set(endpoint, parsed)
+
+        return endpoint_cls(*parsed)
+
+    @classmethod
+    def _parse(cls, endpoint):
+        """Returns (name, source, target) tuple parsed from endpoint string.
+
+        :param str endpoint:
+        :rtype: tuple
+        :raises: EndpointError
+        """
+        if '=' not in endpoint and '|' not in endpoint and '\n' not in endpoint:
+            # Fast path for unnamed `<source>#<target>` forms.
+            source, _, target = endpoint.partition('#')
+
+            if source:
+                target = target.strip()
+                return '', intern(source.strip()), '*' if cls.is_wildcard(target) else target
+
         match = cls.RE_ENDPOINT.match(endpoint)
 
         if not match:
@@ -95,19 +199,82 @@ class Endpoint(object):
 
         target = (match.group(3) or '').strip()
 
-        return {
-            'name': (match.group(1) or '').strip(),
-            'source': (match.group(2) or '').strip(),
-            'target': '*' if cls.is_wildcard(target) else target
-        }
+        return (
+            intern((match.group(1) or '').strip()),
+            intern((match.group(2) or '').strip()),
+            '*' if cls.is_wildcard(target) else target)
 
     @classmethod
-    def decompose_from_json(cls, key, val):
-        """Decomposes endpoint described as JSON key-value pair into dict
+    def is_name(cls, val):
+        """Returns flag whether a string is a valid endpoint name
+        (checked without regular expressions).
+
+        :param str val:
+        :rtype: bool
+        """
+        if not val or val[-1] == '.':
+            return False
+
+        chars = val.replace('-', '').replace('_', '').replace('.', '')
+        return not chars or chars.isalnum()
+
+    @classmethod
+    def decompose_from_json(cls, key, val, endpoint_cls=PackageEndpoint):
+        """Decomposes endpoint described as JSON key-value pair into dict-like endpoint.
 
         :param str key:
         :param str val:
-        :rtype: dict
+        :param type endpoint_cls: PackageEndpoint or its subclass.
+        :rtype: PackageEndpoint
+        :raises: EndpointError
+        """
+        cache_key = (key, val)
+        parsed = cls._parsed.get(cache_key)
+
+        if parsed is None:
+            parsed = cls._parse_json(key, val)
+            cls._parsed.set(cache_key, parsed)
+
+        return endpoint_cls(*parsed)
+
+    @classmethod
+    def decompose_many(cls, dependencies, endpoint_cls=PackageEndpoint):
+        """Decomposes endpoints described in a mapping (as in bower.json
+        `dependencies`) into a list of dict-like endpoints.
+
+        :param dict dependencies:
+        :param type endpoint_cls: PackageEndpoint or its subclass.
+        :rtype: list
+        :raises: EndpointError
+        """
+        if not dependencies:
+            return []
+
+        get_parsed = cls._parsed.get
+        set_parsed = cls._parsed.set
+        parse = cls._parse_json
+
+        decomposed = []
+
+        for cache_key in dependencies.items():
+            parsed = get_parsed(cache_key)
+
+            if parsed is None:
+                parsed = parse(*cache_key)
+                set_parsed(cache_key, parsed)
+
+            decomposed.append(endpoint_cls(*parsed))
+
+        return decomposed
+
+    @classmethod
+    def _parse_json(cls, key, val):
+        """Returns (name, source, target) tuple parsed from JSON key-value pair.
+
+        :param str key:
+        :param str val:
+        :rtype: tuple
+        :raises: EndpointError
         """
         key = (key or '').strip()
         val = (val or '').strip()
@@ -115,6 +282,11 @@ class Endpoint(object):
         if not key:
             raise EndpointError('The key must be specified')
 
+        if '#' not in val and '\n' not in val and not cls.RE_SOURCE_CHARS.intersection(val) and cls.is_name(key):
+            # Fast path for the most common `"<name>": "<range>"` form.
+            key = intern(key)
+            return key, key, '*' if cls.is_wildcard(val) else val
+
         endpoint = '%s=' % key
         split = [item.strip() for item in val.split('#')]
 
@@ -130,7 +302,7 @@ class Endpoint(object):
             # Otherwise use the key as the source
             endpoint += key + '#' + split[0]
 
-        return cls.decompose(endpoint)
+        return cls._parse(endpoint)
 
     @classmethod
     def compose_to_json(cls, decomposed_dict):
@@ -284,3 +456,23 @@ def read_json(path, dummy_json=None):
         is_dummy = True
 
     return contents, deprecated, is_dummy
+
+
+def write_json(filepath, contents):
+    """Writes JSON into a given file atomically.
+
+    :param str filepath:
+    :param dict contents:
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=dirname(filepath) or '.', suffix='.tmp')
+
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(contents, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+        os.rename(tmp_path, filepath)
+
+    except Exception:
+        os.remove(tmp_path)
+        raise
@@ -0,0 +1,130 @@
+"""Exposes cached version and version range parsing and matching.
+
+`semantic_version` is imported on first parsing, so that
+commands not dealing with versions start faster.
+
+"""
+from .utils import Endpoint, LruCache
+
+
+CACHE_SIZE = 4096
+
+_NOT_SET = object()
+
+_VERSIONS = LruCache(CACHE_SIZE)
+_SPECS = LruCache(CACHE_SIZE)
+_MATCHES = LruCache(CACHE_SIZE * 4)
+
+
+def get_version(version_str):
+    """Returns parsed version (cached) or None if it's not a valid one.
+
+    :param str version_str:
+    :rtype: Version|None
+    """
+    version = _VERSIONS.get(version_str, _NOT_SET)
+
+    if version is _NOT_SET:
+        from semantic_version import Version
+
+        try:
+            version = Version.coerce(version_str.lstrip('v='))
+
+        except (ValueError, AttributeError):
+            version = None
+
+        _VERSIONS.set(version_str, version)
+
+    return version
+
+
+def get_spec(range_str):
+    """Returns compiled version range (cached) or None if it's not a valid one.
+    Ranges are treated as in node-semver used by Bower.
+
+    :param str range_str:
+    :rtype: Spec|None
+    """
+    spec = _SPECS.get(range_str, _NOT_SET)
+
+    if spec is _NOT_SET:
+        spec = None
+
+        for spec_cls in get_spec_classes():
+            try:
+                spec = spec_cls(range_str)
+                break
+
+            except ValueError:
+                pass
+
+        _SPECS.set(range_str, spec)
+
+    return spec
+
+
+def get_spec_classes():
+    """Returns version range classes to try, in priority order.
+
+    :rtype: list
+    """
+    import semantic_version
+
+    # NpmSpec is available since semantic_version 2.7.
+    return [spec_cls for spec_cls in (
+        getattr(semantic_version, 'NpmSpec', None), semantic_version.Spec) if spec_cls is not None]
+
+
+def satisfies(version_str, range_str):
+    """Returns flag whether version satisfies range.
+
+    :param str version_str:
+    :param str range_str:
+    :rtype: bool
+    """
+    if Endpoint.is_wildcard(range_str):
+        return True
+
+    key = (version_str, range_str)
+    matched = _MATCHES.get(key)
+
+    if matched is None:
+        version = get_version(version_str)
+        spec = get_spec(range_str)
+        matched = bool(version is not None and spec is not None and spec.match(version))
+        _MATCHES.set(key, matched)
+
+    return matched
+
+
+def select(versions, range_str):
+    """Returns the highest of versions satisfying range or None.
+
+    :param versions: Version objects.
+    :param str range_str:
+    :rtype: Version|None
+    """
+    if Endpoint.is_wildcard(range_str):
+        return max(versions) if versions else None
+
+    spec = get_spec(range_str)
+
+    if spec is None:
+        return None
+
+    return spec.select(versions)
+
+
+def get_sort_key(version_str):
+    """Returns a key to sort version strings with.
+    Invalid versions go before valid ones.
+
+    :param str version_str:
+    :rtype: tuple
+    """
+    version = get_version(version_str)
+
+    if version is None:
+        return 0, version_str
+
+    return 1, version
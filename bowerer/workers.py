@@ -0,0 +1,136 @@
+"""Exposes a bounded pool of worker threads."""
+import sys
+import threading
+
+from six import reraise
+from six.moves.queue import Queue
+
+
+class Task(object):
+    """Unit of work scheduled to a pool."""
+
+    def __init__(self, func, args, kwargs):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self._result = None
+        self._exc_info = None
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            self._result = self.func(*self.args, **self.kwargs)
+
+        except Exception:
+            self._exc_info = sys.exc_info()
+
+        finally:
+            self._done.set()
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def error(self):
+        """Exception raised by task function if any."""
+        return self._exc_info[1] if self._exc_info else None
+
+    def result(self, timeout=None):
+        """Waits for task to complete and returns its result.
+        Reraises exception if task function failed.
+
+        :param float timeout:
+        """
+        self._done.wait(timeout)
+
+        if self._exc_info:
+            reraise(*self._exc_info)
+
+        return self._result
+
+
+class WorkerPool(object):
+    """Bounded pool of worker threads.
+
+    Tasks are allowed to submit further tasks into the pool,
+    `join()` blocks until there are no pending tasks left.
+
+    """
+
+    def __init__(self, size=8):
+        self.size = max(int(size), 1)
+        self._queue = Queue()
+        self._threads = []
+        self._pending = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+
+    def submit(self, func, *args, **kwargs):
+        """Schedules a function call.
+
+        :param func:
+        :rtype: Task
+        """
+        task = Task(func, args, kwargs)
+
+        with self._cond:
+            self._pending += 1
+
+            if len(self._threads) < min(self._pending, self.size):
+                thread = threading.Thread(target=self._work)
+                thread.daemon = True
+                self._threads.append(thread)
+                thread.start()
+
+        self._queue.put(task)
+        return task
+
+    def map(self, func, items):
+        """Schedules a function call for every item and returns
+        results in the same order.
+
+        :param func:
+        :param items:
+        :rtype: list
+        """
+        tasks = [self.submit(func, item) for item in items]
+        return [task.result() for task in tasks]
+
+    def join(self):
+        """Blocks until all scheduled tasks (including those
+        scheduled by tasks) are done."""
+        with self._cond:
+            while self._pending:
+                self._cond.wait()
+
+    def shutdown(self):
+        """Waits for pending tasks and stops worker threads."""
+        self.join()
+
+        for _ in self._threads:
+            self._queue.put(None)
+
+        for thread in self._threads:
+            thread.join()
+
+        self._threads = []
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+
+            if task is None:
+                break
+
+            task.run()
+
+            with self._cond:
+                self._pending -= 1
+                if not self._pending:
+                    self._cond.notify_all()
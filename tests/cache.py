@@ -0,0 +1,103 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+
+from bowerer.cache import ResponseCache
+from bowerer.net import HttpClient
+
+from helpers import LocalServer
+
+
+class EtagHandler(BaseHTTPRequestHandler):
+
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.headers.get('If-None-Match'))
+
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        body = json.dumps({'name': 'jquery'}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FailingHandler(BaseHTTPRequestHandler):
+
+    status = 503
+
+    def do_GET(self):
+        body = b'{"message": "failed"}'
+        self.send_response(self.status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_get_set(self):
+        cache = ResponseCache(self.path, ttl=100)
+        self.assertIsNone(cache.get('http://some.url'))
+
+        cache.set('http://some.url', {'a': 1}, etag='"x"')
+        entry = cache.get('http://some.url')
+        self.assertEqual(entry['body'], {'a': 1})
+        self.assertEqual(entry['etag'], '"x"')
+        self.assertTrue(cache.is_fresh(entry))
+
+        self.assertFalse(ResponseCache(self.path, ttl=0).is_fresh(entry))
+
+    def test_evict(self):
+        cache = ResponseCache(self.path, max_size=300)
+        for idx in range(10):
+            cache.set('http://some.url/%s' % idx, {'data': 'x' * 50})
+
+        self.assertLessEqual(cache.evict(), 300)
+        self.assertIsNotNone(cache.get('http://some.url/9'))
+        self.assertIsNone(cache.get('http://some.url/0'))
+
+    def test_revalidate(self):
+        with LocalServer.start(EtagHandler) as server:
+            url = '%s/packages/jquery' % server.url
+            client = HttpClient({'storage': {'http': self.path}, 'cache-ttl': 0})
+
+            self.assertEqual(client.get_json(url), {'name': 'jquery'})
+            self.assertEqual(client.get_json(url), {'name': 'jquery'})
+            self.assertEqual(EtagHandler.requests, [None, '"v1"'])
+
+    def test_revalidate_failed(self):
+        client = HttpClient({'storage': {'http': self.path}, 'cache-ttl': 0, 'timeout': 2000})
+
+        with LocalServer.start(FailingHandler) as server:
+            url = '%s/packages/jquery' % server.url
+            ResponseCache(self.path).set(url, {'name': 'jquery'})
+
+            # Stale data is served on error responses.
+            for status in (503, 403):
+                FailingHandler.status = status
+                self.assertEqual(client.get_json(url), {'name': 'jquery'})
+
+        # And when server is unreachable.
+        self.assertEqual(client.get_json(url), {'name': 'jquery'})
@@ -1,7 +1,14 @@
+import json
+import os
+import shutil
+import tempfile
 import unittest
 from functools import partial
+from os.path import join
 
-from bowerer.config import parse_from_command_line
+from bowerer import config
+from bowerer.config import parse_from_command_line, load, merge
+from bowerer.exceptions import ConfigError
 
 
 class ConfigTest(unittest.TestCase):
@@ -19,3 +26,78 @@ class ConfigTest(unittest.TestCase):
                 'second': 'value2',
             }
         })
+
+    def test_merge(self):
+        merged = merge(
+            {'search': ['a', 'b'], 'registry': {'search': ['x']}, 'ca': {'search': []}},
+            {'search': ['c', 'a', 'c', 'd'], 'registry': 'http://some', 'ca': {'search': 'y'}})
+
+        self.assertEqual(merged, {'search': ['a', 'b', 'c', 'd'], 'registry': 'http://some', 'ca': {'search': ['y']}})
+
+
+class LoadTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cwd = join(self.path, 'a', 'b', 'c')
+        os.makedirs(self.cwd)
+
+        self.write_rc(join(self.path, 'a'), {'directory': 'far', 'timeout': 1000, 'registry': {'search': ['http://a']}})
+        self.write_rc(join(self.path, 'a', 'b'), {'directory': 'near', 'registry': {'search': ['http://b']}})
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write_rc(self, directory, contents):
+        filepath = join(directory, '.bowerrc')
+        with open(filepath, 'w') as f:
+            f.write(contents if isinstance(contents, str) else json.dumps(contents))
+        return filepath
+
+    def test_discovery(self):
+        loaded = load({'cwd': self.cwd})
+
+        self.assertEqual(loaded['cwd'], self.cwd)
+        self.assertEqual(loaded['directory'], 'near')
+        self.assertEqual(loaded['timeout'], 1000)
+        self.assertEqual(loaded['registry']['search'][-2:], ['http://a', 'http://b'])
+
+        self.assertEqual(load({'cwd': join(self.path, 'a'), 'timeout': 5})['directory'], 'far')
+        self.assertEqual(load({'cwd': join(self.path, 'a'), 'timeout': 5})['timeout'], 5)
+
+    def test_cache(self):
+        loaded = load({'cwd': self.cwd})
+        loaded['registry']['search'].append('http://mutated')
+        self.assertNotIn('http://mutated', load({'cwd': self.cwd})['registry']['search'])
+
+        parsed = dict(config._RC_FILES)
+        load({'cwd': self.cwd})
+        for filepath, cached in parsed.items():
+            self.assertIs(config._RC_FILES[filepath], cached)
+
+        filepath = self.write_rc(join(self.path, 'a', 'b'), {'directory': 'changed!'})
+        os.utime(filepath, (1, 1))
+        self.assertEqual(load({'cwd': self.cwd})['directory'], 'changed!')
+        self.assertIsNot(config._RC_FILES[filepath], parsed[filepath])
+
+    def test_cache_cwd(self):
+        load({'cwd': self.cwd})
+        merged_global = list(config._MERGED_GLOBAL)
+
+        # Defaults and global rc files are not merged again for other directories.
+        loaded = load({'cwd': self.path})
+        self.assertEqual(loaded['cwd'], self.path)
+        self.assertEqual(loaded['directory'], 'bower_components')
+        self.assertEqual(len(config._MERGED_GLOBAL), len(merged_global))
+        for (_, merged), (_, cached) in zip(config._MERGED_GLOBAL, merged_global):
+            self.assertIs(merged, cached)
+
+        self.assertEqual(load({'cwd': self.cwd})['directory'], 'near')
+        self.assertIs(config._MERGED_GLOBAL[-1][1], merged_global[-1][1])
+
+    def test_parse_error(self):
+        self.write_rc(self.cwd, '{"directory": ')
+        self.assertRaises(ConfigError, load, {'cwd': self.cwd})
+
+        self.write_rc(self.cwd, '')
+        self.assertEqual(load({'cwd': self.cwd})['directory'], 'near')
@@ -0,0 +1,69 @@
+import threading
+import unittest
+from collections import OrderedDict
+
+from semantic_version import Version
+
+from bowerer.fetcher import Fetcher
+
+
+class SlowFetcher(Fetcher):
+
+    def __init__(self, config):
+        super(SlowFetcher, self).__init__(config)
+        self.calls = []
+        self.release = threading.Event()
+
+    def _get_versions(self, source):
+        self.calls.append(source)
+        self.release.wait(5)
+        return source, OrderedDict([(Version('1.0.0'), {'name': 'v1.0.0'})])
+
+
+class FetcherTest(unittest.TestCase):
+
+    def test_select_version(self):
+        versions = OrderedDict([
+            (Version('1.0.0'), {'name': 'v1.0.0'}),
+            (Version('1.2.0'), {'name': 'v1.2.0'}),
+            (Version('2.0.0'), {'name': 'v2.0.0'}),
+        ])
+        self.assertEqual(Fetcher.select_version(versions, '^1.0')[0], Version('1.2.0'))
+        self.assertEqual(Fetcher.select_version(versions, '*')[0], Version('2.0.0'))
+        self.assertEqual(Fetcher.select_version(versions, 'v1.0.0')[0], Version('1.0.0'))
+        self.assertEqual(Fetcher.select_version(versions, '~3.0'), (None, None))
+
+    def test_prefetch(self):
+        fetcher = SlowFetcher({'concurrency': 2})
+        fetcher.prefetch(['jquery', 'angular', 'jquery'])
+
+        results = []
+        waiter = threading.Thread(target=lambda: results.append(fetcher.get_versions('jquery')))
+        waiter.start()
+
+        fetcher.release.set()
+        waiter.join(5)
+
+        self.assertEqual(results[0][0], 'jquery')
+        self.assertEqual(fetcher.get_versions('angular')[0], 'angular')
+        self.assertEqual(sorted(fetcher.calls), ['angular', 'jquery'])
+
+        threads = list(fetcher._pool._threads)
+        fetcher.close()
+
+        self.assertIsNone(fetcher._pool)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+        # Versions got are kept.
+        fetcher.prefetch(['jquery'])
+        self.assertIsNone(fetcher._pool)
+
+    def test_prefetch_disabled(self):
+        fetcher = SlowFetcher({'prefetch': False})
+        fetcher.release.set()
+        fetcher.prefetch(['jquery'])
+
+        self.assertEqual(fetcher.calls, [])
+        fetcher.get_versions('jquery')
+        fetcher.get_versions('jquery')
+        self.assertEqual(fetcher.calls, ['jquery'])
@@ -0,0 +1,99 @@
+"""Fixtures shared by test modules: local HTTP servers, archives and git."""
+import io
+import os
+import subprocess
+import tarfile
+import threading
+
+from six.moves.BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from six.moves.socketserver import ThreadingMixIn
+
+
+class ThreadingServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class LocalServer(object):
+    """Serves a given server in a daemon thread until stopped.
+
+    Use `LocalServer.start()` to make a server on a free local port,
+    as a context manager or calling `stop()` (e.g. in `tearDown()`).
+
+    """
+
+    def __init__(self, server):
+        self.server = server
+        self.url = 'http://127.0.0.1:%s' % server.server_address[1]
+
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    @classmethod
+    def start(cls, handler_cls, threaded=False, **attributes):
+        """Starts serving requests with a given handler.
+
+        :param handler_cls:
+        :param bool threaded: Handle requests in separate threads.
+        :param attributes: Server attributes handlers may use (e.g. `archive`).
+        :rtype: LocalServer
+        """
+        server = (ThreadingServer if threaded else HTTPServer)(('127.0.0.1', 0), handler_cls)
+
+        for name, value in attributes.items():
+            setattr(server, name, value)
+
+        return cls(server)
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """Responds with `archive` bytes of the server to any request."""
+
+    def do_GET(self):
+        archive = self.server.archive
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(archive)))
+        self.end_headers()
+        self.wfile.write(archive)
+
+    def log_message(self, *args):
+        pass
+
+
+def get_tarball(files):
+    """Returns .tar.gz contents with given files.
+
+    :param dict files: File contents indexed by archive member names.
+    :rtype: bytes
+    """
+    buffer = io.BytesIO()
+
+    with tarfile.open(fileobj=buffer, mode='w:gz') as archive:
+        for name, contents in files.items():
+            contents = contents.encode('utf-8')
+            info = tarfile.TarInfo(name)
+            info.size = len(contents)
+            archive.addfile(info, io.BytesIO(contents))
+
+    return buffer.getvalue()
+
+
+def make_tarball(filepath, files):
+    with open(filepath, 'wb') as f:
+        f.write(get_tarball(files))
+
+
+def git(*args, **kwargs):
+    env = dict(os.environ, GIT_AUTHOR_NAME='tester', GIT_AUTHOR_EMAIL='tester@example.com',
+               GIT_COMMITTER_NAME='tester', GIT_COMMITTER_EMAIL='tester@example.com')
+    return subprocess.check_output(('git',) + args, env=env, stderr=subprocess.STDOUT, **kwargs).decode('utf-8')
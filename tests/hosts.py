@@ -0,0 +1,252 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join, isfile
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+from six.moves.urllib.parse import urlparse, parse_qs
+
+from bowerer.exceptions import OfflineError, ResolveError, StoreError, UnsupportedHostingUrl
+from bowerer.hosts import GitHub, GitRemote, get_host
+from bowerer.store import PackageStore
+
+from helpers import LocalServer, git
+
+
+class TagsHandler(BaseHTTPRequestHandler):
+
+    tags = ['v%s.%s.0' % (major, minor) for major in range(3) for minor in range(10)] + ['latest']
+    requests = []
+    failing_page = None
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        page = int(query.get('page', ['1'])[0])
+        per_page = int(query['per_page'][0])
+        etag = '"page%s"' % page
+
+        self.requests.append((page, self.headers.get('Authorization'), self.headers.get('If-None-Match')))
+
+        if page == self.failing_page:
+            body = json.dumps({'message': 'API rate limit exceeded'}).encode('utf-8')
+            self.send_response(403)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        tags = list(reversed(self.tags))[(page - 1) * per_page:page * per_page]
+        body = json.dumps([
+            {'name': tag, 'tarball_url': 'http://some/%s.tar.gz' % tag, 'commit': {'sha': 'sha-%s' % tag}}
+            for tag in tags]).encode('utf-8')
+
+        pages_count = (len(self.tags) + per_page - 1) // per_page
+        base = 'http://%s:%s%s?per_page=%s' % (
+            self.server.server_address[0], self.server.server_address[1], parsed.path, per_page)
+
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Link', '<%s&page=%s>; rel="next", <%s&page=%s>; rel="last"' % (
+            base, min(page + 1, pages_count), base, pages_count))
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class GetHostTest(unittest.TestCase):
+
+    def test_get_host(self):
+        for url in (
+                'git://github.com/owner/repo.git',
+                'https://github.com/owner/repo.git',
+                'git@github.com:owner/repo.git',
+                'ssh://git@github.com/owner/repo.git'):
+            self.assertIsInstance(get_host(url), GitHub, url)
+
+        for url in (
+                'git://example.com/repo.git',
+                'https://git.example.com/github.com.git',
+                '/srv/git/repo.git',
+                'git+https://git.example.com/repo',
+                'ssh://git.example.com/repo',
+                'deploy@git.example.com:repo'):
+            self.assertIsInstance(get_host(url), GitRemote, url)
+
+        for url in (
+                'https://example.com/lib.zip',
+                'http://example.com/lib.tar.gz',
+                'ftp://example.com/repo.git',
+                os.path.dirname(os.path.abspath(__file__))):
+            self.assertRaises(UnsupportedHostingUrl, get_host, url)
+
+    def test_get_host_local(self):
+        path = tempfile.mkdtemp()
+
+        try:
+            git('init', '-q', join(path, 'work'))
+            git('init', '-q', '--bare', join(path, 'bare'))
+
+            for repo in (join(path, 'work'), join(path, 'bare'), 'file://' + join(path, 'bare')):
+                self.assertIsInstance(get_host(repo), GitRemote, repo)
+
+        finally:
+            shutil.rmtree(path)
+
+
+class GitRemoteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        work = join(self.path, 'work')
+        self.remote = join(self.path, 'remote.git')
+
+        git('init', '-q', work)
+        with open(join(work, 'bower.json'), 'w') as f:
+            json.dump({'name': 'lib', 'version': '1.0.0'}, f)
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', 'first', cwd=work)
+        git('tag', 'v1.0.0', cwd=work)
+
+        with open(join(work, 'lib.js'), 'w') as f:
+            f.write('// lib')
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', 'second', cwd=work)
+        git('tag', '-a', '-m', 'Release', 'v1.1.0', cwd=work)
+        git('tag', 'nightly', cwd=work)
+
+        self.commit = git('rev-parse', 'HEAD', cwd=work).strip()
+        git('clone', '-q', '--bare', work, self.remote)
+
+        self.config = {'tmp': join(self.path, 'tmp')}
+
+    def tearDown(self):
+        GitRemote.cleanup()
+        shutil.rmtree(self.path)
+
+    def test_get_versions(self):
+        host = GitRemote(self.remote, self.config)
+        versions = host.get_versions()
+
+        self.assertEqual([info['name'] for info in versions.values()], ['v1.0.0', 'v1.1.0'])
+        # Annotated tags are peeled to commits.
+        self.assertEqual(list(versions.values())[-1]['commit'], self.commit)
+
+        tags = host.get_tags()
+        self.assertEqual(tags['nightly'], self.commit)
+        self.assertNotIn('master', tags)
+
+        self.assertEqual(host.get_pkg_meta(list(versions.values())[0]), {'name': 'lib', 'version': '1.0.0'})
+
+    def test_offline(self):
+        config = dict(self.config, storage={'http': join(self.path, 'http')}, offline=True)
+        host = GitRemote(self.remote, config)
+
+        self.assertRaises(OfflineError, host.get_versions)
+        self.assertRaises(OfflineError, host.get_archiver('v1.1.0'), join(self.path, 'lib.tar'))
+
+        # Tags listed online are cached.
+        config['offline'] = False
+        config['cache-ttl'] = 0
+        versions = host.get_versions()
+
+        config['offline'] = True
+        self.assertEqual(host.get_versions(), versions)
+
+        # Stale tags are used if the remote is unreachable.
+        config['offline'] = False
+        shutil.move(self.remote, self.remote + '.moved')
+        self.assertEqual(host.get_versions(), versions)
+
+    def test_install(self):
+        host = GitRemote(self.remote, self.config)
+        store = PackageStore(join(self.path, 'store'))
+        destination = join(self.path, 'components', 'lib')
+
+        store.install(
+            self.remote, 'v1.1.0', None, destination, None, archive=host.get_archiver('v1.1.0', self.commit))
+        self.assertTrue(isfile(join(destination, 'lib.js')))
+        self.assertTrue(store.get_digest(self.remote, 'v1.1.0'))
+
+        self.assertRaises(
+            StoreError, store.install,
+            self.remote, 'v1.0.0', None, destination, None, archive=host.get_archiver('v1.0.0', self.commit))
+
+
+class GitHubTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.server = LocalServer.start(TagsHandler)
+
+        class LocalGitHub(GitHub):
+            BASE_URL = self.server.url
+            PER_PAGE = 7
+
+        self.host_cls = LocalGitHub
+        TagsHandler.requests = []
+        TagsHandler.failing_page = None
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def test_get_versions_failed(self):
+        config = {'storage': {'http': self.path}, 'cache-ttl': 0}
+        host = self.host_cls('git://github.com/owner/repo.git', config)
+
+        TagsHandler.failing_page = 2
+        self.assertRaises(ResolveError, host.get_versions)
+
+        # Stale pages are used if revalidation fails.
+        TagsHandler.failing_page = None
+        versions = host.get_versions()
+
+        TagsHandler.failing_page = 2
+        self.assertIs(host.get_versions(), versions)
+        self.assertEqual(len(versions), 30)
+
+    def test_page_hash(self):
+        def get_page(*tags):
+            return {'body': [
+                {'name': tag, 'tarball_url': 'http://some/%s.tar.gz' % tag, 'commit': {'sha': 'sha-%s' % tag}}
+                for tag in tags]}
+
+        page_hash = GitHub.get_page_hash(get_page('v1.0.0', 'v1.1.0'))
+        self.assertEqual(GitHub.get_page_hash(get_page('v1.1.0', 'v1.0.0')), page_hash)
+        self.assertNotEqual(GitHub.get_page_hash(get_page('v1.0.0', 'v1.2.0')), page_hash)
+
+        page = get_page('v1.0.0', 'v1.1.0')
+        page['body'][0]['commit']['sha'] = 'moved'
+        self.assertNotEqual(GitHub.get_page_hash(page), page_hash)
+
+    def test_repo_ident(self):
+        self.assertEqual(GitHub('git://github.com/angular/angular.js.git').get_repo_ident(), 'angular/angular.js')
+        self.assertEqual(GitHub('https://github.com/owner/tig').get_repo_ident(), 'owner/tig')
+
+    def test_get_versions(self):
+        config = {'storage': {'http': self.path}, 'cache-ttl': 0, 'github-token': 'secret'}
+        host = self.host_cls('git://github.com/owner/repo.git', config)
+
+        versions = host.get_versions()
+
+        self.assertEqual(len(versions), 30)
+        self.assertEqual([info['name'] for info in versions.values()][:3], ['v0.0.0', 'v0.1.0', 'v0.2.0'])
+        self.assertEqual(list(versions.values())[-1]['commit'], 'sha-v2.9.0')
+        self.assertEqual(sorted(page for page, _, _ in TagsHandler.requests), [1, 2, 3, 4, 5])
+        self.assertEqual(set(auth for _, auth, _ in TagsHandler.requests), {'token secret'})
+
+        # Pages are revalidated, unchanged index is reused.
+        TagsHandler.requests = []
+        self.assertIs(host.get_versions(), versions)
+        self.assertEqual(sorted(etag for _, _, etag in TagsHandler.requests), ['"page%s"' % page for page in range(1, 6)])
@@ -0,0 +1,127 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+from bowerer.exceptions import StoreError
+from bowerer.lock import Lockfile
+from bowerer.project import Project
+
+from helpers import ArchiveHandler, LocalServer, get_tarball
+
+
+class LockfileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cwd = join(self.path, 'project')
+        os.makedirs(self.cwd)
+
+        with open(join(self.cwd, 'bower.json'), 'w') as f:
+            json.dump({'name': 'project', 'dependencies': {'jquery': '~2.0.0'}}, f)
+
+        self.server = LocalServer.start(ArchiveHandler, archive=get_tarball({
+            'jquery-abc/bower.json': '{"name": "jquery", "main": "jquery.js"}',
+            'jquery-abc/jquery.js': 'var jQuery;',
+        }))
+
+        self.config = {
+            'cwd': self.cwd,
+            'directory': 'bower_components',
+            'tmp': join(self.path, 'tmp'),
+            'storage': {'packages': join(self.path, 'packages')},
+        }
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def get_lock(self, json_hash, digest=None):
+        return Lockfile(json_hash, {'jquery': {
+            'version': '2.0.3',
+            'release': '2.0.3',
+            'source': 'https://github.com/jquery/jquery-dist.git',
+            'originalSource': 'jquery',
+            'target': '~2.0.0',
+            'commit': 'abc',
+            'tarball': '%s/jquery.tar.gz' % self.server.url,
+            'sha256': digest,
+        }})
+
+    def test_read_write(self):
+        self.assertIsNone(Lockfile.read(self.cwd))
+
+        self.get_lock('somehash').write(self.cwd)
+        lock = Lockfile.read(self.cwd)
+
+        self.assertTrue(lock.matches('somehash'))
+        self.assertFalse(lock.matches('otherhash'))
+        self.assertFalse(lock.matches('somehash', production=True))
+        self.assertEqual(lock.packages['jquery']['commit'], 'abc')
+
+    def test_install_locked(self):
+        project = Project(self.config)
+        project.read_json()
+        self.get_lock(project.json_hash).write(self.cwd)
+
+        project.install([], {}, self.config)
+
+        with open(join(self.cwd, 'bower_components', 'jquery', '.bower.json')) as f:
+            installed = json.load(f)
+
+        self.assertEqual(installed['name'], 'jquery')
+        self.assertEqual(installed['main'], 'jquery.js')
+        self.assertEqual(installed['_release'], '2.0.3')
+        self.assertEqual(installed['_target'], '~2.0.0')
+
+        # Packages already installed as locked are skipped.
+        with open(join(self.cwd, 'bower_components', 'jquery', 'marker'), 'w') as f:
+            f.write('')
+
+        Project(self.config).install([], {}, self.config)
+        self.assertTrue(os.path.isfile(join(self.cwd, 'bower_components', 'jquery', 'marker')))
+
+    def test_update(self):
+        lock = self.get_lock('somehash', digest='1' * 64)
+        entry = lock.packages['jquery']
+
+        lock.update({
+            'jquery': (Lockfile.make_pkg_meta('jquery', entry), None),
+            'linked': ({'name': 'linked', 'version': '1.0.0', '_direct': True}, None),
+        })
+
+        self.assertEqual(list(lock.packages.keys()), ['jquery'])
+        self.assertEqual(lock.packages['jquery']['sha256'], '1' * 64)
+
+    def test_lockable(self):
+        project = Project(self.config)
+        project.json = {'dependencies': {'jquery': '~2.0.0'}, 'devDependencies': {'qunit': '*'}}
+
+        installed = dict((name, ({'name': name, 'dependencies': dependencies}, None)) for name, dependencies in (
+            ('jquery', {'sizzle': '*'}),
+            ('sizzle', {'jquery': '*'}),
+            ('qunit', {}),
+            ('explicit', {'sizzle': '*'}),
+        ))
+
+        # Packages installed explicitly (not saved into bower.json) are not locked.
+        self.assertEqual(sorted(project.get_lockable(installed)), ['jquery', 'qunit', 'sizzle'])
+        self.assertEqual(sorted(project.get_lockable(installed, production=True)), ['jquery', 'sizzle'])
+
+    def test_fill_digests(self):
+        project = Project(self.config)
+        project.install_locked(self.get_lock(None))
+
+        lock = self.get_lock(None)
+        lock.packages['other'] = dict(lock.packages['jquery'], release='2.0.4')
+        project.fill_digests(lock)
+
+        self.assertEqual(len(lock.packages['jquery']['sha256']), 64)
+        self.assertIsNone(lock.packages['other']['sha256'])
+
+    def test_integrity(self):
+        project = Project(self.config)
+        lock = self.get_lock(None, digest='0' * 64)
+        self.assertRaises(StoreError, project.install_locked, lock)
@@ -0,0 +1,242 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from os.path import join, isfile
+
+from semantic_version import Version
+
+from bowerer.fetcher import Fetcher
+from bowerer.manager import Manager
+from bowerer.exceptions import ConflictError, ResolveError
+
+from helpers import ArchiveHandler, LocalServer, get_tarball
+
+
+class FakeFetcher(object):
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.fetched = []
+
+    def prefetch(self, sources):
+        pass
+
+    def close(self):
+        pass
+
+    def fetch(self, endpoint):
+        self.fetched.append(endpoint['source'])
+        pkg_meta = dict(self.packages[endpoint['source']])
+        pkg_meta.setdefault('name', endpoint['source'])
+        pkg_meta['_target'] = endpoint['target']
+        return pkg_meta
+
+
+class VersionedFetcher(object):
+
+    def __init__(self, packages):
+        self.packages = packages
+        self.fetched = []
+        self.prefetched = []
+
+    def get_versions(self, source):
+        versions = OrderedDict()
+        for version in self.packages[source]:
+            versions[Version(version)] = {'name': 'v' + version}
+        return source, versions
+
+    def prefetch(self, sources):
+        self.prefetched.extend(sources)
+
+    def close(self):
+        pass
+
+    def fetch(self, endpoint, version=None):
+        source = endpoint['source']
+        _, versions = self.get_versions(source)
+
+        if version is None:
+            version, _ = Fetcher.select_version(versions, endpoint['target'])
+
+        self.fetched.append((source, str(version)))
+
+        return {
+            'name': source,
+            'version': str(version),
+            'dependencies': self.packages[source][str(version)],
+            '_release': 'v%s' % version,
+            '_target': endpoint['target'],
+        }
+
+
+class ManagerTest(unittest.TestCase):
+
+    def get_manager(self, packages, targets):
+        manager = Manager({'concurrency': 4})
+        manager.fetcher = FakeFetcher(packages)
+        manager.configure({'targets': targets})
+        return manager
+
+    def test_resolve(self):
+        packages = {
+            'app': {'version': '1.0.0', 'dependencies': {'lib': '~1.0.0', 'util': '*'}},
+            'lib': {'version': '1.0.2', 'dependencies': {'util': '~2.0.0'}},
+            'util': {'version': '2.0.1'},
+        }
+        manager = self.get_manager(packages, [{'name': 'app', 'source': 'app', 'target': '*'}])
+        suitables = manager.resolve()
+
+        self.assertEqual(sorted(suitables.keys()), ['app', 'lib', 'util'])
+        self.assertEqual(suitables['util']['pkgMeta']['version'], '2.0.1')
+        self.assertEqual(sorted(set(manager.fetcher.fetched)), ['app', 'lib', 'util'])
+
+    def test_resolve_failed(self):
+        packages = {'app': {'version': '1.0.0', 'dependencies': {'missing': '*'}}}
+        manager = self.get_manager(packages, [{'name': 'app', 'source': 'app', 'target': '*'}])
+        self.assertRaises(ResolveError, manager.resolve)
+
+    def test_resolve_conflict(self):
+        packages = {
+            'app': {'1.0.0': {'lib': '~1.0.0', 'util': '~1.0.0'}},
+            'lib': {'1.0.0': {'util': '~1.0.0'}, '1.0.1': {'util': '~2.0.0'}},
+            'util': {'1.0.0': {}, '1.0.5': {}, '2.0.0': {}},
+        }
+        manager = Manager({'concurrency': 4})
+        manager.fetcher = VersionedFetcher(packages)
+        manager.configure({'targets': [{'name': 'app', 'source': 'app', 'target': '*'}]})
+        suitables = manager.resolve()
+
+        self.assertEqual(
+            dict((name, endpoint['pkgMeta']['version']) for name, endpoint in suitables.items()),
+            {'app': '1.0.0', 'lib': '1.0.0', 'util': '1.0.5'})
+        self.assertEqual(sorted(dep['name'] for dep in suitables['util']['dependants']), ['app', 'lib'])
+
+        # Metadata resolved earlier is reused.
+        self.assertEqual(manager.fetcher.fetched.count(('util', '1.0.5')), 1)
+        self.assertEqual(sorted(set(manager.fetcher.prefetched)), ['app', 'lib', 'util'])
+
+    def test_resolve_conflict_installed(self):
+        packages = {
+            'app': {'1.0.0': {'lib': '~1.0.0', 'util': '~1.0.0'}},
+            'lib': {'1.0.0': {'util': '~1.0.0'}, '1.0.1': {'util': '~2.0.0'}},
+            'util': {'1.0.0': {}, '2.0.0': {}},
+            'other': {'1.0.0': {}, '1.2.0': {}},
+        }
+        manager = Manager({'concurrency': 4})
+        manager.fetcher = VersionedFetcher(packages)
+
+        other = {'name': 'other', 'source': 'other', 'target': '~1.0.0'}
+        other['pkgMeta'] = manager.fetcher.fetch(other)
+
+        manager.configure({
+            'targets': [{'name': 'app', 'source': 'app', 'target': '*'}],
+            'resolved': {'other': other},
+        })
+        suitables = manager.resolve()
+
+        self.assertEqual(
+            dict((name, endpoint['pkgMeta']['version']) for name, endpoint in suitables.items()),
+            {'app': '1.0.0', 'lib': '1.0.0', 'util': '1.0.0', 'other': '1.0.0'})
+        self.assertIs(suitables['other']['pkgMeta'], other['pkgMeta'])
+
+    def test_resolve_conflict_resolution(self):
+        packages = {
+            'app': {'1.0.0': {'lib': '~1.0.0', 'util': '~1.0.0'}},
+            'lib': {'1.0.0': {'util': '~2.0.0'}},
+            'util': {'1.0.0': {}, '2.0.0': {}},
+        }
+        manager = Manager({'concurrency': 4})
+        manager.fetcher = VersionedFetcher(packages)
+
+        manager.configure({'targets': [{'name': 'app', 'source': 'app', 'target': '*'}]})
+        self.assertRaises(ConflictError, manager.resolve)
+
+        manager.configure({
+            'targets': [{'name': 'app', 'source': 'app', 'target': '*'}],
+            'resolutions': {'util': '~2.0.0'},
+        })
+        self.assertEqual(manager.resolve()['util']['pkgMeta']['version'], '2.0.0')
+
+    def test_make_unique(self):
+        endpoints = [
+            {'name': 'jquery', 'source': 'jquery', 'target': '~2.0.0'},
+            {'name': '', 'source': 'angular', 'target': '*'},
+            {'name': 'jquery', 'source': 'other', 'target': '~2.0.0'},
+            {'name': 'jquery', 'source': 'jquery', 'target': '~1.0.0'},
+            {'name': '', 'source': 'angular', 'target': '*'},
+            {'name': '', 'source': 'backbone', 'target': '*'},
+        ]
+        self.assertEqual(Manager._make_unique(endpoints), endpoints[2:])
+
+
+class InstallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+
+        self.server = LocalServer.start(ArchiveHandler, archive=get_tarball({
+            'lib-abc/bower.json': '{"name": "lib"}', 'lib-abc/lib.js': '// lib'}))
+
+        tarball = '%s/lib.tar.gz' % self.server.url
+        self.packages = {
+            name: {
+                'version': '1.0.0',
+                '_source': 'http://example.com/%s.git' % name,
+                '_release': '1.0.0',
+                '_resolution': {'type': 'version', 'tag': '1.0.0', 'commit': 'abc', 'tarball': tarball},
+            } for name in ('app', 'lib', 'util')}
+        self.packages['app']['dependencies'] = {'lib': '*', 'util': '^1.0.0'}
+
+        self.config = {
+            'cwd': join(self.path, 'project'),
+            'directory': 'bower_components',
+            'tmp': join(self.path, 'tmp'),
+            'storage': {'packages': join(self.path, 'packages')},
+            'concurrency': 4,
+        }
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def install(self, installed=None):
+        manager = Manager(self.config)
+        manager.fetcher = FakeFetcher(self.packages)
+        manager.configure({'targets': [{'name': 'app', 'source': 'app', 'target': '*'}], 'installed': installed or {}})
+        manager.resolve()
+        manager.preinstall({})
+        return manager.install({})
+
+    def test_install(self):
+        components_dir = join(self.config['cwd'], 'bower_components')
+
+        installed = self.install()
+        self.assertEqual(sorted(installed.keys()), ['app', 'lib', 'util'])
+        self.assertTrue(all(digest for _, digest in installed.values()))
+
+        for name in ('app', 'lib', 'util'):
+            self.assertTrue(isfile(join(components_dir, name, 'lib.js')))
+            with open(join(components_dir, name, '.bower.json')) as f:
+                self.assertEqual(json.load(f)['name'], name)
+
+        # No staging leftovers.
+        self.assertEqual(sorted(os.listdir(components_dir)), ['app', 'lib', 'util'])
+
+        for name in ('app', 'lib'):
+            with open(join(components_dir, name, 'marker'), 'w') as f:
+                f.write('')
+
+        installed_metas = {name: pkg_meta for name, (pkg_meta, _) in installed.items()}
+        installed_metas['util'] = dict(installed_metas['util'], version='0.9.0', _release='0.9.0', _target='~0.9.0')
+
+        # Packages installed with the same resolution are skipped.
+        installed = self.install(installed_metas)
+        self.assertIsNone(installed['app'][1])
+        self.assertIsNone(installed['lib'][1])
+        self.assertTrue(installed['util'][1])
+        self.assertTrue(isfile(join(components_dir, 'app', 'marker')))
+        self.assertTrue(isfile(join(components_dir, 'lib', 'marker')))
+        self.assertFalse(isfile(join(components_dir, 'util', 'marker')))
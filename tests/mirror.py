@@ -0,0 +1,121 @@
+import json
+import shutil
+import tempfile
+import unittest
+from os.path import join, isfile
+
+from bowerer.hosts import GitRemote, MirrorHost, get_host
+from bowerer.lock import Lockfile
+from bowerer.manager import Manager
+from bowerer.mirror import Mirror, MirrorServer
+from bowerer.net import get_client
+from bowerer.registries import Bower
+from bowerer.store import PackageStore
+from bowerer.utils import Endpoint
+
+from helpers import LocalServer, git
+
+
+class MirrorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        work = join(self.path, 'work')
+        self.remote = join(self.path, 'remote.git')
+
+        git('init', '-q', work)
+        with open(join(work, 'bower.json'), 'w') as f:
+            json.dump({'name': 'lib', 'version': '1.0.0'}, f)
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', 'first', cwd=work)
+        git('tag', 'v1.0.0', cwd=work)
+        self.commit_first = git('rev-parse', 'HEAD', cwd=work).strip()
+
+        with open(join(work, 'lib.js'), 'w') as f:
+            f.write('// lib')
+        git('add', '.', cwd=work)
+        git('commit', '-q', '-m', 'second', cwd=work)
+        git('tag', 'v1.1.0', cwd=work)
+        self.commit = git('rev-parse', 'HEAD', cwd=work).strip()
+
+        git('clone', '-q', '--bare', work, self.remote)
+
+        self.mirror = Mirror(join(self.path, 'mirror'), {'tmp': join(self.path, 'tmp')})
+        self.server = None
+
+    def tearDown(self):
+        if self.server:
+            self.server.stop()
+        GitRemote.cleanup()
+        shutil.rmtree(self.path)
+
+    def serve(self):
+        self.server = LocalServer(MirrorServer(self.mirror, ('127.0.0.1', 0)))
+        return self.server.url
+
+    def test_add(self):
+        digest = self.mirror.add('lib', self.remote, 'v1.1.0', commit=self.commit)
+        self.assertTrue(isfile(self.mirror.get_archive_path(digest)))
+        self.assertIsNone(self.mirror.add('lib', self.remote, 'nightly', commit=self.commit))
+
+        lock = Lockfile(None, {'lib': {
+            'release': 'v1.0.0', 'source': self.remote, 'tarball': None, 'commit': self.commit_first}})
+        self.mirror.add_lock(lock)
+
+        package = self.mirror.get_package('lib')
+        self.assertEqual(package['url'], self.remote)
+        self.assertEqual(sorted(package['versions']), ['v1.0.0', 'v1.1.0'])
+        self.assertEqual(package['versions']['v1.1.0']['sha256'], digest)
+        self.assertEqual(package['versions']['v1.0.0']['pkgMeta'], {'name': 'lib', 'version': '1.0.0'})
+
+        self.assertIsNone(self.mirror.get_package('missing'))
+        self.assertIsNone(self.mirror.get_archive_path('../../etc/passwd'))
+
+    def test_serve(self):
+        self.mirror.add('lib', self.remote, 'v1.0.0', commit=self.commit_first)
+        digest = self.mirror.add('lib', self.remote, 'v1.1.0', commit=self.commit)
+        base = self.serve()
+        config = {'registry': {'search': [base]}}
+
+        found = Bower.lookup(['lib', 'missing'], config)
+        self.assertEqual(found, {'lib': {'name': 'lib', 'url': base + '/mirror/lib'}, 'missing': None})
+
+        host = get_host(found['lib']['url'], config)
+        self.assertIsInstance(host, MirrorHost)
+
+        versions = host.get_versions()
+        self.assertEqual([info['name'] for info in versions.values()], ['v1.0.0', 'v1.1.0'])
+
+        info = list(versions.values())[-1]
+        self.assertEqual(info['commit'], self.commit)
+        self.assertEqual(info['url_pack'], '%s/tarballs/%s.tar.gz' % (base, digest))
+        self.assertEqual(host.get_pkg_meta(info), {'name': 'lib', 'version': '1.0.0'})
+
+        destination = join(self.path, 'components', 'lib')
+        store = PackageStore(join(self.path, 'store'))
+        self.assertEqual(
+            store.install(found['lib']['url'], info['name'], info['url_pack'], destination, get_client(config)),
+            digest)
+        self.assertTrue(isfile(join(destination, 'lib.js')))
+
+        client = get_client(config)
+        response = client.get(base + '/mirror/lib/versions')
+        self.assertEqual(response.status_code, 200)
+        response = client.get(base + '/mirror/lib/versions', headers={'If-None-Match': response.headers['ETag']})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(client.get(base + '/mirror/lib/v2.0.0/bower.json').status_code, 404)
+        self.assertEqual(client.get(base + '/tarballs/%s.tar.gz' % ('0' * 64)).status_code, 404)
+
+    def test_resolve(self):
+        self.mirror.add('lib', self.remote, 'v1.0.0', commit=self.commit_first)
+        self.mirror.add('lib', self.remote, 'v1.1.0', commit=self.commit)
+        base = self.serve()
+
+        manager = Manager({'registry': {'search': [base]}, 'prefetch': False})
+        manager.configure({'targets': [Endpoint.decompose('lib#~1.0.0')]})
+        pkg_meta = manager.resolve()['lib']['pkgMeta']
+
+        self.assertEqual(pkg_meta['_release'], 'v1.0.0')
+        self.assertEqual(pkg_meta['_source'], base + '/mirror/lib')
+        self.assertTrue(pkg_meta['_resolution']['tarball'].startswith(base + '/tarballs/'))
@@ -0,0 +1,86 @@
+import shutil
+import tempfile
+import unittest
+
+from bowerer.cache import ResponseCache
+from bowerer.exceptions import OfflineError
+from bowerer.manager import Manager
+from bowerer.net import HttpClient, get_client
+
+from helpers import ArchiveHandler, LocalServer
+
+
+class HttpClientTest(unittest.TestCase):
+
+    def test_configure(self):
+        client = HttpClient({
+            'timeout': 5000,
+            'user-agent': 'tester',
+            'proxy': 'http://proxy:3128',
+            'strict-ssl': True,
+            'ca': {'search': ['/some/ca.pem']},
+        })
+        self.assertEqual(client.timeout, 5)
+        self.assertEqual(client.session.headers['User-Agent'], 'tester')
+        self.assertEqual(client.session.proxies, {'http': 'http://proxy:3128'})
+        self.assertEqual(client.session.verify, '/some/ca.pem')
+
+        client = HttpClient({'strict-ssl': False, 'ca': {'search': ['/some/ca.pem']}})
+        self.assertFalse(client.session.verify)
+
+    def test_shared(self):
+        self.assertIs(get_client({'timeout': 100}), get_client({'timeout': 100}))
+        self.assertIsNot(get_client({'timeout': 100}), get_client({'timeout': 200}))
+
+    def test_host_limit_streamed(self):
+        with LocalServer.start(ArchiveHandler, archive=b'contents') as server:
+            url = '%s/archive.tar.gz' % server.url
+            client = HttpClient({'concurrency-per-host': 1})
+            limit = client.get_host_limit(url)
+
+            client.get(url)
+            self.assertTrue(limit.acquire(False))
+            limit.release()
+
+            # Streamed response holds the limit until closed.
+            response = client.get(url, stream=True)
+            self.assertFalse(limit.acquire(False))
+            self.assertEqual(response.raw.read(), b'contents')
+
+            response.close()
+            response.close()
+            self.assertTrue(limit.acquire(False))
+            limit.release()
+
+
+class OfflineTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.config = {'offline': True, 'storage': {'http': self.path}, 'cache-ttl': 0}
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_client(self):
+        url = 'http://bower.herokuapp.com/packages/jquery'
+        client = HttpClient(self.config)
+
+        self.assertRaises(OfflineError, client.get_json, url)
+
+        ResponseCache(self.path).set(url, {'name': 'jquery'})
+        self.assertEqual(client.get_json(url), {'name': 'jquery'})
+
+    def test_manager(self):
+        manager = Manager(self.config)
+        manager.configure({'targets': [
+            {'name': 'jquery', 'source': 'jquery', 'target': '*'},
+            {'name': 'angular', 'source': 'angular', 'target': '*'},
+        ]})
+
+        try:
+            manager.resolve()
+            self.fail('OfflineError is not raised')
+
+        except OfflineError as e:
+            self.assertEqual('%s' % e, 'Missing from local cache: angular, jquery')
@@ -0,0 +1,85 @@
+import json
+import unittest
+
+from bowerer.nodes import PackageEndpoint, PackageNode
+from bowerer.utils import Endpoint
+
+
+class PackageEndpointTest(unittest.TestCase):
+
+    def test_mapping(self):
+        endpoint = PackageEndpoint(name='jquery', source='jquery', target='~2.0.0')
+
+        self.assertEqual(endpoint['name'], 'jquery')
+        self.assertEqual(endpoint.get('pkgMeta', {}), {})
+        self.assertRaises(KeyError, lambda: endpoint['pkgMeta'])
+        self.assertNotIn('missing', endpoint)
+        self.assertIsNone(endpoint.get('missing'))
+
+        endpoint['missing'] = True
+        endpoint['newly'] = False
+        endpoint['pkgMeta'] = {'name': 'jquery'}
+        self.assertTrue(endpoint['missing'])
+        self.assertNotIn('newly', endpoint)
+        self.assertEqual(endpoint.setdefault('dependants', []), [])
+
+        self.assertEqual(endpoint.as_dict(), {
+            'name': 'jquery', 'source': 'jquery', 'target': '~2.0.0',
+            'missing': True, 'pkgMeta': {'name': 'jquery'}, 'dependants': []})
+        self.assertEqual(dict(endpoint), endpoint.as_dict())
+        self.assertEqual(json.loads(json.dumps(endpoint.as_dict())), endpoint)
+
+        del endpoint['missing']
+        del endpoint['pkgMeta']
+        self.assertEqual(sorted(endpoint), ['dependants', 'name', 'source', 'target'])
+
+        self.assertFalse(hasattr(endpoint, '__dict__'))
+
+    def test_equality(self):
+        endpoint = Endpoint.decompose('jquery#~2.0.0')
+
+        self.assertEqual(endpoint, {'name': '', 'source': 'jquery', 'target': '~2.0.0'})
+        self.assertEqual(endpoint, Endpoint.decompose('jquery#~2.0.0'))
+        self.assertNotEqual(endpoint, Endpoint.decompose('jquery#~2.1.0'))
+
+        flagged = Endpoint.decompose('jquery#~2.0.0')
+        flagged['incompatible'] = True
+        self.assertNotEqual(endpoint, flagged)
+
+        # Hashed by identity: keys change while resolving.
+        endpoints = {endpoint, Endpoint.decompose('jquery#~2.0.0'), flagged}
+        self.assertEqual(len(endpoints), 3)
+        endpoint['name'] = 'jquery'
+        self.assertIn(endpoint, endpoints)
+        endpoint['name'] = ''
+        self.assertEqual(Endpoint.get_key(endpoint), ('', 'jquery', '~2.0.0'))
+
+        # Names and sources are interned.
+        self.assertIs(Endpoint.decompose('j' + 'query#1')['source'], endpoint['source'])
+
+    def test_node(self):
+        endpoint = Endpoint.decompose_from_json('jquery', '~2.0.0')
+        endpoint['missing'] = True
+
+        node = PackageNode.from_dict(endpoint)
+        self.assertIsInstance(node, PackageNode)
+        self.assertIs(PackageNode.from_dict(node), node)
+        self.assertEqual(node, endpoint)
+
+        node['dependencies'] = {}
+        node['canonicalDir'] = '/some'
+        self.assertEqual(node.copy(), node)
+        self.assertIsNone(node._extra)
+
+    def test_node_cycle(self):
+        app = PackageNode(name='app', source='app', target='*', canonicalDir='/app')
+        lib = PackageNode(name='lib', source='lib', target='*', canonicalDir='/lib')
+        app['dependencies'] = {'lib': lib}
+        app['dependants'] = {'lib': lib}
+        lib['dependencies'] = {'app': app}
+        lib['dependants'] = {'app': app}
+
+        # Adjacent nodes are not compared, so cycles don't recurse.
+        self.assertEqual(app.copy(), app)
+        self.assertEqual(app, app.as_dict())
+        self.assertNotEqual(app, lib)
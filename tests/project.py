@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+from bowerer.project import Project
+from bowerer.snapshot import InstalledSnapshot
+
+
+def make_component(components_path, name, **pkg_meta):
+    pkg_meta.setdefault('name', name)
+    pkg_meta.setdefault('_source', 'https://github.com/some/%s.git' % name)
+    pkg_meta.setdefault('_target', '*')
+
+    path = join(components_path, name)
+    os.makedirs(path)
+
+    with open(join(path, '.bower.json'), 'w') as f:
+        json.dump(pkg_meta, f)
+
+
+class GatherInstalledTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cwd = join(self.path, 'project')
+        self.components_path = join(self.cwd, 'bower_components')
+        os.makedirs(self.components_path)
+
+        self.config = {
+            'cwd': self.cwd,
+            'directory': 'bower_components',
+            'storage': {'analysis': join(self.path, 'analysis')},
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_snapshot(self):
+        make_component(self.components_path, 'jquery', version='2.0.0')
+        make_component(self.components_path, 'angular', version='1.0.0')
+
+        installed = Project(self.config).gather_installed()
+        self.assertEqual(sorted(installed.keys()), ['angular', 'jquery'])
+
+        snapshot = InstalledSnapshot.from_config(self.config)
+        self.assertTrue(snapshot.dir_unchanged)
+        self.assertEqual(len(snapshot.filepaths), 2)
+
+        # Changed metadata is parsed again.
+        with open(join(self.components_path, 'jquery', '.bower.json'), 'w') as f:
+            json.dump({'name': 'jquery', 'version': '2.0.1', '_source': 'jquery', '_target': '*'}, f)
+
+        installed = Project(self.config).gather_installed()
+        self.assertEqual(installed['jquery']['pkgMeta']['version'], '2.0.1')
+
+        # Changed listing is scanned again.
+        shutil.rmtree(join(self.components_path, 'angular'))
+        make_component(self.components_path, 'backbone')
+
+        installed = Project(self.config).gather_installed()
+        self.assertEqual(sorted(installed.keys()), ['backbone', 'jquery'])
+        self.assertEqual(len(InstalledSnapshot.from_config(self.config).filepaths), 2)
+
+    def test_snapshot_metadata_written(self):
+        make_component(self.components_path, 'jquery')
+        os.makedirs(join(self.components_path, 'angular'))
+        make_component(self.components_path, 'backbone')
+        with open(join(self.components_path, 'backbone', '.bower.json'), 'w') as f:
+            f.write('{broken')
+
+        self.assertEqual(list(Project(self.config).gather_installed().keys()), ['jquery'])
+
+        snapshot = InstalledSnapshot.from_config(self.config)
+        self.assertEqual(len(snapshot.filepaths), 3)
+
+        # Metadata written (or fixed) in place doesn't change the listing.
+        dir_stat = InstalledSnapshot.get_stat(self.components_path)
+        with open(join(self.components_path, 'angular', '.bower.json'), 'w') as f:
+            json.dump({'name': 'angular', '_source': 'angular', '_target': '*'}, f)
+        with open(join(self.components_path, 'backbone', '.bower.json'), 'w') as f:
+            json.dump({'name': 'backbone', '_source': 'backbone', '_target': '*'}, f)
+        self.assertEqual(InstalledSnapshot.get_stat(self.components_path), dir_stat)
+
+        installed = Project(self.config).gather_installed()
+        self.assertEqual(sorted(installed.keys()), ['angular', 'backbone', 'jquery'])
+
+    def test_first_level_only(self):
+        make_component(self.components_path, 'jquery')
+        make_component(join(self.components_path, 'jquery', 'node_modules'), 'nested')
+        os.makedirs(join(self.path, 'linked'))
+        os.symlink(join(self.path, 'linked'), join(self.components_path, 'linked'))
+
+        project = Project(self.config)
+        self.assertEqual(list(project.gather_installed().keys()), ['jquery'])
+        self.assertEqual(list(project.gather_timings.keys()), ['jquery'])
+        self.assertEqual(list(project.gather_installed_links().keys()), ['linked'])
+
+
+class AnalyseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.cwd = join(self.path, 'project')
+        self.components_path = join(self.cwd, 'bower_components')
+        os.makedirs(self.components_path)
+        self.config = {'cwd': self.cwd, 'directory': 'bower_components'}
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def write_json(self, dependencies):
+        with open(join(self.cwd, 'bower.json'), 'w') as f:
+            json.dump({'name': 'project', 'dependencies': dependencies}, f)
+
+    def test_analyse(self):
+        self.write_json({'jquery': '~2.0.0', 'angular': '~1.0.0', 'backbone': '~1.1.0'})
+        make_component(self.components_path, 'jquery', _target='~2.0.0')
+        make_component(self.components_path, 'backbone', _target='~1.0.0', dependencies={'jquery': '~2.0.0'})
+        make_component(self.components_path, 'extra')
+
+        project = Project(self.config)
+        _, tree, flat = project.analyse()
+
+        self.assertEqual(sorted(tree['dependencies'].keys()), ['angular', 'backbone', 'extra', 'jquery'])
+        self.assertTrue(flat['angular']['missing'])
+        self.assertTrue(tree['dependencies']['backbone']['incompatible'])
+        self.assertTrue(flat['extra']['extraneous'])
+
+        jquery = flat['jquery']
+        self.assertIs(tree['dependencies']['jquery'], jquery)
+        self.assertEqual(sorted(project.graph.get_dependants(jquery).keys()), ['backbone', 'project'])
+        self.assertIs(project.graph.get_dependants(jquery)['project'], tree)
+
+        visited = []
+        project.walk_tree(tree, lambda node, name: visited.append(name))
+        self.assertEqual(sorted(visited), ['angular', 'backbone', 'extra', 'jquery'])
+
+    def test_deep(self):
+        depth = 3000
+        self.write_json({'pkg0': '*'})
+
+        for idx in range(depth):
+            dependencies = {'pkg%s' % (idx + 1): '*'} if idx + 1 < depth else {}
+            make_component(self.components_path, 'pkg%s' % idx, dependencies=dependencies)
+
+        project = Project(self.config)
+        _, tree, flat = project.analyse()
+
+        self.assertEqual(len(flat), depth)
+        self.assertIn('pkg%s' % (depth - 2), project.graph.get_dependants(flat['pkg%s' % (depth - 1)]))
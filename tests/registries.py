@@ -0,0 +1,119 @@
+import json
+import shutil
+import tempfile
+import unittest
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler
+
+from bowerer.config import normalize
+from bowerer.exceptions import ResolveError
+from bowerer.fetcher import Fetcher
+from bowerer.registries import Bower
+
+from helpers import LocalServer
+
+
+class RegistryHandler(BaseHTTPRequestHandler):
+
+    packages = {
+        '/private/packages/company-ui': {'name': 'company-ui', 'url': 'git://example.com/company-ui.git'},
+        '/private/packages/jquery': {'name': 'jquery', 'url': 'git://example.com/jquery-fork.git'},
+        '/public/packages/jquery': {'name': 'jquery', 'url': 'git://github.com/jquery/jquery.git'},
+        '/public/packages/angular': {'name': 'angular', 'url': 'git://github.com/angular/bower-angular.git'},
+    }
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        data = self.packages.get(self.path)
+
+        if self.path.endswith('/broken'):
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        if data is None:
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class BowerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.server = LocalServer.start(RegistryHandler, threaded=True)
+
+        base = self.server.url
+        self.config = {
+            'registry': {'search': [base + '/private/', base + '/public']},
+            'storage': {'registry': self.path},
+        }
+        RegistryHandler.requests = []
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def test_normalize(self):
+        config = normalize({'registry': 'http://some.registry/', 'tmp': '/tmp'})
+        self.assertEqual(config['registry']['search'], ['http://some.registry'])
+
+    def test_lookup(self):
+        found = Bower.lookup(['jquery', 'angular', 'company-ui', 'missing', 'jquery'], self.config)
+
+        self.assertEqual(found['jquery']['url'], 'git://example.com/jquery-fork.git')
+        self.assertEqual(found['angular']['url'], 'git://github.com/angular/bower-angular.git')
+        self.assertEqual(found['company-ui']['name'], 'company-ui')
+        self.assertIsNone(found['missing'])
+        self.assertEqual(sorted(RegistryHandler.requests), [
+            '/private/packages/angular',
+            '/private/packages/company-ui',
+            '/private/packages/jquery',
+            '/private/packages/missing',
+            '/public/packages/angular',
+            '/public/packages/missing',
+        ])
+
+        # Results are cached, not found ones as well.
+        RegistryHandler.requests = []
+        self.assertEqual(Bower.lookup(['missing', 'angular'], self.config), {
+            'missing': None, 'angular': found['angular']})
+        self.assertEqual(RegistryHandler.requests, [])
+
+        self.config['registry-ttl'] = 0
+        self.assertEqual(Bower('missing', self.config).get_app_data(), {})
+        self.assertEqual(RegistryHandler.requests, ['/private/packages/missing', '/public/packages/missing'])
+
+    def test_lookup_failed(self):
+        errors = {}
+        found = Bower.lookup(['broken', 'angular'], self.config, errors)
+
+        self.assertEqual(list(found.keys()), ['angular'])
+        self.assertIsInstance(errors['broken'], ResolveError)
+
+        # Other names are still looked up when errors are raised.
+        self.config['storage'] = {}
+        RegistryHandler.requests = []
+        self.assertRaises(ResolveError, Bower.lookup, ['broken', 'jquery'], self.config)
+        self.assertIn('/private/packages/jquery', RegistryHandler.requests)
+
+        # Fetcher raises errors for failed names only.
+        fetcher = Fetcher(self.config)
+        self.assertRaises(ResolveError, fetcher.lookup, ['broken', 'angular'])
+
+        RegistryHandler.requests = []
+        self.assertEqual(fetcher.get_url('angular'), 'git://github.com/angular/bower-angular.git')
+        self.assertRaises(ResolveError, fetcher.get_url, 'broken')
+        self.assertEqual(RegistryHandler.requests, [])
@@ -0,0 +1,102 @@
+import unittest
+
+from bowerer.exceptions import ConflictError
+from bowerer.solver import Solver
+from bowerer.versions import get_sort_key, satisfies
+
+
+class IndexProvider(object):
+
+    def __init__(self, index):
+        self.index = index
+        self.expanded = []
+
+    def get_candidates(self, name, target):
+        versions = sorted(self.index.get(name, {}), key=get_sort_key, reverse=True)
+        return [version for version in versions if satisfies(version, target)]
+
+    def get_dependencies(self, name, version):
+        self.expanded.append((name, version))
+        return sorted(self.index[name][version].items())
+
+
+class SolverTest(unittest.TestCase):
+
+    def solve(self, index, requirements):
+        return Solver(IndexProvider(index)).solve(requirements)
+
+    def test_latest(self):
+        index = {
+            'app': {'1.0.0': {'lib': '^1.0.0'}, '1.1.0': {'lib': '^1.0.0'}},
+            'lib': {'1.0.0': {}, '1.2.0': {}, '2.0.0': {}},
+        }
+        self.assertEqual(self.solve(index, [('app', '*')]), {'app': '1.1.0', 'lib': '1.2.0'})
+
+    def test_backtrack(self):
+        index = {
+            'app': {'1.0.0': {'lib': '~1.0.0', 'util': '~1.0.0'}},
+            'lib': {'1.0.0': {'util': '~1.0.0'}, '1.0.1': {'util': '~2.0.0'}},
+            'util': {'1.0.0': {}, '1.0.5': {}, '2.0.0': {}},
+        }
+        self.assertEqual(
+            self.solve(index, [('app', '*')]),
+            {'app': '1.0.0', 'lib': '1.0.0', 'util': '1.0.5'})
+
+    def test_unreachable_left_out(self):
+        index = {
+            'a': {'1.0.0': {'b': '*'}, '2.0.0': {'c': '^1.0.0'}},
+            'b': {'1.0.0': {}},
+            'c': {'1.0.0': {}},
+        }
+        self.assertEqual(self.solve(index, [('a', '^1.0.0')]), {'a': '1.0.0', 'b': '1.0.0'})
+
+    def test_lazy_dependencies(self):
+        index = {
+            'a': {'1.0.0': {}, '2.0.0': {}},
+            'b': {'1.0.0': {'a': '^1.0.0'}},
+        }
+        provider = IndexProvider(index)
+        Solver(provider).solve([('a', '*'), ('b', '*')])
+        self.assertNotIn(('a', '2.0.0'), provider.expanded)
+
+    def test_unsatisfiable(self):
+        index = {
+            'a': {'1.0.0': {'c': '~1.0.0'}, '1.1.0': {'c': '~1.0.0'}},
+            'b': {'1.0.0': {'c': '~2.0.0'}},
+            'c': {'1.0.0': {}, '2.0.0': {}},
+            'd': {'1.0.0': {}},
+        }
+        with self.assertRaises(ConflictError) as context:
+            self.solve(index, [('a', '*'), ('b', '*'), ('d', '*')])
+
+        self.assertEqual(str(context.exception).splitlines()[1:], [
+            '  bower.json requires a',
+            '  bower.json requires b',
+            '  a#1.0.0, 1.1.0 requires c#~1.0.0',
+            '  b#1.0.0 requires c#~2.0.0',
+        ])
+
+    def test_no_candidates(self):
+        with self.assertRaises(ConflictError) as context:
+            self.solve({'a': {'1.0.0': {}}}, [('a', '^2.0.0')])
+
+        self.assertIn('bower.json requires a#^2.0.0', str(context.exception))
+
+    def test_scale(self):
+        # A chain of packages, the latest version of every one
+        # requires the next package version which doesn't exist.
+        size = 200
+        index = {}
+
+        for idx in range(size):
+            index['p%s' % idx] = versions = {}
+
+            for minor in range(5):
+                dependencies = {}
+                if idx + 1 < size:
+                    dependencies['p%s' % (idx + 1)] = '^1.%s.0' % (minor if minor < 4 else 5)
+                versions['1.%s.0' % minor] = dependencies
+
+        solution = self.solve(index, [('p0', '*')])
+        self.assertEqual(len(solution), size)
+        self.assertEqual(solution['p0'], '1.3.0')
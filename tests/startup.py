@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+import unittest
+
+
+PATH_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['requests', 'semantic_version', 'bowerer.api']
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_version(self):
+        code = (
+            "import sys; sys.argv = ['bowerer', '--version']\n"
+            "from bowerer.console import main\n"
+            "try:\n    main()\nexcept SystemExit:\n    pass")
+        out = subprocess.check_output(
+            [sys.executable, '-c', code + '\nimport sys; print(sorted(sys.modules))'],
+            env=dict(os.environ, PYTHONPATH=PATH_BASE))
+
+        modules = out.decode('utf-8')
+        for module in HEAVY_MODULES:
+            self.assertNotIn("'%s'" % module, modules)
+
+    def test_lazy_imports(self):
+        code = (
+            "import sys\n"
+            "from bowerer import api, config\n"
+            "config.load()\n"
+            "print(' '.join(m for m in ('requests', 'semantic_version') if m in sys.modules))")
+        out = subprocess.check_output([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=PATH_BASE))
+        self.assertEqual(out.decode('utf-8').strip(), '')
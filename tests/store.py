@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+from hashlib import sha256
+from os.path import join, exists
+
+from bowerer.net import HttpClient
+from bowerer.store import PackageStore, get_member_path
+
+from helpers import ArchiveHandler, LocalServer, get_tarball, make_tarball
+
+
+class PackageStoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = PackageStore(join(self.path, 'store'))
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+
+    def test_member_path(self):
+        self.assertEqual(get_member_path('jquery-abc/dist/jquery.js'), 'dist/jquery.js')
+        self.assertIsNone(get_member_path('jquery-abc'))
+        self.assertIsNone(get_member_path('jquery-abc/../../etc/passwd'))
+
+    def test_add_and_link(self):
+        archive_path = join(self.path, 'jquery.tar.gz')
+        make_tarball(archive_path, {
+            'jquery-abc/bower.json': '{"name": "jquery"}',
+            'jquery-abc/dist/jquery.js': 'var jQuery;',
+            'jquery-abc/../evil.js': 'evil',
+        })
+
+        self.assertIsNone(self.store.get_digest('jquery', '2.0.0'))
+        digest = self.store.add_archive('jquery', '2.0.0', archive_path)
+        self.assertEqual(self.store.get_digest('jquery', '2.0.0'), digest)
+        self.assertEqual(self.store.add_archive('jquery', '2.0.0', archive_path), digest)
+
+        for project in ('one', 'two'):
+            destination = join(self.path, project, 'bower_components', 'jquery')
+            self.store.link_into(digest, destination)
+
+            with open(join(destination, 'dist', 'jquery.js')) as f:
+                self.assertEqual(f.read(), 'var jQuery;')
+
+            self.assertFalse(exists(join(self.path, project, 'bower_components', 'evil.js')))
+
+        extracted = join(self.store.get_extracted_path(digest), 'bower.json')
+        self.assertEqual(os.stat(extracted).st_nlink, 3)
+
+
+class StreamingInstallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        self.store = PackageStore(join(self.path, 'store'))
+
+        self.archive = get_tarball({'jquery-abc/dist/jquery.js': 'var jQuery;'})
+        self.server = LocalServer.start(ArchiveHandler, archive=self.archive)
+
+    def tearDown(self):
+        self.server.stop()
+        shutil.rmtree(self.path)
+
+    def test_install(self):
+        url = '%s/jquery.tar.gz' % self.server.url
+        destination = join(self.path, 'project', 'bower_components', 'jquery')
+        os.makedirs(join(destination, 'stale'))
+
+        digest = self.store.install('jquery', '2.0.0', url, destination, HttpClient(), join(self.path, 'tmp'))
+
+        self.assertEqual(digest, sha256(self.archive).hexdigest())
+        self.assertTrue(exists(self.store.get_archive_path(digest)))
+        self.assertTrue(exists(join(destination, 'dist', 'jquery.js')))
+        self.assertFalse(exists(join(destination, 'stale')))
+        self.assertEqual(os.listdir(join(self.path, 'project', 'bower_components')), ['jquery'])
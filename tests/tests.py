@@ -2,6 +2,21 @@ import unittest
 
 from utils import *
 from config import *
+from net import *
+from manager import *
+from cache import *
+from store import *
+from lock import *
+from project import *
+from versions import *
+from solver import *
+from fetcher import *
+from hosts import *
+from registries import *
+from mirror import *
+from startup import *
+from nodes import *
+from tracing import *
 
 
 if __name__ == '__main__':
@@ -0,0 +1,117 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from os.path import join
+
+from bowerer import tracing
+from bowerer.console import get_parser
+
+
+PATH_BASE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@tracing.traced('traced.func')
+def traced_func(value):
+    return value * 2
+
+
+class TracingTest(unittest.TestCase):
+
+    def tearDown(self):
+        tracing.stop()
+
+    def test_idle(self):
+        self.assertIsNone(tracing.stop())
+
+        with tracing.span('idle', url='http://some') as current:
+            current.set(status=200)
+
+        self.assertIs(current, tracing.span('other'))
+        self.assertEqual(traced_func(2), 4)
+
+    def test_spans(self):
+        tracer = tracing.start()
+
+        with tracing.span('GET', tracing.CATEGORY_HTTP, url='http://some/slow') as current:
+            current.set(status=200)
+
+        with tracing.span('GET', tracing.CATEGORY_HTTP, url='http://some/fast'):
+            pass
+
+        def fetch():
+            with tracing.span('fetch', tracing.CATEGORY_PACKAGE, package='jquery'):
+                traced_func(1)
+
+        thread = threading.Thread(target=fetch, name='worker')
+        thread.start()
+        thread.join()
+
+        try:
+            with tracing.span('install', tracing.CATEGORY_PACKAGE, package='jquery'):
+                raise ValueError('failed')
+        except ValueError:
+            pass
+
+        self.assertIs(tracing.stop(), tracer)
+
+        with tracing.span('after'):
+            pass
+
+        self.assertEqual([span[0] for span in tracer.spans], ['GET', 'GET', 'traced.func', 'fetch', 'install'])
+        self.assertEqual(tracer.spans[0][5], {'url': 'http://some/slow', 'status': 200})
+        self.assertEqual(tracer.spans[-1][5], {'package': 'jquery', 'error': 'ValueError'})
+
+        events = tracer.get_events()
+        self.assertIn({'ph': 'M', 'pid': 1, 'tid': thread.ident, 'name': 'thread_name', 'args': {'name': 'worker'}},
+                      events)
+        completes = [event for event in events if event['ph'] == 'X']
+        self.assertEqual(len(completes), 5)
+        self.assertTrue(all(event['dur'] >= 0 and event['ts'] >= 0 for event in completes))
+
+        summary = tracer.get_summary(top=1)
+        self.assertIn('traced.func', summary)
+        self.assertIn('jquery (fetch, install)', summary)
+        self.assertEqual(summary.count('http://some/'), 1)
+
+    def test_profile(self):
+        cwd = tempfile.mkdtemp()
+
+        with open(join(cwd, 'bower.json'), 'w') as f:
+            json.dump({'name': 'project'}, f)
+
+        try:
+            code = (
+                "import sys\n"
+                "sys.argv = ['bowerer', '--profile', '--profile-file', 'trace.json', 'mirror', 'snapshot', 'mirror']\n"
+                "from bowerer.console import main\n"
+                "main()")
+            out = subprocess.check_output(
+                [sys.executable, '-c', code], cwd=cwd, env=dict(os.environ, PYTHONPATH=PATH_BASE))
+
+            self.assertIn('config.load', out.decode('utf-8'))
+
+            with open(join(cwd, 'trace.json')) as f:
+                trace = json.load(f)
+
+            self.assertIn('mirror', [event['name'] for event in trace['traceEvents']])
+
+        finally:
+            shutil.rmtree(cwd)
+
+    def test_profile_args(self):
+        parser = get_parser()
+
+        parsed, _ = parser.parse_known_args(['--profile', 'install', 'jquery'])
+        self.assertTrue(parsed.profile)
+        self.assertEqual(parsed.profile_file, 'bowerer-profile.json')
+        self.assertEqual(parsed.main_subparsers, 'install')
+        self.assertEqual(parsed.endpoint, ['jquery'])
+
+        parsed, _ = parser.parse_known_args(['--profile-file', 'trace.json', 'install', 'jquery'])
+        self.assertFalse(parsed.profile)
+        self.assertEqual(parsed.profile_file, 'trace.json')
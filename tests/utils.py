@@ -1,3 +1,4 @@
+# -*- coding: utf-8 -*-
 import unittest
 from functools import partial
 
@@ -133,6 +134,50 @@ class EndpointsTest(unittest.TestCase):
         self.assertRaises(EndpointError, Endpoint.decompose_from_json, None, None)
         self.assertRaises(EndpointError, Endpoint.decompose_from_json, '', '')
 
+    def test_decompose_many(self):
+        decomposed = Endpoint.decompose_many({'jquery': '~1.9.1', 'backbone': 'backbone-amd#~1.0.0', 'foo': ''})
+
+        self.assertEqual(sorted(decomposed, key=Endpoint.get_key), [
+            {'name': 'backbone', 'source': 'backbone-amd', 'target': '~1.0.0'},
+            {'name': 'foo', 'source': 'foo', 'target': '*'},
+            {'name': 'jquery', 'source': 'jquery', 'target': '~1.9.1'},
+        ])
+        self.assertEqual(Endpoint.decompose_many(None), [])
+
+        # Cached results are not shared between calls.
+        decomposed[0]['missing'] = True
+        self.assertNotIn('missing', Endpoint.decompose_many({'jquery': '~1.9.1', 'backbone': 'backbone-amd#~1.0.0'})[0])
+
+        self.assertRaises(EndpointError, Endpoint.decompose_many, {'a|b': '1.0.0'})
+
+    def test_fast_path(self):
+
+        def decompose(endpoint):
+            match = Endpoint.RE_ENDPOINT.match(endpoint)
+            if not match:
+                return None
+            target = (match.group(3) or '').strip()
+            return (
+                (match.group(1) or '').strip(), (match.group(2) or '').strip(),
+                '*' if Endpoint.is_wildcard(target) else target)
+
+        def parse(func, *args):
+            try:
+                return func(*args)
+            except EndpointError:
+                return None
+
+        for endpoint in (
+                'jquery', 'jquery#', ' jquery # ~1.0 ', '#1.0', ' #1.0', 'jquery#a#b', 'a|b#1', 'jquery#latest',
+                'jquery#1.0\n', 'ünicode#1', 'a=b#1'):
+            self.assertEqual(parse(Endpoint._parse, endpoint), decompose(endpoint), endpoint)
+
+        for key, val in (
+                ('jquery', '~1.0'), ('j.query', '1'), ('jquery.', '1'), ('jq-uery_', ' latest '), ('-', '1'),
+                ('bad name', '1'), ('a|b', '1'), ('ünicode', '1'), ('a', '1\n'), ('a', '')):
+            composed = '%s=%s#%s' % (key.strip(), key.strip(), val.strip())
+            self.assertEqual(parse(Endpoint._parse_json, key, val), decompose(composed), (key, val))
+
     def test_decomposed_to_json(self):
         mapping = [
             ({'name': 'jquery', 'source': 'jquery', 'target': '~1.9.1'},
@@ -0,0 +1,33 @@
+import unittest
+
+from semantic_version import Version
+
+from bowerer.versions import get_spec, get_version, satisfies, select, get_sort_key
+
+
+class VersionsTest(unittest.TestCase):
+
+    def test_parse(self):
+        self.assertEqual(get_version('v2.0'), Version('2.0.0'))
+        self.assertIsNone(get_version('master'))
+        self.assertIs(get_spec('~2.0.0'), get_spec('~2.0.0'))
+        self.assertIsNone(get_spec('master'))
+
+    def test_satisfies(self):
+        self.assertTrue(satisfies('2.0.5', '~2.0.0'))
+        self.assertTrue(satisfies('1.5.0', '>=1.0 <2.0'))
+        self.assertTrue(satisfies('1.5.0', '*'))
+        self.assertFalse(satisfies('2.1.0', '~2.0.0'))
+        self.assertFalse(satisfies('2.1.0', 'master'))
+        self.assertFalse(satisfies('master', '~2.0.0'))
+
+    def test_select(self):
+        versions = [Version('1.0.0'), Version('2.0.1'), Version('2.0.3'), Version('2.1.0')]
+        self.assertEqual(select(versions, '~2.0.0'), Version('2.0.3'))
+        self.assertEqual(select(versions, 'latest'), Version('2.1.0'))
+        self.assertIsNone(select(versions, '~3.0.0'))
+
+    def test_sort_key(self):
+        self.assertEqual(
+            sorted(['1.10.0', 'master', '1.2.0'], key=get_sort_key),
+            ['master', '1.2.0', '1.10.0'])